@@ -0,0 +1,209 @@
+import asyncio
+import copy
+import json as jsonlib
+import logging
+
+import aiohttp
+
+from .Base import Base, FileUpload, _cacheEvent, _encodeJson, _isReplayable, _isSeekable, _monotonic, _overloadedStatusCodes, _requestEvent
+from .ClientContext import endpointName
+from .OxfordError import OxfordError
+from .RetryPolicy import parseRetryAfter
+
+_logger = logging.getLogger('projectoxford')
+
+
+class AsyncBase(Base):
+    """The base class for asyncio oxford API clients. Every API method returns an awaitable
+    and accepts the same arguments and options dictionaries as its synchronous counterpart.
+    Requires Python 3.5+ and aiohttp."""
+
+    async def _invoke(self, method, url, json=None, data=None, headers={}, params={}, retries=0, notFound=None):
+        """Attempt to invoke the a call to oxford without blocking the event loop.
+        Failed attempts are retried as described by the context's :class:`RetryPolicy`.
+        Args:
+            :param method: method for the new request.
+            :param url: URL for the new request.
+            :param data: (optional) bytes, memoryview, :class:`FileUpload`, file-like object or iterator of chunks to send in the body of the request.
+            :param json: (optional) json data to send in the body of the request.
+            :param headers: (optional) Dictionary of HTTP Headers to send with the request.
+            :param params: (optional) Dictionary to be sent in the query string for the request.
+            :param retries: The number of times this call has been retried.
+            :param notFound: (optional) The result of a 404 response, None unless given.
+        """
+        flight = self.context.singleFlight
+        key = flight.key(self.key, method, url, params, json, data) if flight is not None else None
+        if key is None:
+            return await self._request(method, url, json, data, headers, params, retries, notFound)
+
+        call = flight.doAsync(key, lambda: self._request(method, url, json, data, headers, params, retries, notFound))
+        result = await asyncio.shield(call.task)
+        return copy.deepcopy(result) if call.waiters else result
+
+    async def _request(self, method, url, json, data, headers, params, retries, notFound):
+        """Sends a call without blocking the event loop, retrying failed attempts, and reports it
+        to the context's request hooks, see :meth:`_invoke`"""
+        data, headers = _encodeJson(json, data, headers)
+        if not self.context.requestHooks:
+            return await self._retrying(method, url, data, headers, params, retries, notFound, None)
+
+        event = _requestEvent(method, url, data)
+        started = _monotonic()
+        try:
+            return await self._retrying(method, url, data, headers, params, retries, notFound, event)
+        except Exception as error:
+            event['error'] = error
+            raise
+        finally:
+            event['latency'] = _monotonic() - started
+            self.context.emit(event)
+
+    async def _retrying(self, method, url, data, headers, params, retries, notFound, event):
+        session = self.context.asyncSession()
+
+        # aiohttp only accepts string query values, encode them the way requests does
+        query = dict((name, str(value)) for name, value in params.items())
+
+        # streams are rewound for each attempt, chunk iterators can only be sent once
+        replayable = _isReplayable(data)
+        start = data.tell() if _isSeekable(data) else None
+
+        policy = self.context.retryPolicy
+        deadline = policy.deadline()
+        endpoint = endpointName(url)
+        limiter = self.context.rateLimiter(self.key)
+        concurrency = self.context.concurrencyLimiter(url)
+        while True:
+            if limiter is not None:
+                waitStarted = _monotonic()
+                if limiter.backend.blocking:
+                    wait = await asyncio.get_event_loop().run_in_executor(None, limiter.reserve)
+                else:
+                    wait = limiter.reserve()
+                await asyncio.sleep(wait)
+                if event is not None:
+                    event['throttleSeconds'] += _monotonic() - waitStarted
+
+            body = data.open() if isinstance(data, FileUpload) else data
+            if start is not None:
+                body.seek(start)
+
+            timeout = aiohttp.ClientTimeout(total=policy.timeout(deadline))
+            try:
+                status, responseHeaders, content = await self._send(concurrency, session, method, self.context.resolve(url), data=_asyncBody(body),
+                                                                    headers=headers, params=query, timeout=timeout)
+            except Exception as error:
+                status = None
+                delay = policy.nextDelay(retries, deadline, error=error, method=method, endpoint=endpoint) if replayable else None
+                if delay is None:
+                    raise
+                _logger.warning('The projectoxford API call failed with %r. Retry %d after %.2f seconds', error, retries + 1, delay)
+            else:
+                if event is not None:
+                    event['status'] = status
+                    event['responseBytes'] = len(content)
+                retryAfter = parseRetryAfter(responseHeaders.get('retry-after'))
+                delay = policy.nextDelay(retries, deadline, status=status, retryAfter=retryAfter, method=method, endpoint=endpoint) if replayable else None
+                if delay is None:
+                    break
+                _logger.warning('The projectoxford API returned status %d. Retry %d after %.2f seconds', status, retries + 1, delay)
+            finally:
+                if body is not data:
+                    body.close()
+
+            if event is not None:
+                event['throttleSeconds'] += delay if status == 429 else 0
+                event['retries'] += 1
+            await asyncio.sleep(delay)
+            retries += 1
+
+        if status == 429:  # throttling response code
+            raise OxfordError('retry count ({0}) exceeded: {1}'.format(str(retries), content.decode('utf-8', 'replace')), status)
+        elif status == 200 or status == 201:
+            result = content  # return the raw body if an unexpected content type is returned
+            contentType = responseHeaders.get('content-type', '').lower()
+            if 'content-length' in responseHeaders and int(responseHeaders['content-length']) == 0:
+                result = None
+            elif 'application/json' in contentType:
+                result = jsonlib.loads(content.decode('utf-8')) if content else None
+
+            return result
+        elif status == 404:
+            return notFound
+        else:
+            raise OxfordError('status {0}: {1}'.format(str(status), content.decode('utf-8', 'replace')), status)
+
+    async def _withCache(self, cache, key, url, invoke):
+        """Returns a cached result, or awaits the call and caches its result"""
+        hit, result = cache.get(key)
+        self.context.emit(_cacheEvent(url, hit))
+        if hit:
+            return result
+
+        result = await invoke()
+        cache.put(key, url, result)
+        return result
+
+    async def _after(self, result, callback):
+        """Awaits a call and calls back with its result before returning it"""
+        result = await result
+        callback(result)
+        return result
+
+    async def _then(self, result, function):
+        """Awaits a call and returns its result passed through a function"""
+        return function(await result)
+
+    async def _send(self, concurrency, session, method, url, **kwargs):
+        """Sends a single attempt, holding a slot of the adaptive concurrency limiter if there is one"""
+        if concurrency is None:
+            async with session.request(method, url, **kwargs) as response:
+                content = await response.read()
+            return response.status, response.headers, content
+
+        loop = asyncio.get_event_loop()
+        while True:
+            freed = loop.create_future()
+            if concurrency.tryAcquire(lambda: loop.call_soon_threadsafe(_resolve, freed)):
+                break
+            await freed
+
+        latency = None
+        overloaded = False
+        try:
+            started = loop.time()
+            async with session.request(method, url, **kwargs) as response:
+                content = await response.read()
+            latency = loop.time() - started
+            overloaded = response.status in _overloadedStatusCodes
+            return response.status, response.headers, content
+        finally:
+            concurrency.release(latency, overloaded)
+
+
+def _asyncBody(body):
+    """aiohttp streams bytes and files itself, but only accepts asynchronous iterators of chunks"""
+    if body is None or isinstance(body, (bytes, bytearray, memoryview)) or hasattr(body, 'read'):
+        return body
+    return _ChunkIterator(body)
+
+
+class _ChunkIterator(object):
+    """Iterates chunks asynchronously, a class rather than an async generator so that it runs on Python 3.5"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
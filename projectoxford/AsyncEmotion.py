@@ -0,0 +1,6 @@
+from .AsyncBase import AsyncBase
+from .Emotion import Emotion
+
+
+class AsyncEmotion(AsyncBase, Emotion):
+    """Asyncio client for using the Project Oxford Emotion APIs. See :class:`Emotion` for the API methods."""
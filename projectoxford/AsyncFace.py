@@ -0,0 +1,267 @@
+from .AsyncBase import AsyncBase
+from .AsyncParallel import imap
+from .AsyncPerson import AsyncPerson
+from .AsyncPersonGroup import AsyncPersonGroup
+from .EnrollmentCheckpoint import EnrollmentCheckpoint, personsByName
+from .Face import Face, _ShardedGrouping, _chunks, _groupingBatchSize, _identifyBatchSize, _mergeIdentified, _rankSimilar, _similarBatchSize, _VerifyMatrix
+from .Reconciliation import changeCalls, facesToInspect, groupCalls, planReconciliation, reconciliationResult, recordApplied
+
+
+class AsyncFace(AsyncBase, Face):
+    """Asyncio client for using the Project Oxford face APIs. See :class:`Face` for the API methods."""
+
+    def __init__(self, key, context=None):
+        """Initializes a new instance of the class.
+        Args:
+            key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
+        """
+        AsyncBase.__init__(self, key, context)
+        self.person = AsyncPerson(self.key, self.context)
+        self.personGroup = AsyncPersonGroup(self.key, self.context)
+
+    def detectMany(self, sources, concurrency=4, ordered=True, options=None):
+        """Detects faces in many images with a bounded number of calls in flight.
+        See :meth:`Face.detectMany`.
+
+        Returns:
+            async generator. (index, result, error) for every source
+        """
+
+        def detectOne(source):
+            if options:
+                merged = dict(options)
+                merged.update(source)
+                source = merged
+            return self.detect(source)
+
+        return imap(detectOne, sources, concurrency, ordered)
+
+    async def similarMany(self, sourceFace, candidateFaces, topK=10, chunkSize=_similarBatchSize, concurrency=4, stopConfidence=None):
+        """Detect similar faces among any number of candidate faces, searching chunks of at most
+        100 candidates concurrently. See :meth:`Face.similarMany`.
+
+        Returns:
+            object. The resulting JSON, ranked by confidence
+        """
+        chunks = _chunks(candidateFaces, min(chunkSize, _similarBatchSize))
+        positions = dict((faceId, position) for position, faceId in enumerate(candidateFaces))
+
+        def similarChunk(chunk):
+            return self.similar(sourceFace, chunk)
+
+        matches = []
+        confident = 0
+        searched = imap(similarChunk, chunks, concurrency, ordered=False)
+        try:
+            async for _, result, error in searched:
+                if error is not None:
+                    raise error
+                for similarFace in result or []:
+                    matches.append(similarFace)
+                    if stopConfidence is not None and similarFace.get('confidence', 0) >= stopConfidence:
+                        confident += 1
+                if topK is not None and stopConfidence is not None and confident >= topK:
+                    break
+        finally:
+            await searched.aclose()
+
+        return _rankSimilar(matches, positions, topK)
+
+    async def shardedGrouping(self, faceIds, shardSize=_groupingBatchSize, concurrency=4):
+        """Divides any number of candidate faces into groups, grouping shards of at most 100 faces
+        concurrently and joining similar groups across shards. See :meth:`Face.shardedGrouping`.
+
+        Returns:
+            object. The resulting JSON
+        """
+        shards = _chunks(faceIds, min(shardSize, _groupingBatchSize))
+        if len(shards) <= 1:
+            return await self.grouping(faceIds)
+
+        results = []
+        grouped = imap(self.grouping, shards, concurrency)
+        try:
+            async for _, result, error in grouped:
+                if error is not None:
+                    raise error
+                if result is None:
+                    return None
+                results.append(result)
+        finally:
+            await grouped.aclose()
+
+        merger = _ShardedGrouping(results, min(shardSize, _groupingBatchSize))
+        batches = merger.batches()
+        while batches:
+            joined = imap(self.grouping, batches, concurrency, ordered=False)
+            try:
+                async for _, result, error in joined:
+                    if error is not None:
+                        raise error
+                    merger.join(result)
+            finally:
+                await joined.aclose()
+            batches = merger.batches()
+
+        return merger.result()
+
+    async def identify(self, personGroupId, faces, maxNumOfCandidatesReturned=1, concurrency=4):
+        """Identifies persons from a person group by one or more input faces, splitting long
+        lists into concurrently identified chunks. See :meth:`Face.identify`.
+
+        Returns:
+            object. The resulting JSON
+        """
+        cache = self.context.identifyCache
+        if cache is None:
+            return await self._identifyMany(personGroupId, faces, maxNumOfCandidatesReturned, concurrency)
+
+        if cache.needsRevalidation(self.key, personGroupId):
+            await self.personGroup.trainingStatus(personGroupId)
+        generation, known, missing = cache.split(self.key, personGroupId, faces, maxNumOfCandidatesReturned)
+        results = await self._identifyMany(personGroupId, missing, maxNumOfCandidatesReturned, concurrency) if missing else []
+        if results is None:
+            return None
+        cache.store(self.key, personGroupId, maxNumOfCandidatesReturned, generation, results)
+        return _mergeIdentified(faces, known, results)
+
+    async def _identifyMany(self, personGroupId, faces, maxNumOfCandidatesReturned, concurrency):
+        def identifyChunk(chunk):
+            return self._identifyChunk(personGroupId, chunk, maxNumOfCandidatesReturned)
+
+        results = []
+        identified = imap(identifyChunk, _chunks(faces, _identifyBatchSize) or [faces], concurrency)
+        try:
+            async for _, result, error in identified:
+                if error is not None:
+                    raise error
+                if result is None:
+                    return None
+                results.extend(result)
+        finally:
+            await identified.aclose()  # cancels the chunks still in flight
+
+        return results
+
+    async def verifyMatrix(self, faceIds, pairs=None, concurrency=4, transitive=False, dense=True):
+        """Verifies every pair of faces, or the given pairs, with a bounded number of calls in flight.
+        See :meth:`Face.verifyMatrix`.
+
+        Returns:
+            object. faceIds and either isIdentical and confidence matrices or an edge list
+        """
+        matrix = _VerifyMatrix(faceIds, pairs, transitive)
+
+        async def verifyPair(pair):
+            return pair, await self.verify(matrix.faceIds[pair[0]], matrix.faceIds[pair[1]])
+
+        verified = imap(verifyPair, matrix.pairs(), concurrency)
+        try:
+            async for _, result, error in verified:
+                if error is not None:
+                    raise error
+                matrix.record(*result)
+        finally:
+            await verified.aclose()
+
+        return matrix.result(dense)
+
+    async def bulkEnroll(self, personGroupId, persons, checkpointPath=None, concurrency=4, options=None, train=True):
+        """Enrolls many persons into an existing person group concurrently, recording progress in a
+        checkpoint file so that a restarted enrollment skips the calls already made. See :meth:`Face.bulkEnroll`.
+
+        Returns:
+            object. persons, errors and training, as for :meth:`Face.bulkEnroll`
+        """
+        checkpoint = EnrollmentCheckpoint(checkpointPath)
+        try:
+            existing = personsByName(await self.person.list(personGroupId))
+
+            async def enroll(item):
+                name, sources = item
+                personId = checkpoint.person(name)['personId']
+                if personId is None:
+                    person = existing.get(name) or await self.person.create(personGroupId, [], name)
+                    personId = person['personId']
+                    checkpoint.record(name, personId=personId)
+
+                for key, source, faceId in checkpoint.pendingSources(name, sources):
+                    if faceId is None:
+                        faceId = checkpoint.recordDetected(name, key, await self.detect(dict(options or {}, **source)))
+                        if faceId is None:
+                            continue
+
+                    await self.person.addFace(personGroupId, personId, faceId)
+                    checkpoint.record(name, source=key, added=True)
+
+            items = list(persons.items())
+            errors = {}
+            enrolled = imap(enroll, items, concurrency, ordered=False)
+            try:
+                async for index, _, error in enrolled:
+                    if error is not None:
+                        errors[items[index][0]] = error
+            finally:
+                await enrolled.aclose()
+
+            training = await self.personGroup.trainAndPollForCompletion(personGroupId) if train else None
+            return {'persons': checkpoint.summary(persons), 'errors': errors, 'training': training}
+        finally:
+            checkpoint.close()
+
+    async def reconcile(self, personGroupId, desired, concurrency=4, options=None, dryRun=False):
+        """Brings a person group to a desired state with as few calls as possible, applying the
+        changes concurrently. See :meth:`Face.reconcile`.
+
+        Returns:
+            object. plan, noFace and errors, as for :meth:`Face.reconcile`
+        """
+        group = await self.personGroup.get(personGroupId)
+        persons = await self.person.list(personGroupId) if group is not None else []
+
+        async def getFaceTag(pair):
+            face = await self.person.getFace(personGroupId, pair[0], pair[1])
+            return face.get('userData') if face is not None else None
+
+        faceTags, pairs = self._knownFaceTags(personGroupId, facesToInspect(desired, persons))
+        inspected = imap(getFaceTag, pairs, concurrency)
+        try:
+            async for index, tag, error in inspected:
+                if error is not None:
+                    raise error
+                faceTags[pairs[index][1]] = tag
+        finally:
+            await inspected.aclose()
+
+        plan = planReconciliation(desired, group, persons, faceTags)
+        result = reconciliationResult(plan)
+        if dryRun:
+            return result
+
+        await self._perform(groupCalls(personGroupId, desired, plan))
+
+        async def apply(change):
+            noFace = []
+            await self._perform(changeCalls(personGroupId, change, options, noFace))
+            return noFace
+
+        changes = plan['persons']
+        applied = imap(apply, changes, concurrency, ordered=False)
+        try:
+            async for index, noFace, error in applied:
+                recordApplied(result, changes[index], noFace, error)
+        finally:
+            await applied.aclose()
+
+        return result
+
+    async def _perform(self, calls):
+        """Awaits the calls yielded by a generator of :mod:`Reconciliation`, sending it the result of each"""
+        result = None
+        while True:
+            try:
+                client, method, arguments = calls.send(result)
+            except StopIteration:
+                return
+            result = await getattr(getattr(self, client) if client else self, method)(*arguments)
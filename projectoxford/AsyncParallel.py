@@ -0,0 +1,83 @@
+import asyncio
+import collections
+
+
+def imap(function, iterable, concurrency, ordered=True):
+    """Awaits a coroutine function for every item of an iterable with a bounded number in flight.
+    The asyncio counterpart of :func:`Parallel.imap`: items are pulled from the iterable only as
+    slots free up, and stopping the iteration early cancels the items still in flight.
+
+    Args:
+        function (callable). Coroutine function called with each item.
+        iterable (iterable). The items, consumed lazily.
+        concurrency (int). The maximum number of items processed at once.
+        ordered (bool). Optional. Yield in input order rather than as items complete.
+
+    Returns:
+        async iterator. (index, result, error) for every item, where index is the item's position
+        in the input and error is the exception raised by the function or None. Await its aclose()
+        to cancel the items still in flight when stopping early.
+    """
+    if concurrency < 1:
+        raise Exception('concurrency must be at least 1')
+    return _Results(function, iterable, concurrency, ordered)
+
+
+class _Results(object):
+    """The iterator of :func:`imap`, a class rather than an async generator so that it runs on Python 3.5"""
+
+    def __init__(self, function, iterable, concurrency, ordered):
+        self._function = function
+        self._iterator = enumerate(iterable)
+        self._concurrency = concurrency
+        self._ordered = ordered
+        self._pending = {}
+        self._order = collections.deque()
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        pending = self._pending
+        try:
+            while not self._exhausted and len(pending) < self._concurrency:
+                try:
+                    index, item = next(self._iterator)
+                except StopIteration:
+                    self._exhausted = True
+                    break
+                task = asyncio.ensure_future(_call(self._function, item))
+                pending[task] = index
+                if self._ordered:
+                    self._order.append(task)
+
+            if not pending:
+                raise StopAsyncIteration
+
+            if self._ordered:
+                task = self._order.popleft()
+                await asyncio.wait([task])
+            else:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                task = next(iter(done))
+        except BaseException:
+            await self.aclose()
+            raise
+
+        index = pending.pop(task)
+        error = task.exception()
+        return index, task.result() if error is None else None, error
+
+    async def aclose(self):
+        """Stops the iteration, cancelling the items still in flight."""
+        self._exhausted = True
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+        self._order.clear()
+
+
+async def _call(function, item):
+    # errors raised before the coroutine starts are reported for the item too
+    return await function(item)
@@ -0,0 +1,28 @@
+from .AsyncBase import AsyncBase
+from .Person import Person, _named, _notFound
+
+
+class AsyncPerson(AsyncBase, Person):
+    """Asyncio client for using the Project Oxford person APIs. See :class:`Person` for the API methods."""
+
+    async def createOrUpdate(self, personGroupId, faceIds, name, userData=None):
+        """Creates or updates a person's information.
+
+        Args:
+            personGroupId (str). The target person's person group.
+            faceIds ([str]). Array of face id's for the target person.
+            name (str). Target person's display name. The maximum length is 128.
+            userData (str). Optional fields for user-provided data attached to a person. Size limit is 16KB.
+
+        Returns:
+            object. The resulting JSON
+        """
+        found, person = self._lookup(personGroupId, name)
+        if not found:
+            person = _named(await self.list(personGroupId), name)
+
+        # a person deleted since it was listed or indexed is created again
+        if person is not None and await self._update(personGroupId, person['personId'], faceIds, name, userData) is not _notFound:
+            return person
+
+        return await self.create(personGroupId, faceIds, name, userData)
@@ -0,0 +1,45 @@
+import asyncio
+
+from .AsyncBase import AsyncBase
+from .PersonGroup import PersonGroup, _monotonic
+
+
+class AsyncPersonGroup(AsyncBase, PersonGroup):
+    """Asyncio client for using the Project Oxford person group APIs. See :class:`PersonGroup` for the API methods."""
+
+    async def createOrUpdate(self, personGroupId, name, userData=None):
+        """Creates or updates a person group with a user-specified ID.
+
+        Args:
+            personGroupId (str). Numbers, en-us letters in lower case, '-', '_'. Max length: 64
+            name (str). Person group display name. The maximum length is 128.
+            userData (str). User-provided data attached to the group. The size limit is 16KB.
+
+        Returns:
+            object. The resulting JSON
+        """
+        if await self.get(personGroupId) is None:
+            return await self.create(personGroupId, name, userData)
+        else:
+            return await self.update(personGroupId, name, userData)
+
+    async def trainAndPollForCompletion(self, personGroupId, timeoutSeconds=30):
+        """Starts a person group training and polls until the status is not 'running'
+
+        Args:
+            personGroupId (str). Name of person group to train
+            timeoutSeconds (float). Optional. How long to wait for the training, measured on a monotonic clock
+
+        Returns:
+            object. The resulting JSON
+        """
+        deadline = _monotonic() + timeoutSeconds
+        status = await self.trainingStart(personGroupId)
+        while status['status'] == 'running':
+            await asyncio.sleep(1)
+            status = await self.trainingStatus(personGroupId)
+
+            if status['status'] == 'running' and _monotonic() >= deadline:
+                raise Exception('training timed out after {0} seconds, last known status: {1}'.format(timeoutSeconds, status))
+
+        return status
@@ -0,0 +1,6 @@
+from .AsyncBase import AsyncBase
+from .Vision import Vision
+
+
+class AsyncVision(AsyncBase, Vision):
+    """Asyncio client for using the Project Oxford vision APIs. See :class:`Vision` for the API methods."""
@@ -1,44 +1,207 @@
+import json as jsonlib
+import logging
+import os
 import time
-import requests
 
+from .ClientContext import ClientContext, endpointName
+from .OxfordError import OxfordError
+from .RetryPolicy import parseRetryAfter
+
+_logger = logging.getLogger('projectoxford')
+
+# deprecated, the default maximum number of retries of a :class:`RetryPolicy`
 retryCount = 5
 
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# response status codes that tell the adaptive concurrency limiter to back off
+_overloadedStatusCodes = (429, 503)
+
+
+class FileUpload(object):
+    """An image file that is streamed from disk on every attempt instead of being read into memory"""
+
+    def __init__(self, path):
+        """Initializes a new instance of the class.
+        Args:
+            path (str). the path of the image file.
+        """
+        self.size = os.stat(path).st_size  # fails up front if the file is missing, like open() would
+        self.path = path
+
+    def open(self):
+        """Opens the file for one attempt. The caller closes it."""
+        return open(self.path, 'rb')
+
+
+def _isSeekable(data):
+    return hasattr(data, 'read') and hasattr(data, 'seek') and hasattr(data, 'tell') and (not hasattr(data, 'seekable') or data.seekable())
+
+
+def _isReplayable(data):
+    """Whether a request body can be sent again, i.e. it is not a consumed stream or chunk iterator"""
+    return data is None or isinstance(data, (bytes, bytearray, memoryview, str, FileUpload)) or _isSeekable(data)
+
+
+def _byteView(data):
+    """A memoryview of anything but single bytes as a view of its bytes, as requests and aiohttp send one byte per item"""
+    if not isinstance(data, memoryview) or (data.itemsize == 1 and data.ndim == 1):
+        return data
+    try:
+        return data.cast('B')
+    except (AttributeError, TypeError):  # Python 2, or a view that is not contiguous
+        return data.tobytes()
+
+
+def _encodeJson(json, data, headers):
+    """Encodes a JSON body once for every attempt of a call, which also tells its size"""
+    if json is None:
+        return data, headers
+    headers = dict(headers)
+    headers.setdefault('Content-Type', 'application/json')
+    return jsonlib.dumps(json).encode('utf-8'), headers
+
+
+def _bodySize(data):
+    """The size of a request body where it is known without reading, seeking or encoding it, None otherwise"""
+    if data is None:
+        return 0
+    if isinstance(data, memoryview):
+        return data.nbytes
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, FileUpload):
+        return data.size
+    return None
+
+
+def _requestEvent(method, url, data):
+    """The event reported to request hooks for a call, filled in as it is sent"""
+    return {
+        'kind': 'request',
+        'endpoint': endpointName(url),
+        'method': method,
+        'status': None,
+        'error': None,
+        'latency': None,
+        'throttleSeconds': 0.0,
+        'retries': 0,
+        'requestBytes': _bodySize(data),
+        'responseBytes': None
+    }
+
+
+def _cacheEvent(url, hit):
+    """The event reported to request hooks for a cache lookup"""
+    return {'kind': 'cache', 'endpoint': endpointName(url), 'cache': 'hit' if hit else 'miss'}
+
 
 class Base(object):
     """The base class for oxford API clients"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
         if key and isinstance(key, str):
             self.key = key
         else:
             raise Exception('Key is required but a string was not provided')
 
-    def _invoke(self, method, url, json=None, data=None, headers={}, params={}, retries=0):
-        """Attempt to invoke the a call to oxford. If the call is trottled, retry.
+        self.context = context if context is not None else ClientContext.default()
+
+    def _invoke(self, method, url, json=None, data=None, headers={}, params={}, retries=0, notFound=None):
+        """Attempt to invoke the a call to oxford. Failed attempts are retried as described by the context's
+        :class:`RetryPolicy`, which by default covers throttling, server errors, connection resets and timeouts.
         Args:
             :param method: method for the new :class:`Request` object.
             :param url: URL for the new :class:`Request` object.
-            :param data: (optional) Dictionary, bytes, or file-like object to send in the body of the :class:`Request`.
+            :param data: (optional) bytes, memoryview, :class:`FileUpload`, file-like object or iterator of chunks to send in the body of the :class:`Request`.
             :param json: (optional) json data to send in the body of the :class:`Request`.
             :param headers: (optional) Dictionary of HTTP Headers to send with the :class:`Request`.
             :param params: (optional) Dictionary or bytes to be sent in the query string for the :class:`Request`.
             :param retries: The number of times this call has been retried.
+            :param notFound: (optional) The result of a 404 response, None unless given.
+
+        Identical reads made at the same time are sent once if the context has a :class:`SingleFlight`.
         """
+        flight = self.context.singleFlight
+        key = flight.key(self.key, method, url, params, json, data) if flight is not None else None
+        if key is None:
+            return self._request(method, url, json, data, headers, params, retries, notFound)
+        return flight.do(key, lambda: self._request(method, url, json, data, headers, params, retries, notFound))
 
-        response = requests.request(method, url, json=json, data=data, headers=headers, params=params)
+    def _request(self, method, url, json, data, headers, params, retries, notFound):
+        """Sends a call, retrying failed attempts, and reports it to the context's request hooks, see :meth:`_invoke`"""
+        data, headers = _encodeJson(json, data, headers)
+        if not self.context.requestHooks:
+            return self._retrying(method, url, data, headers, params, retries, notFound, None)
 
-        if response.status_code == 429:  # throttling response code
-            if retries <= retryCount:
-                delay = int(response.headers['retry-after'])
-                print('The projectoxford API was throttled. Retrying after {0} seconds'.format(str(delay)))
-                time.sleep(delay)
-                return self._invoke(method, url, json=json, data=data, headers=headers, params=params, retries=retries + 1)
+        event = _requestEvent(method, url, data)
+        started = _monotonic()
+        try:
+            return self._retrying(method, url, data, headers, params, retries, notFound, event)
+        except Exception as error:
+            event['error'] = error
+            raise
+        finally:
+            event['latency'] = _monotonic() - started
+            self.context.emit(event)
+
+    def _retrying(self, method, url, data, headers, params, retries, notFound, event):
+        # streams are rewound for each attempt, chunk iterators can only be sent once
+        replayable = _isReplayable(data)
+        start = data.tell() if _isSeekable(data) else None
+
+        policy = self.context.retryPolicy
+        deadline = policy.deadline()
+        endpoint = endpointName(url)
+        limiter = self.context.rateLimiter(self.key)
+        concurrency = self.context.concurrencyLimiter(url)
+        while True:
+            if limiter is not None:
+                waitStarted = _monotonic()
+                limiter.acquire()
+                if event is not None:
+                    event['throttleSeconds'] += _monotonic() - waitStarted
+
+            body = data.open() if isinstance(data, FileUpload) else data
+            if start is not None:
+                body.seek(start)
+
+            try:
+                response = self._send(concurrency, method, self.context.resolve(url), data=body, headers=headers, params=params,
+                                      timeout=policy.timeout(deadline))
+            except Exception as error:
+                status = None
+                delay = policy.nextDelay(retries, deadline, error=error, method=method, endpoint=endpoint) if replayable else None
+                if delay is None:
+                    raise
+                _logger.warning('The projectoxford API call failed with %r. Retry %d after %.2f seconds', error, retries + 1, delay)
             else:
-                raise Exception('retry count ({0}) exceeded: {1}'.format(str(retryCount), response.text))
+                status = response.status_code
+                if event is not None:
+                    event['status'] = status
+                    event['responseBytes'] = len(response.content or b'')
+                retryAfter = parseRetryAfter(response.headers.get('retry-after'))
+                delay = policy.nextDelay(retries, deadline, status=response.status_code, retryAfter=retryAfter, method=method, endpoint=endpoint) if replayable else None
+                if delay is None:
+                    break
+                _logger.warning('The projectoxford API returned status %d. Retry %d after %.2f seconds', response.status_code, retries + 1, delay)
+            finally:
+                if body is not data:
+                    body.close()
+
+            if event is not None:
+                event['throttleSeconds'] += delay if status == 429 else 0
+                event['retries'] += 1
+            time.sleep(delay)
+            retries += 1
+
+        if response.status_code == 429:  # throttling response code
+            raise OxfordError('retry count ({0}) exceeded: {1}'.format(str(retries), response.text), response.status_code)
         elif response.status_code == 200 or response.status_code == 201:
             result = response  # return the raw response if an unexpected content type is returned
             if 'content-length' in response.headers and int(response.headers['content-length']) == 0:
@@ -51,20 +214,43 @@ class Base(object):
 
             return result
         elif response.status_code == 404:
-            return None
+            return notFound
         else:
-            raise Exception('status {0}: {1}'.format(str(response.status_code), response.text))
+            raise OxfordError('status {0}: {1}'.format(str(response.status_code), response.text), response.status_code)
+
+    def _send(self, concurrency, method, url, **kwargs):
+        """Sends a single attempt, holding a slot of the adaptive concurrency limiter if there is one"""
+        if concurrency is None:
+            return self.context.request(method, url, **kwargs)
+
+        concurrency.acquire()
+        latency = None
+        overloaded = False
+        try:
+            started = _monotonic()
+            response = self.context.request(method, url, **kwargs)
+            latency = _monotonic() - started
+            overloaded = response.status_code in _overloadedStatusCodes
+            return response
+        finally:
+            concurrency.release(latency, overloaded)
 
-    def _postWithOptions(self, url, options, params={}):
+    @property
+    def rateLimiter(self):
+        """The :class:`RateLimiter` pacing calls made with this client's key, or None if calls are not rate limited."""
+        return self.context.rateLimiter(self.key)
+
+    def _postWithOptions(self, url, options, params={}, cached=True):
         """Common options handler for vision / face detection
 
         Args:
             url (string). The url to invoke in the Oxford API
             options (Object). The Options dictionary describing features to extract
             options.url (string). The Url to image to be analyzed
-            options.path (string). The Path to image to be analyzed
-            options.stream (string). The image stream to be analyzed
+            options.path (string). The Path to image to be analyzed, streamed from disk
+            options.stream (bytes, memoryview, file or iterator). The image bytes, a file-like object or an iterator of chunks to be analyzed
             params (Object). The url parameters dictionary
+            cached (bool). Optional. Whether the context's response cache may answer the call
 
         Returns:
             object. The resulting JSON
@@ -82,20 +268,86 @@ class Base(object):
             headers['Content-Type'] = 'application/json'
             json={'url': options['url']}
 
-        # detect faces from a local file
+        # detect faces from a local file, streamed rather than read into memory
         elif 'path' in options and options['path'] != '':
             headers['Content-Type'] = 'application/octet-stream'
-            data_file = open(options['path'], 'rb')
-            data = data_file.read()
-            data_file.close()
+            data = FileUpload(options['path'])
 
         # detect faces in an octect stream
         elif 'stream' in options:
             headers['Content-Type'] = 'application/octet-stream'
-            data = options['stream']
+            data = _byteView(options['stream'])
 
         # fail if the options didn't specify an image source
         if not json and not data:
             raise Exception('Data must be supplied as either JSON or a Binary image data.')
 
-        return self._invoke('post', url, json=json, data=data, headers=headers, params=params)
+        cache = self.context.responseCache if cached else None
+        key = cache.key(self.key, url, params, options) if cache is not None else None
+        if key is None:
+            return self._invoke('post', url, json=json, data=data, headers=headers, params=params)
+
+        return self._withCache(cache, key, url, lambda: self._invoke('post', url, json=json, data=data, headers=headers, params=params))
+
+    def _withCache(self, cache, key, url, invoke):
+        """Returns a cached result, or invokes the call and caches its result
+
+        Args:
+            cache (:class:`ResponseCache`). The cache to use
+            key (str). The cache key of the call
+            url (str). The url being called
+            invoke (callable). Makes the call
+
+        Returns:
+            object. The resulting JSON
+        """
+        hit, result = cache.get(key)
+        self.context.emit(_cacheEvent(url, hit))
+        if hit:
+            return result
+
+        result = invoke()
+        cache.put(key, url, result)
+        return result
+
+    def _after(self, result, callback):
+        """Calls back with the result of a call before returning it, used to keep local state in step
+
+        Args:
+            result (object). The result of the call
+            callback (callable). Called with the result
+
+        Returns:
+            object. The result
+        """
+        callback(result)
+        return result
+
+    def _then(self, result, function):
+        """Passes the result of a call through a function, the counterpart of :meth:`_after` that replaces the result
+
+        Args:
+            result (object). The result of the call
+            function (callable). Called with the result
+
+        Returns:
+            object. What the function returns
+        """
+        return function(result)
+
+    def _mirrored(self, kind, url, invoke, *ids):
+        """Serves a read from the context's :class:`PersonMirror` if it can answer, or invokes the call and mirrors its result
+
+        Args:
+            kind (str). The kind of record read, see :meth:`PersonMirror.lookup`
+            url (str). The url being called
+            invoke (callable). Makes the call
+            ids (str). The IDs of the record read
+
+        Returns:
+            object. The resulting JSON
+        """
+        mirror = self.context.personMirror
+        if mirror is None:
+            return invoke()
+        return self._withCache(mirror.view(kind, self.key, *ids), None, url, invoke)
@@ -7,41 +7,44 @@ class Client(object):
     """Client for using project oxford APIs"""
 
     @staticmethod
-    def face(key):
+    def face(key, context=None):
         """The face API interface.
         Returns:
             :class:`face`. the face API instance.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
 
         if key and isinstance(key, str):
-            return Face(key)
+            return Face(key, context)
         else:
             raise Exception('Key is required but a string was not provided')
 
     @staticmethod
-    def vision(key):
+    def vision(key, context=None):
         """The vision API interface.
         Returns:
             :class:`vision`. the vision API instance.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
         if key and isinstance(key, str):
-            return Vision(key)
+            return Vision(key, context)
         else:
             raise Exception('Key is required but a string was not provided')
 
     @staticmethod
-    def emotion(key):
+    def emotion(key, context=None):
         """The emotion API interface.
         Returns:
             :class:`emotion`. the emotion API instance.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
         if key and isinstance(key, str):
-            return Emotion(key)
+            return Emotion(key, context)
         else:
             raise Exception('Key is required but a string was not provided')
@@ -0,0 +1,237 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+from .ConcurrencyLimiter import ConcurrencyLimiter
+from .RateLimitBackend import LocalRateLimitBackend
+from .RateLimiter import RateLimiter
+from .RetryPolicy import RetryPolicy
+
+_logger = logging.getLogger('projectoxford')
+_serviceUrl = 'https://api.projectoxford.ai'
+_defaultContext = None
+_defaultContextLock = threading.Lock()
+
+
+def endpointName(url):
+    """The name of the API an url belongs to, without the version or resource IDs.
+    e.g. 'face/detections', 'vision/ocr' or 'face/persongroups'
+    """
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    return '/'.join(parts[:1] + parts[2:3])
+
+
+class ClientContext(object):
+    """Shared state for oxford API clients. Holds a pooled HTTP session so that
+    every client created with the same context reuses keep-alive connections."""
+
+    def __init__(self, poolConnections=10, poolMaxSize=10, poolBlock=False, retryPolicy=None,
+                 transactionsPerSecond=None, burst=None, rateLimitBackend=None,
+                 adaptiveConcurrency=None, responseCache=None, personIndex=None, personMirror=None,
+                 faceIdRegistry=None, identifyCache=None, singleFlight=None, requestHooks=None, baseUrl=None):
+        """Initializes a new instance of the class.
+        Args:
+            poolConnections (int). The number of per-host connection pools to cache.
+            poolMaxSize (int). The maximum number of connections to keep alive per host.
+            poolBlock (bool). Optional. Block when the pool is exhausted instead of opening throwaway connections.
+            retryPolicy (:class:`RetryPolicy`). Optional. How failed calls are retried.
+            transactionsPerSecond (float). Optional. Pace calls made with each subscription key to this rate.
+            burst (int). Optional. The number of calls per subscription key that may be made at once.
+            rateLimitBackend (:class:`RateLimitBackend`). Optional. Where the rate limit budget is kept, for sharing
+                it across processes or hosts. Defaults to an in-process backend when transactionsPerSecond is given.
+            adaptiveConcurrency (bool or dict). Optional. Limit the calls in flight to each API with a
+                :class:`ConcurrencyLimiter`. A dict is passed to the limiter as keyword arguments.
+            responseCache (:class:`ResponseCache`). Optional. Reuse the results of image analysis calls made with the same image and parameters.
+            personIndex (:class:`PersonIndex`). Optional. Where persons are looked up by name, instead of listing
+                the person group on every :meth:`Person.createOrUpdate`.
+            personMirror (:class:`PersonMirror`). Optional. A local copy of person groups and persons to read from.
+            faceIdRegistry (:class:`FaceIdRegistry`). Optional. Reuse the faces detected in an image while their faceIds are valid.
+            identifyCache (:class:`IdentifyCache`). Optional. Reuse identification results until their person group is trained again.
+            singleFlight (:class:`SingleFlight`). Optional. Send identical reads made at the same time once.
+            requestHooks (callable[]). Optional. Called with an event for every call sent and every cache lookup,
+                see :meth:`emit`. A :class:`RequestMetrics` aggregates them.
+            baseUrl (str). Optional. Send calls to this server instead of the Project Oxford service, e.g. a local stand-in.
+        """
+        self.poolConnections = poolConnections
+        self.poolMaxSize = poolMaxSize
+        self.poolBlock = poolBlock
+        self.retryPolicy = retryPolicy if retryPolicy is not None else RetryPolicy()
+        if rateLimitBackend is None and transactionsPerSecond:
+            rateLimitBackend = LocalRateLimitBackend(transactionsPerSecond, burst)
+        self.rateLimitBackend = rateLimitBackend
+        self._rateLimiters = {}
+        self.adaptiveConcurrency = adaptiveConcurrency
+        self._concurrencyLimiters = {}
+        self.responseCache = responseCache
+        self.personIndex = personIndex or None
+        self.personMirror = personMirror
+        self.faceIdRegistry = faceIdRegistry
+        self.identifyCache = identifyCache
+        self.singleFlight = singleFlight
+        self.requestHooks = list(requestHooks or [])
+        self.baseUrl = baseUrl
+        self._session = None
+        self._asyncSession = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default():
+        """The process wide context used by clients that are not given one.
+        Returns:
+            :class:`ClientContext`. the shared context instance.
+        """
+        global _defaultContext
+        if _defaultContext is None:
+            with _defaultContextLock:
+                if _defaultContext is None:
+                    _defaultContext = ClientContext()
+        return _defaultContext
+
+    @property
+    def session(self):
+        """The pooled :class:`requests.Session`, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._createSession()
+        return self._session
+
+    def _createSession(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.poolConnections,
+                              pool_maxsize=self.poolMaxSize,
+                              pool_block=self.poolBlock)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def rateLimiter(self, key):
+        """The token bucket shared by every client using a subscription key with this context.
+        Args:
+            key (str). the subscription key.
+
+        Returns:
+            :class:`RateLimiter`. the rate limiter, or None if calls are not rate limited
+        """
+        if self.rateLimitBackend is None:
+            return None
+
+        limiter = self._rateLimiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self._rateLimiters.get(key)
+                if limiter is None:
+                    limiter = self._rateLimiters[key] = RateLimiter(self.rateLimitBackend, key)
+        return limiter
+
+    def concurrencyLimiter(self, url):
+        """The adaptive concurrency limiter shared by every call to the API an url belongs to.
+        Args:
+            url (str). the url being called.
+
+        Returns:
+            :class:`ConcurrencyLimiter`. the limiter, or None if adaptive concurrency is off
+        """
+        if not self.adaptiveConcurrency:
+            return None
+
+        name = endpointName(url)
+        limiter = self._concurrencyLimiters.get(name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._concurrencyLimiters.get(name)
+                if limiter is None:
+                    settings = self.adaptiveConcurrency if isinstance(self.adaptiveConcurrency, dict) else {}
+                    limiter = self._concurrencyLimiters[name] = ConcurrencyLimiter(**settings)
+        return limiter
+
+    def concurrencyState(self):
+        """The state of every adaptive concurrency limiter.
+        Returns:
+            dict. :meth:`ConcurrencyLimiter.state` keyed by API name, e.g. 'face/detections'
+        """
+        with self._lock:
+            limiters = dict(self._concurrencyLimiters)
+        return dict((name, limiter.state()) for name, limiter in limiters.items())
+
+    def resolve(self, url):
+        """The url a call is sent to, moved onto the base url if the context has one.
+        Args:
+            url (str). the url of the API being called.
+
+        Returns:
+            str. the url to send the call to
+        """
+        if self.baseUrl is None or not url.startswith(_serviceUrl):
+            return url
+        return self.baseUrl.rstrip('/') + url[len(_serviceUrl):]
+
+    def emit(self, event):
+        """Calls the request hooks with an event. A failing hook is logged rather than failing the call.
+        Args:
+            event (dict). kind 'request' for a call, with its endpoint (e.g. 'face/detections'), method, final status
+                (None if no response was received), error (the exception raised or None), latency in seconds,
+                throttleSeconds spent waiting on the rate limiter and after 429 responses, retries, and
+                requestBytes and responseBytes (None when unknown). Or kind 'cache' for a cache lookup,
+                with its endpoint and cache, 'hit' or 'miss'.
+        """
+        for hook in self.requestHooks:
+            try:
+                hook(event)
+            except Exception:
+                _logger.exception('A projectoxford request hook failed')
+
+    def asyncSession(self):
+        """The pooled :class:`aiohttp.ClientSession` used by the async clients, created on first use.
+        It must be first used from within the event loop that will drive the async clients.
+
+        Returns:
+            :class:`aiohttp.ClientSession`. the shared async session
+        """
+        if self._asyncSession is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise Exception('aiohttp is required to use the async clients')
+
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.poolMaxSize)
+            self._asyncSession = aiohttp.ClientSession(connector=connector)
+        return self._asyncSession
+
+    def request(self, method, url, **kwargs):
+        """Sends a request over the pooled session.
+        Args:
+            :param method: method for the new :class:`Request` object.
+            :param url: URL for the new :class:`Request` object.
+            :param kwargs: Optional arguments that :meth:`requests.Session.request` takes.
+
+        Returns:
+            :class:`requests.Response`. the raw response
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """Closes the pooled session and its connections. A new session is created on next use."""
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def closeAsync(self):
+        """Closes the async session and its connections. A new session is created on next use.
+
+        Returns:
+            object. An awaitable that completes once the session is closed
+        """
+        session, self._asyncSession = self._asyncSession, None
+        if session is None:
+            import asyncio
+            return asyncio.sleep(0)
+        return session.close()
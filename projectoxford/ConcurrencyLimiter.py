@@ -0,0 +1,137 @@
+import threading
+import time
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class ConcurrencyLimiter(object):
+    """An additive-increase / multiplicative-decrease (AIMD) limit on the number of calls in flight.
+    The limit grows by about one per round of successful calls while latency stays near its baseline,
+    and is cut back sharply when the service throttles or latency spikes. Shared by threads and
+    event loops alike."""
+
+    def __init__(self, initialLimit=4, minLimit=1, maxLimit=64, decreaseFactor=0.5, latencyTolerance=2.0, smoothing=0.1, drift=0.02):
+        """Initializes a new instance of the class.
+        Args:
+            initialLimit (int). the number of calls allowed in flight to begin with.
+            minLimit (int). the limit is never cut below this.
+            maxLimit (int). the limit never grows beyond this.
+            decreaseFactor (float). the limit is multiplied by this on a throttle or latency spike.
+            latencyTolerance (float). a call slower than this multiple of the baseline latency counts as a spike.
+            smoothing (float). the weight of each new sample in the baseline latency average.
+            drift (float). the weight of a spike in the baseline latency average, so that the baseline follows a lasting rise in latency.
+        """
+        self.minLimit = minLimit
+        self.maxLimit = maxLimit
+        self.decreaseFactor = decreaseFactor
+        self.latencyTolerance = latencyTolerance
+        self.smoothing = smoothing
+        self.drift = drift
+        self._limit = float(max(minLimit, min(maxLimit, initialLimit)))
+        self._inFlight = 0
+        self._baselineLatency = None
+        self._lastLatency = None
+        self._lastDecrease = None
+        self._throttles = 0
+        self._spikes = 0
+        self._condition = threading.Condition(threading.Lock())
+        self._asyncWaiters = []
+
+    @property
+    def limit(self):
+        """The number of calls currently allowed in flight."""
+        return int(self._limit)
+
+    def acquire(self, timeout=None):
+        """Blocks until a call may be made.
+        Args:
+            timeout (float). Optional. the longest time in seconds to block.
+
+        Returns:
+            bool. True if the caller may proceed, False if the timeout expired
+        """
+        deadline = _monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while self._inFlight >= self.limit:
+                remaining = deadline - _monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._inFlight += 1
+            return True
+
+    def tryAcquire(self, notify=None):
+        """Lets a call proceed if the limit allows it right now.
+        Args:
+            notify (callable). Optional. called from any thread once a slot may have been freed, if the call may not proceed now.
+
+        Returns:
+            bool. True if the caller may proceed
+        """
+        with self._condition:
+            if self._inFlight < self.limit:
+                self._inFlight += 1
+                return True
+            if notify is not None:
+                self._asyncWaiters.append(notify)
+            return False
+
+    def release(self, latency=None, overloaded=False):
+        """Records the outcome of a call and frees its slot.
+        Args:
+            latency (float). Optional. the call's latency in seconds, None if the call failed before a response.
+            overloaded (bool). Optional. True if the service throttled the call or reported it was unavailable.
+        """
+        with self._condition:
+            self._inFlight -= 1
+            now = _monotonic()
+            spike = False
+            if latency is not None:
+                self._lastLatency = latency
+                if self._baselineLatency is None:
+                    self._baselineLatency = latency
+                elif latency > self._baselineLatency * self.latencyTolerance:
+                    spike = True
+                    self._baselineLatency += (latency - self._baselineLatency) * self.drift
+                else:
+                    self._baselineLatency += (latency - self._baselineLatency) * self.smoothing
+
+            if overloaded or spike:
+                if overloaded:
+                    self._throttles += 1
+                else:
+                    self._spikes += 1
+
+                # calls already in flight when the limit was cut report the same congestion, so only
+                # cut again once a baseline round trip has passed
+                window = self._baselineLatency or 0
+                if self._lastDecrease is None or now - self._lastDecrease >= window:
+                    self._limit = max(float(self.minLimit), self._limit * self.decreaseFactor)
+                    self._lastDecrease = now
+            elif latency is not None:
+                self._limit = min(float(self.maxLimit), self._limit + 1.0 / self._limit)
+
+            self._condition.notify_all()
+            waiters, self._asyncWaiters = self._asyncWaiters, []
+
+        # event loops are notified outside the lock, and one that has been closed is skipped
+        for notify in waiters:
+            try:
+                notify()
+            except RuntimeError:
+                pass
+
+    def state(self):
+        """A snapshot of the limiter.
+        Returns:
+            dict. the limit, calls in flight, baseline and last latency, and throttle and spike counts
+        """
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'inFlight': self._inFlight,
+                'baselineLatency': self._baselineLatency,
+                'lastLatency': self._lastLatency,
+                'throttles': self._throttles,
+                'latencySpikes': self._spikes
+            }
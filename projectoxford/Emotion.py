@@ -6,12 +6,13 @@ _emotionRecognizeUrl = 'https://api.projectoxford.ai/emotion/v1.0/recognize'
 class Emotion(Base):
     """Client for using the Project Oxford Emotion APIs"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
-        Base.__init__(self, key)
+        Base.__init__(self, key, context)
 
     def recognize(self, options):
         """Recognizes the emotions expressed by one or more people in an image,
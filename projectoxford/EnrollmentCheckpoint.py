@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+
+# detected faceIds expire 24 hours after detection, so older ones are detected again on resume
+_faceIdReuseSeconds = 23 * 60 * 60
+
+
+def sourceKey(index, source):
+    """The name a source is recorded under, its url or path if it has one or else its position
+
+    Args:
+        index (int). the position of the source in the person's list of sources
+        source (object). the options object describing the image
+
+    Returns:
+        str. the key
+    """
+    for name in ('url', 'path'):
+        if source.get(name):
+            return name + ':' + source[name]
+    return 'index:' + str(index)
+
+
+def largestFace(faces):
+    """The faceId of the largest detected face, or None if no face was detected"""
+    if not faces:
+        return None
+
+    def area(face):
+        rectangle = face.get('faceRectangle', {})
+        return rectangle.get('width', 0) * rectangle.get('height', 0)
+
+    return max(faces, key=area)['faceId']
+
+
+def personsByName(persons):
+    """The persons of a group keyed by name, the persons an enrollment adopts rather than creates
+
+    Args:
+        persons (object[]). the persons listed by :meth:`Person.list`
+
+    Returns:
+        dict. the persons keyed by name
+    """
+    return dict((person['name'], person) for person in persons or [])
+
+
+class EnrollmentCheckpoint(object):
+    """The progress of a bulk enrollment, so that a restarted enrollment skips the calls already made.
+    Each completed step is appended to a journal file as one JSON record and flushed straight away,
+    which keeps saving cheap however large the enrollment is. A partial last record left by a crash
+    is ignored on load."""
+
+    def __init__(self, path=None):
+        """Initializes a new instance of the class.
+        Args:
+            path (str). Optional. the journal file, loaded if it exists. Progress is only kept in memory without one.
+        """
+        self.path = path
+        self._persons = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path is not None:
+            complete = True
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    for line in file:
+                        complete = line.endswith(b'\n')
+                        try:
+                            self._apply(json.loads(line.decode('utf-8')))
+                        except ValueError:
+                            pass
+            self._file = open(path, 'ab')
+            if not complete:
+                self._file.write(b'\n')  # keep new records off the partial one
+
+    @property
+    def resumed(self):
+        """True if progress was loaded from an earlier run."""
+        return bool(self._persons)
+
+    def person(self, name):
+        """The recorded progress of a person.
+        Args:
+            name (str). the person's name
+
+        Returns:
+            dict. the personId, None if the person was not created yet, and the recorded steps for each source key
+        """
+        with self._lock:
+            state = self._persons.get(name, {'personId': None, 'sources': {}})
+            return {'personId': state['personId'], 'sources': dict((key, dict(step)) for key, step in state['sources'].items())}
+
+    def reusableFaceId(self, step):
+        """The faceId detected for a source, if it is recent enough to add without detecting again."""
+        if step.get('faceId') is not None and time.time() - step.get('detectedAt', 0) < _faceIdReuseSeconds:
+            return step['faceId']
+        return None
+
+    def pendingSources(self, name, sources):
+        """The sources of a person whose face is still to be added.
+        Args:
+            name (str). the person's name
+            sources (object[]). the options objects describing the person's images
+
+        Returns:
+            tuple[]. (key, source, faceId) for each source not added nor failed for good, faceId being
+            None unless a detection recent enough to add without detecting again was recorded
+        """
+        steps = self.person(name)['sources']
+        pending = []
+        for index, source in enumerate(sources):
+            key = sourceKey(index, source)
+            step = steps.get(key, {})
+            if not step.get('added') and 'error' not in step:
+                pending.append((key, source, self.reusableFaceId(step)))
+        return pending
+
+    def recordDetected(self, name, key, faces):
+        """Records the detection of a source.
+        Args:
+            name (str). the person's name
+            key (str). the source key, see :func:`sourceKey`
+            faces (object[]). the faces detected
+
+        Returns:
+            str. the faceId of the largest face, to be added to the person, or None if no face was detected
+        """
+        faceId = largestFace(faces)
+        if faceId is None:
+            self.record(name, source=key, error='no face detected')
+        else:
+            self.record(name, source=key, faceId=faceId, detectedAt=time.time())
+        return faceId
+
+    def summary(self, names):
+        """The outcome of an enrollment.
+        Args:
+            names (str[]). the names of the persons enrolled
+
+        Returns:
+            dict. each name mapped to its personId, the number of faces added and the keys of the sources that had no face
+        """
+        summary = {}
+        for name in names:
+            state = self.person(name)
+            steps = state['sources'].items()
+            summary[name] = {
+                'personId': state['personId'],
+                'faces': sum(1 for _, step in steps if step.get('added')),
+                'noFace': sorted(key for key, step in steps if 'error' in step)
+            }
+        return summary
+
+    def record(self, name, **step):
+        """Records a completed step.
+        Args:
+            name (str). the person's name
+            step (dict). personId once the person is created, or the source key with the faceId and
+                detectedAt time once detected, added once added, or error if the source failed for good
+        """
+        record = dict(step, name=name)
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self._lock:
+            self._apply(record)
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self):
+        """Closes the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _apply(self, record):
+        state = self._persons.setdefault(record['name'], {'personId': None, 'sources': {}})
+        if 'source' not in record:
+            state['personId'] = record['personId']
+        else:
+            step = state['sources'].setdefault(record['source'], {})
+            step.update((name, value) for name, value in record.items() if name not in ('name', 'source'))
@@ -1,6 +1,11 @@
+import collections
+
 from .Base import Base
+from .EnrollmentCheckpoint import EnrollmentCheckpoint, personsByName
+from .Parallel import imap
 from .Person import Person
 from .PersonGroup import PersonGroup
+from .Reconciliation import changeCalls, facesToInspect, groupCalls, planReconciliation, reconciliationResult, recordApplied
 
 _detectUrl = 'https://api.projectoxford.ai/face/v0/detections'
 _similarUrl = 'https://api.projectoxford.ai/face/v0/findsimilars'
@@ -8,24 +13,190 @@ _groupingUrl = 'https://api.projectoxford.ai/face/v0/groupings'
 _identifyUrl = 'https://api.projectoxford.ai/face/v0/identifications'
 _verifyUrl = 'https://api.projectoxford.ai/face/v0/verifications'
 
+# the most faceIds the service accepts in one identification, grouping and find similar call
+_identifyBatchSize = 10
+_groupingBatchSize = 100
+_similarBatchSize = 100
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _rankSimilar(similarFaces, positions, topK):
+    """The topK similar faces ranked by confidence, ties broken by candidate order"""
+    ranked = sorted(similarFaces, key=lambda similarFace: (-similarFace.get('confidence', 0), positions.get(similarFace['faceId'], 0)))
+    return ranked[:topK] if topK is not None else ranked
+
+
+def _mergeIdentified(faces, known, results):
+    """The cached and newly identified results of faces, in input order"""
+    known = dict(known)
+    for result in results:
+        known[result['faceId']] = result
+    return [known[faceId] for faceId in faces if faceId in known]
+
+
+class _ShardedGrouping(object):
+    """Merges the groupings of separate faceId shards. Each group is represented by its first face,
+    and each messy face by itself, and the representatives are grouped in turn, round after round,
+    joining the groups whose representatives are grouped together. Once a round joins nothing, the
+    representatives left are grouped in pairs of half batches, so that every two of them are compared."""
+
+    def __init__(self, results, batchSize):
+        self.batchSize = batchSize
+        self.members = collections.OrderedDict()
+        self.shards = []
+        for result in results:
+            representatives = []
+            for group in result.get('groups', []):
+                self.members[group[0]] = list(group)
+                representatives.append(group[0])
+            for faceId in result.get('messyGroup', []):
+                self.members[faceId] = [faceId]
+                representatives.append(faceId)
+            self.shards.append(representatives)
+        self.parents = dict((representative, representative) for representative in self.members)
+        self._lastCount = None
+        self._done = False
+
+    def batches(self):
+        """The faceIds of every grouping call of the next round, none once every representative has been compared"""
+        if self._done:
+            return []
+
+        # interleaved across the calls of the previous round, so that representatives not compared yet meet
+        representatives = []
+        seen = set()
+        for column in range(max(len(shard) for shard in self.shards)):
+            for shard in self.shards:
+                root = self._find(shard[column]) if column < len(shard) else None
+                if root is not None and root not in seen:
+                    seen.add(root)
+                    representatives.append(root)
+
+        if len(representatives) <= self.batchSize:
+            batches = [representatives] if len(self.shards) > 1 else []
+            self._done = True
+        elif self._lastCount is None or len(representatives) < self._lastCount:
+            batches = _chunks(representatives, self.batchSize)
+        else:
+            halves = _chunks(representatives, max(1, self.batchSize // 2))
+            batches = [first + second for index, first in enumerate(halves) for second in halves[index + 1:]]
+            self._done = True
+
+        self._lastCount = len(representatives)
+        self.shards = batches
+        return batches
+
+    def join(self, result):
+        """Joins the groups whose representatives a grouping call of :meth:`batches` put together"""
+        for group in (result or {}).get('groups', []):
+            root = self._find(group[0])
+            for faceId in group[1:]:
+                other = self._find(faceId)
+                if other != root:
+                    self.parents[other] = root
+
+    def result(self):
+        clusters = collections.OrderedDict()
+        for representative, faces in self.members.items():
+            clusters.setdefault(self._find(representative), []).extend(faces)
+
+        groups = sorted((faces for faces in clusters.values() if len(faces) > 1), key=len, reverse=True)
+        messyGroup = [faces[0] for faces in clusters.values() if len(faces) == 1]
+        return {'groups': groups, 'messyGroup': messyGroup}
+
+    def _find(self, faceId):
+        root = faceId
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while self.parents[faceId] != root:
+            self.parents[faceId], faceId = root, self.parents[faceId]
+        return root
+
+
+class _VerifyMatrix(object):
+    """Tracks pairwise verifications of a list of faces. Pairs are unordered, so (a, b) and (b, a)
+    are verified once, and in transitive mode faces verified identical are joined so that pairs
+    already connected through them are implied rather than verified."""
+
+    def __init__(self, faceIds, pairs, transitive):
+        self.faceIds = list(faceIds)
+        self.positions = dict((faceId, position) for position, faceId in enumerate(self.faceIds))
+        self.requested = pairs
+        self.transitive = transitive
+        self.parents = list(range(len(self.faceIds)))
+        self.edges = collections.OrderedDict()
+
+    def pairs(self):
+        """The (i, j) index pairs still to verify, with i < j. Consumed lazily so that matches
+        recorded meanwhile can imply later pairs."""
+        seen = set()
+        if self.requested is None:
+            candidates = ((i, j) for i in range(len(self.faceIds)) for j in range(i + 1, len(self.faceIds)))
+        else:
+            candidates = ((self.positions[a], self.positions[b]) for a, b in self.requested)
+
+        for i, j in candidates:
+            pair = (min(i, j), max(i, j))
+            if i == j or pair in seen:
+                continue
+            seen.add(pair)
+            if self.transitive and self._find(i) == self._find(j):
+                self.edges[pair] = (True, None)
+                continue
+            yield pair
+
+    def record(self, pair, result):
+        if result is None:
+            return
+        self.edges[pair] = (result['isIdentical'], result.get('confidence'))
+        if self.transitive and result['isIdentical']:
+            self.parents[self._find(pair[1])] = self._find(pair[0])
+
+    def result(self, dense):
+        if not dense:
+            edges = [(i, j, isIdentical, confidence) for (i, j), (isIdentical, confidence) in sorted(self.edges.items())]
+            return {'faceIds': self.faceIds, 'edges': edges}
+
+        size = len(self.faceIds)
+        isIdenticalMatrix = [[True if i == j else None for j in range(size)] for i in range(size)]
+        confidenceMatrix = [[1.0 if i == j else None for j in range(size)] for i in range(size)]
+        for (i, j), (isIdentical, confidence) in self.edges.items():
+            isIdenticalMatrix[i][j] = isIdenticalMatrix[j][i] = isIdentical
+            confidenceMatrix[i][j] = confidenceMatrix[j][i] = confidence
+        return {'faceIds': self.faceIds, 'isIdentical': isIdenticalMatrix, 'confidence': confidenceMatrix}
+
+    def _find(self, position):
+        root = position
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while self.parents[position] != root:
+            self.parents[position], position = root, self.parents[position]
+        return root
+
 
 class Face(Base):
     """Client for using the Project Oxford face APIs"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
-        Base.__init__(self, key)
-        self.person = Person(self.key)
-        self.personGroup = PersonGroup(self.key)
+        Base.__init__(self, key, context)
+        self.person = Person(self.key, self.context)
+        self.personGroup = PersonGroup(self.key, self.context)
+        self.identifyBatcher = None
 
     def detect(self, options):
         """Detects human faces in an image and returns face locations, face landmarks, and
         optional attributes including head-pose, gender, and age. Detection is an essential
         API that provides faceId to other APIs like Identification, Verification,
-        and Find Similar.
+        and Find Similar. If the context has a :class:`FaceIdRegistry`, an image detected
+        again while its faceIds are valid is answered from the earlier detection.
 
         Note: exactly one of url, path, or stream must be provided in the options object
 
@@ -51,7 +222,38 @@ class Face(Base):
             'analyzesHeadPose': 'true' if 'analyzesHeadPose' in options else 'false'
         }
 
-        return Base._postWithOptions(self, _detectUrl, options, params)
+        registry = self.context.faceIdRegistry
+        view = registry.view(self.key, options, params) if registry is not None else None
+        if view is None:
+            return Base._postWithOptions(self, _detectUrl, options, params)
+
+        # the registry times faceIds from their detection, so it is fed fresh detections rather than cached ones
+        return self._withCache(view, None, _detectUrl, lambda: Base._postWithOptions(self, _detectUrl, options, params, cached=False))
+
+    def detectMany(self, sources, concurrency=4, ordered=True, options=None):
+        """Detects faces in many images with a bounded number of calls in flight.
+        Sources are consumed lazily and results are yielded as a generator, so
+        very large batches stream through without being loaded up front.
+
+        Args:
+            sources (object[]). Iterable of options objects for :meth:`detect`, each with a url, path or stream
+            concurrency (int). The maximum number of detect calls in flight
+            ordered (boolean). Optional. Yield results in input order rather than as they complete
+            options (object). Optional. Options applied to every source, e.g. analyzesAge
+
+        Returns:
+            generator. (index, result, error) for every source, where index is the source's position
+            in the input, result is the resulting JSON and error is the exception raised for it or None
+        """
+
+        def detectOne(source):
+            if options:
+                merged = dict(options)
+                merged.update(source)
+                source = merged
+            return self.detect(source)
+
+        return imap(detectOne, sources, concurrency, ordered)
 
     def similar(self, sourceFace, candidateFaces):
         """Detect similar faces using faceIds (as returned from the detect API)
@@ -71,6 +273,48 @@ class Face(Base):
 
         return self._invoke('post', _similarUrl, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
 
+    def similarMany(self, sourceFace, candidateFaces, topK=10, chunkSize=_similarBatchSize, concurrency=4, stopConfidence=None):
+        """Detect similar faces among any number of candidate faces. The candidates are split
+        into chunks of at most 100 that are searched concurrently, and the matches are merged
+        into a single ranking by confidence.
+
+        Args:
+            sourceFace (str). The source face
+            candidateFaces (str[]). The candidate faces
+            topK (int). Optional. The number of matches to return, None for all of them
+            chunkSize (int). Optional. The number of candidates searched per call, at most 100
+            concurrency (int). Optional. The maximum number of calls in flight
+            stopConfidence (float). Optional. Stop searching, and cancel the chunks not yet sent,
+                once topK matches with at least this confidence have been found
+
+        Returns:
+            object. The resulting JSON, ranked by confidence
+        """
+
+        chunks = _chunks(candidateFaces, min(chunkSize, _similarBatchSize))
+        positions = dict((faceId, position) for position, faceId in enumerate(candidateFaces))
+
+        def similarChunk(chunk):
+            return self.similar(sourceFace, chunk)
+
+        matches = []
+        confident = 0
+        searched = imap(similarChunk, chunks, concurrency, ordered=False)
+        try:
+            for _, result, error in searched:
+                if error is not None:
+                    raise error
+                for similarFace in result or []:
+                    matches.append(similarFace)
+                    if stopConfidence is not None and similarFace.get('confidence', 0) >= stopConfidence:
+                        confident += 1
+                if topK is not None and stopConfidence is not None and confident >= topK:
+                    break
+        finally:
+            searched.close()  # cancels the chunks not yet sent
+
+        return _rankSimilar(matches, positions, topK)
+
     def grouping(self, faceIds):
         """Divides candidate faces into groups based on face similarity using faceIds.
         The output is one or more disjointed face groups and a MessyGroup.
@@ -93,23 +337,105 @@ class Face(Base):
 
         return self._invoke('post', _groupingUrl, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
 
-    def identify(self, personGroupId, faces, maxNumOfCandidatesReturned=1):
+    def shardedGrouping(self, faceIds, shardSize=_groupingBatchSize, concurrency=4):
+        """Divides any number of candidate faces into groups based on face similarity.
+        The faces are split into shards of at most 100 that are grouped concurrently, then the
+        first face of every group and every messy face are grouped in turn, in rounds of calls of
+        up to 100 faces, joining the groups whose first faces are grouped together. Messy faces
+        stay in the MessyGroup only if no match is found.
+        Each round makes one call per 100 groups and messy faces left, and rounds go on while they
+        join groups, so about n / 100 calls are made in all when most faces have a match. Groups
+        and messy faces that stop joining, e.g. those of more than 100 different people, are
+        finished with one call per pair of 50-face halves of them.
+
+        Args:
+            faceIds (str[]). Array of faceIds to use
+            shardSize (int). Optional. The number of faces grouped per call, at most 100
+            concurrency (int). Optional. The maximum number of calls in flight
+
+        Returns:
+            object. The resulting JSON, with groups ranked by size and a messyGroup
+        """
+
+        shards = _chunks(faceIds, min(shardSize, _groupingBatchSize))
+        if len(shards) <= 1:
+            return self.grouping(faceIds)
+
+        results = []
+        for _, result, error in imap(self.grouping, shards, concurrency):
+            if error is not None:
+                raise error
+            if result is None:
+                return None
+            results.append(result)
+
+        merger = _ShardedGrouping(results, min(shardSize, _groupingBatchSize))
+        batches = merger.batches()
+        while batches:
+            for _, result, error in imap(self.grouping, batches, concurrency, ordered=False):
+                if error is not None:
+                    raise error
+                merger.join(result)
+            batches = merger.batches()
+
+        return merger.result()
+
+    def identify(self, personGroupId, faces, maxNumOfCandidatesReturned=1, concurrency=4):
         """Identifies persons from a person group by one or more input faces.
         To recognize which person a face belongs to, Face Identification needs a person group
         that contains number of persons. Each person contains one or more faces. After a person
         group prepared, it should be trained to make it ready for identification. Then the
         identification API compares the input face to those persons' faces in person group and
         returns the best-matched candidate persons, ranked by confidence.
+        Lists longer than the service accepts in one call are split into chunks that are
+        identified concurrently and merged back in input order. Shorter lists go through
+        identifyBatcher, if one is set, to share requests with concurrent callers. If the context
+        has an :class:`IdentifyCache`, only the faces it has no result for are identified.
 
         Args:
             faces (str[]). Array of faceIds to use
             personGroupId (str). The person group ID to use
             maxNumOfCandidatesReturned (str). Optional maximum number of candidates to return
+            concurrency (int). Optional maximum number of chunks identified at once
 
         Returns:
             object. The resulting JSON
         """
 
+        cache = self.context.identifyCache
+        if cache is None:
+            return self._identifyMany(personGroupId, faces, maxNumOfCandidatesReturned, concurrency)
+
+        if cache.needsRevalidation(self.key, personGroupId):
+            self.personGroup.trainingStatus(personGroupId)
+        generation, known, missing = cache.split(self.key, personGroupId, faces, maxNumOfCandidatesReturned)
+        results = self._identifyMany(personGroupId, missing, maxNumOfCandidatesReturned, concurrency) if missing else []
+        if results is None:
+            return None
+        cache.store(self.key, personGroupId, maxNumOfCandidatesReturned, generation, results)
+        return _mergeIdentified(faces, known, results)
+
+    def _identifyMany(self, personGroupId, faces, maxNumOfCandidatesReturned, concurrency):
+        chunks = _chunks(faces, _identifyBatchSize)
+        if len(chunks) <= 1:
+            if self.identifyBatcher is not None:
+                return self.identifyBatcher.identify(personGroupId, faces, maxNumOfCandidatesReturned)
+            return self._identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned)
+
+        def identifyChunk(chunk):
+            return self._identifyChunk(personGroupId, chunk, maxNumOfCandidatesReturned)
+
+        results = []
+        for _, result, error in imap(identifyChunk, chunks, concurrency):
+            if error is not None:
+                raise error
+            if result is None:
+                return None
+            results.extend(result)
+
+        return results
+
+    def _identifyChunk(self, personGroupId, faces, maxNumOfCandidatesReturned):
         body = {
             'faceIds': faces,
             'personGroupId': personGroupId,
@@ -118,6 +444,131 @@ class Face(Base):
 
         return self._invoke('post', _identifyUrl, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
 
+    def bulkEnroll(self, personGroupId, persons, checkpointPath=None, concurrency=4, options=None, train=True):
+        """Enrolls many persons into an existing person group. Each person is created, the largest
+        face in each of their images is detected and added to them, and the group is trained once
+        at the end. Persons are enrolled concurrently, so some are being detected while others are
+        being created or having faces added. Persons already in the group with the name enrolled are
+        adopted rather than created again. Progress is recorded in a checkpoint
+        file, and running the enrollment again with the same file skips the calls already made.
+
+        Args:
+            personGroupId (str). The person group to enroll into
+            persons (dict). Person names mapped to lists of options objects for :meth:`detect`, each with a url, path or stream
+            checkpointPath (str). Optional. The checkpoint file, created if missing and resumed from otherwise
+            concurrency (int). Optional. The maximum number of persons enrolled at once
+            options (object). Optional. Options applied to every detection
+            train (boolean). Optional. Train the person group once every person is enrolled
+
+        Returns:
+            object. persons, mapping each name to its personId, the number of faces added and the
+            sources that had no face; errors, mapping the names that failed to the exception raised;
+            and training, the training status
+        """
+
+        checkpoint = EnrollmentCheckpoint(checkpointPath)
+        try:
+            # persons enrolled before, or created by a run that stopped before recording them, are adopted rather than created twice
+            existing = personsByName(self.person.list(personGroupId))
+
+            def enroll(item):
+                name, sources = item
+                personId = checkpoint.person(name)['personId']
+                if personId is None:
+                    person = existing.get(name) or self.person.create(personGroupId, [], name)
+                    personId = person['personId']
+                    checkpoint.record(name, personId=personId)
+
+                for key, source, faceId in checkpoint.pendingSources(name, sources):
+                    if faceId is None:
+                        faceId = checkpoint.recordDetected(name, key, self.detect(dict(options or {}, **source)))
+                        if faceId is None:
+                            continue
+
+                    self.person.addFace(personGroupId, personId, faceId)
+                    checkpoint.record(name, source=key, added=True)
+
+            items = list(persons.items())
+            errors = {}
+            for index, _, error in imap(enroll, items, concurrency, ordered=False):
+                if error is not None:
+                    errors[items[index][0]] = error
+
+            training = self.personGroup.trainAndPollForCompletion(personGroupId) if train else None
+            return {'persons': checkpoint.summary(persons), 'errors': errors, 'training': training}
+        finally:
+            checkpoint.close()
+
+    def reconcile(self, personGroupId, desired, concurrency=4, options=None, dryRun=False):
+        """Brings a person group to a desired state with as few calls as possible. The current state
+        is read with one get and one list call, plus one getFace call per face of the persons whose
+        faces are listed, unless the context's :class:`PersonMirror` already has the face. Faces
+        added or read through a mirror are remembered there, so later runs only read new faces.
+        The differences are then applied concurrently, person by person.
+        Persons not in the desired state are deleted. Faces added by reconciliation are tagged with
+        their source in the face's user data, and faces without a tag are left alone.
+
+        Args:
+            personGroupId (str). The person group to reconcile
+            desired (object). The desired state, see :func:`Reconciliation.planReconciliation`, e.g.
+                {'name': 'Staff', 'persons': {'Alice': {'userData': 'sales', 'faces': [{'url': aliceUrl}]}}}
+            concurrency (int). Optional. The maximum number of calls in flight
+            options (object). Optional. Options applied to every detection
+            dryRun (boolean). Optional. Work out the changes without applying them
+
+        Returns:
+            object. plan, the changes as returned by :func:`Reconciliation.planReconciliation`;
+            noFace, the names of persons mapped to the face tags of sources that had no face;
+            and errors, the names of persons whose changes failed mapped to the exception raised
+        """
+
+        group = self.personGroup.get(personGroupId)
+        persons = self.person.list(personGroupId) if group is not None else []
+
+        def getFaceTag(pair):
+            face = self.person.getFace(personGroupId, pair[0], pair[1])
+            return face.get('userData') if face is not None else None
+
+        faceTags, pairs = self._knownFaceTags(personGroupId, facesToInspect(desired, persons))
+        for index, tag, error in imap(getFaceTag, pairs, concurrency):
+            if error is not None:
+                raise error
+            faceTags[pairs[index][1]] = tag
+
+        plan = planReconciliation(desired, group, persons, faceTags)
+        result = reconciliationResult(plan)
+        if dryRun:
+            return result
+
+        self._perform(groupCalls(personGroupId, desired, plan))
+
+        def apply(change):
+            noFace = []
+            self._perform(changeCalls(personGroupId, change, options, noFace))
+            return noFace
+
+        changes = plan['persons']
+        for index, noFace, error in imap(apply, changes, concurrency, ordered=False):
+            recordApplied(result, changes[index], noFace, error)
+
+        return result
+
+    def _perform(self, calls):
+        """Makes the calls yielded by a generator of :mod:`Reconciliation`, sending it the result of each"""
+        result = None
+        while True:
+            try:
+                client, method, arguments = calls.send(result)
+            except StopIteration:
+                return
+            result = getattr(getattr(self, client) if client else self, method)(*arguments)
+
+    def _knownFaceTags(self, personGroupId, pairs):
+        """The face tags the context's person mirror has, and the (personId, faceId) pairs it does not have"""
+        mirror = self.context.personMirror
+        faceTags = mirror.faceUserData(self.key, personGroupId, pairs) if mirror is not None else {}
+        return faceTags, [pair for pair in pairs if pair[1] not in faceTags]
+
     def verify(self, faceId1, faceId2):
         """Analyzes two faces and determine whether they are from the same person.
         Verification works well for frontal and near-frontal faces.
@@ -137,3 +588,39 @@ class Face(Base):
         }
 
         return self._invoke('post', _verifyUrl, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
+
+    def verifyMatrix(self, faceIds, pairs=None, concurrency=4, transitive=False, dense=True):
+        """Verifies every pair of faces, or the given pairs, with a bounded number of calls in flight.
+        Pairs are unordered, so (a, b) and (b, a) are verified once. In transitive mode, faces
+        verified identical are treated as the same person and pairs already connected through
+        such matches are not verified; they are reported identical with no confidence.
+
+        Args:
+            faceIds (str[]). Array of faceIds to use
+            pairs (tuple[]). Optional. (faceId1, faceId2) pairs to verify instead of all pairs
+            concurrency (int). Optional. The maximum number of verify calls in flight
+            transitive (boolean). Optional. Skip pairs implied by earlier matches
+            dense (boolean). Optional. Return square matrices rather than an edge list
+
+        Returns:
+            object. faceIds and either isIdentical and confidence matrices indexed by position
+            in faceIds, with None for pairs not verified, or edges, a list of
+            (index1, index2, isIdentical, confidence) tuples with index1 < index2
+        """
+
+        matrix = _VerifyMatrix(faceIds, pairs, transitive)
+
+        def verifyPair(pair):
+            return pair, self.verify(matrix.faceIds[pair[0]], matrix.faceIds[pair[1]])
+
+        # results are recorded in the order pairs were pulled, which keeps transitive mode deterministic
+        verified = imap(verifyPair, matrix.pairs(), concurrency)
+        try:
+            for _, result, error in verified:
+                if error is not None:
+                    raise error
+                matrix.record(*result)
+        finally:
+            verified.close()
+
+        return matrix.result(dense)
@@ -0,0 +1,162 @@
+import collections
+import copy
+import threading
+import time
+
+from .ResponseCache import digestSource
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# detected faceIds expire 24 hours after detection, so they are given up an hour before that
+_faceIdReuseSeconds = 23 * 60 * 60
+
+# where each detect flag puts its result in a detected face
+_flagFields = {
+    'analyzesFaceLandmarks': (None, 'faceLandmarks'),
+    'analyzesAge': ('attributes', 'age'),
+    'analyzesGender': ('attributes', 'gender'),
+    'analyzesHeadPose': ('attributes', 'headPose')
+}
+
+
+def detectFlags(params):
+    """The detect flags turned on in the query parameters of a detect call"""
+    return frozenset(name for name in _flagFields if params.get(name) == 'true')
+
+
+def _narrow(faces, flags):
+    """The faces as a detect call with fewer flags would have returned them"""
+    faces = copy.deepcopy(faces)
+    for name, (parent, field) in _flagFields.items():
+        if name in flags:
+            continue
+        for face in faces:
+            container = face.get(parent) if parent is not None else face
+            if isinstance(container, dict):
+                container.pop(field, None)
+    return faces
+
+
+class _RegistryView(object):
+    """One detect call through the registry, in the get and put shape used for cached calls"""
+
+    def __init__(self, registry, key, digest, flags):
+        self.registry = registry
+        self.key = key
+        self.digest = digest
+        self.flags = flags
+
+    def get(self, _):
+        return self.registry.lookup(self.key, self.digest, self.flags)
+
+    def put(self, _, url, result):
+        self.registry.put(self.key, self.digest, self.flags, result)
+
+
+class FaceIdRegistry(object):
+    """Remembers the faces detected in each image, so that an image detected again while its
+    faceIds are still valid is answered without a call. Entries are keyed by the subscription key,
+    which the faceIds belong to, and a digest of the image. A detect call asking for a subset of
+    the attributes of a remembered detection is answered from it, with the extra attributes left out.
+    Detections are forgotten an hour before their faceIds expire."""
+
+    def __init__(self, maxImages=10000, reuseSeconds=_faceIdReuseSeconds):
+        """Initializes a new instance of the class.
+        Args:
+            maxImages (int). the maximum number of images remembered, the least recently used are forgotten first.
+            reuseSeconds (float). how long after detection faceIds are reused, at most 23 hours.
+        """
+        self.maxImages = maxImages
+        self.reuseSeconds = min(reuseSeconds, _faceIdReuseSeconds)
+        self._images = collections.OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+    def view(self, key, options, params):
+        """A detect call through the registry, for :meth:`Base._withCache`.
+        Args:
+            key (str). the subscription key.
+            options (object). the options dictionary with a url, path or stream
+            params (object). the query parameters of the detect call.
+
+        Returns:
+            object. the view, or None if the image cannot be digested without consuming it
+        """
+        digest = digestSource(options)
+        if digest is None:
+            return None
+        return _RegistryView(self, key, digest, detectFlags(params))
+
+    def lookup(self, key, digest, flags):
+        """Finds a remembered detection of an image with at least the given flags.
+        Args:
+            key (str). the subscription key.
+            digest (str). the digest of the image, see :func:`ResponseCache.digestSource`
+            flags (frozenset). the detect flags asked for.
+
+        Returns:
+            tuple. (True, faces) on a hit, (False, None) on a miss
+        """
+        now = _monotonic()
+        with self._lock:
+            detections = self._detections((key, digest), now)
+            for detectedAt, detectedFlags, faces in reversed(detections):
+                if detectedFlags >= flags:
+                    self._images[(key, digest)] = self._images.pop((key, digest))  # most recently used
+                    self._stats['hits'] += 1
+                    return True, _narrow(faces, flags)
+            self._stats['misses'] += 1
+            return False, None
+
+    def put(self, key, digest, flags, faces):
+        """Remembers the faces detected in an image.
+        Args:
+            key (str). the subscription key.
+            digest (str). the digest of the image.
+            flags (frozenset). the detect flags the faces were detected with.
+            faces (object[]). the resulting JSON of the detect call.
+        """
+        if not isinstance(faces, list):
+            return
+
+        now = _monotonic()
+        with self._lock:
+            # a detection with more flags answers everything one with fewer does, and is fresher
+            detections = [detection for detection in self._detections((key, digest), now) if not detection[1] <= flags]
+            detections.append((now, frozenset(flags), copy.deepcopy(faces)))
+            self._images.pop((key, digest), None)
+            self._images[(key, digest)] = detections
+            while len(self._images) > self.maxImages:
+                self._images.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self, key=None):
+        """Forgets every detection, or those made with a subscription key.
+        Args:
+            key (str). Optional. the subscription key.
+        """
+        with self._lock:
+            if key is None:
+                self._images.clear()
+            else:
+                for image in [image for image in self._images if image[0] == key]:
+                    del self._images[image]
+
+    def stats(self):
+        """The registry statistics.
+        Returns:
+            dict. hits, misses, evictions and images
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['images'] = len(self._images)
+            return stats
+
+    def _detections(self, image, now):
+        # called with the lock held, drops the detections whose faceIds are about to expire
+        detections = [detection for detection in self._images.get(image, []) if now - detection[0] < self.reuseSeconds]
+        if not detections:
+            self._images.pop(image, None)
+        elif image in self._images:
+            self._images[image] = detections
+        return detections
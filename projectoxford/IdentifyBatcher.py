@@ -0,0 +1,112 @@
+import threading
+
+from .Face import _identifyBatchSize
+
+
+def _isRejected(error):
+    """True for an error response to a request the service rejected, e.g. one invalid or expired
+    faceId in a batch, rather than for throttling or a server or connection error"""
+    status = getattr(error, 'status', None)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.faceIds = []
+        self.callers = 0
+        self.separately = False
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class IdentifyBatcher(object):
+    """Gathers identify calls made at the same time from many threads into shared requests.
+    Calls for the same person group and candidate count that arrive within a short window are
+    sent as one identification, and each caller gets back only the results for its own faces.
+    If the service rejects a shared identification, every caller sends its own faces on its own,
+    so that only the caller with the bad faceId gets the error.
+
+    Enable it on a :class:`Face` client with face.identifyBatcher = IdentifyBatcher(face)
+    """
+
+    def __init__(self, face, windowSeconds=0.01, maxBatchSize=_identifyBatchSize):
+        """Initializes a new instance of the class.
+        Args:
+            face (:class:`Face`). the client that sends the batched identifications.
+            windowSeconds (float). how long the first call of a batch waits for others to join it.
+            maxBatchSize (int). the most faceIds sent in one identification, at most the service limit of 10.
+        """
+        self.face = face
+        self.windowSeconds = windowSeconds
+        self.maxBatchSize = min(maxBatchSize, _identifyBatchSize)
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def identify(self, personGroupId, faces, maxNumOfCandidatesReturned=1):
+        """Identifies faces as part of a shared batch. Blocks until the batch has been identified.
+
+        Args:
+            personGroupId (str). The person group ID to use
+            faces (str[]). Array of faceIds to use
+            maxNumOfCandidatesReturned (str). Optional maximum number of candidates to return
+
+        Returns:
+            object. The resulting JSON for the given faces, in order
+        """
+        uniqueFaceIds = []
+        for faceId in faces:
+            if faceId not in uniqueFaceIds:
+                uniqueFaceIds.append(faceId)
+
+        if len(uniqueFaceIds) >= self.maxBatchSize:
+            return self.face._identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned)
+
+        key = (personGroupId, maxNumOfCandidatesReturned)
+        with self._lock:
+            batch = self._batches.get(key)
+            added = [faceId for faceId in uniqueFaceIds if batch is None or faceId not in batch.faceIds]
+            leader = batch is None or len(batch.faceIds) + len(added) > self.maxBatchSize
+            if leader:
+                if batch is not None:
+                    batch.full.set()  # send the current batch now and start a new one
+                batch = self._batches[key] = _Batch()
+                added = uniqueFaceIds
+
+            batch.faceIds.extend(added)
+            batch.callers += 1
+            if len(batch.faceIds) >= self.maxBatchSize:
+                batch.full.set()
+
+        if leader:
+            self._send(key, batch)
+        else:
+            batch.done.wait()
+
+        if batch.separately:
+            return self.face._identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned)
+        if batch.error is not None:
+            raise batch.error
+        if batch.result is None:
+            return None
+
+        results = dict((result['faceId'], result) for result in batch.result)
+        return [results[faceId] for faceId in faces if faceId in results]
+
+    def _send(self, key, batch):
+        batch.full.wait(self.windowSeconds)
+        with self._lock:
+            if self._batches.get(key) is batch:
+                del self._batches[key]
+
+        try:
+            batch.result = self.face._identifyChunk(key[0], batch.faceIds, key[1])
+        except Exception as error:
+            if batch.callers > 1 and _isRejected(error):
+                batch.separately = True
+            else:
+                batch.error = error
+        finally:
+            batch.done.set()
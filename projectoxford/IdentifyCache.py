@@ -0,0 +1,166 @@
+import collections
+import copy
+import threading
+import time
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+# identified faceIds expire 24 hours after detection, so their results are not kept longer than that
+_faceIdReuseSeconds = 23 * 60 * 60
+
+# the fields of a training status that tell one training from another, in order of preference
+_trainingTimestamps = ('endTime', 'lastActionDateTime', 'startTime', 'createdDateTime')
+
+
+def trainingTimestamp(status):
+    """The timestamp identifying the training a training status describes, or None if it has none"""
+    for name in _trainingTimestamps:
+        if status.get(name):
+            return status[name]
+    return None
+
+
+class IdentifyCache(object):
+    """Caches the candidates identified for each face, per person group and number of candidates.
+    The answer of an identification only changes when its person group is trained again, so
+    a group's entries are dropped when a training started through a client sharing the cache
+    completes, or when a training status shows a training the cache has not seen. No results are
+    cached for a group while a training started through such a client is running. Callers get
+    copies of the cached results, so changing a result does not change the cache."""
+
+    def __init__(self, maxEntries=100000, ttlSeconds=_faceIdReuseSeconds, revalidateSeconds=None):
+        """Initializes a new instance of the class.
+        Args:
+            maxEntries (int). the maximum number of identified faces kept, the least recently used are dropped first.
+            ttlSeconds (float). how long a result is kept, at most 23 hours since its faceId expires.
+            revalidateSeconds (float). Optional. check the training status of a group before serving
+                it from the cache if it was last checked longer ago than this, to see trainings made elsewhere.
+        """
+        self.maxEntries = maxEntries
+        self.ttlSeconds = min(ttlSeconds, _faceIdReuseSeconds)
+        self.revalidateSeconds = revalidateSeconds
+        self._entries = collections.OrderedDict()
+        self._groups = {}
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def needsRevalidation(self, key, personGroupId):
+        """Whether the training status of a group should be checked before it is served from the cache."""
+        if self.revalidateSeconds is None:
+            return False
+        with self._lock:
+            group = self._groups.get((key, personGroupId))
+            return group is None or _monotonic() - group['checkedAt'] > self.revalidateSeconds
+
+    def split(self, key, personGroupId, faceIds, maxNumOfCandidatesReturned):
+        """Looks up the cached results of an identification.
+        Args:
+            key (str). the subscription key.
+            personGroupId (str). the person group.
+            faceIds (str[]). the faces to identify.
+            maxNumOfCandidatesReturned (int). the number of candidates asked for.
+
+        Returns:
+            tuple. (generation, known, missing), the generation to pass to :meth:`store`, the cached
+            results keyed by faceId, and the faceIds that must be identified
+        """
+        now = _monotonic()
+        known = {}
+        missing = []
+        with self._lock:
+            group = self._group(key, personGroupId)
+            for faceId in faceIds:
+                if faceId in known or faceId in missing:
+                    continue
+                entryKey = (key, personGroupId, faceId, maxNumOfCandidatesReturned)
+                entry = self._entries.get(entryKey)
+                if entry is not None and entry[0] > now and entry[1] == group['generation']:
+                    self._entries[entryKey] = self._entries.pop(entryKey)  # most recently used
+                    known[faceId] = copy.deepcopy(entry[2])
+                    self._stats['hits'] += 1
+                else:
+                    self._entries.pop(entryKey, None)
+                    missing.append(faceId)
+                    self._stats['misses'] += 1
+            return group['generation'], known, missing
+
+    def store(self, key, personGroupId, maxNumOfCandidatesReturned, generation, results):
+        """Caches the results of an identification, unless the group changed since :meth:`split`.
+        Args:
+            key (str). the subscription key.
+            personGroupId (str). the person group.
+            maxNumOfCandidatesReturned (int). the number of candidates asked for.
+            generation (int). the generation returned by :meth:`split`.
+            results (object[]). the resulting JSON of the identification.
+        """
+        expires = _monotonic() + self.ttlSeconds
+        with self._lock:
+            group = self._group(key, personGroupId)
+            if group['generation'] != generation or group['training']:
+                return
+            for result in results:
+                entryKey = (key, personGroupId, result['faceId'], maxNumOfCandidatesReturned)
+                self._entries.pop(entryKey, None)
+                self._entries[entryKey] = (expires, generation, copy.deepcopy(result))
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def trainingStarted(self, key, personGroupId, status):
+        """Records a training started through a client, see :meth:`PersonGroup.trainingStart`."""
+        with self._lock:
+            group = self._group(key, personGroupId)
+            self._invalidate(group)
+            group['training'] = True
+        if status is not None:
+            self.trainingObserved(key, personGroupId, status)
+
+    def trainingObserved(self, key, personGroupId, status):
+        """Records a training status read through a client, see :meth:`PersonGroup.trainingStatus`.
+        A finished training the cache has not seen drops the group's entries."""
+        if status is None:
+            return
+        # a status without a timestamp tells trainings apart by its status alone
+        training = (status.get('status'), trainingTimestamp(status))
+        with self._lock:
+            group = self._group(key, personGroupId)
+            group['checkedAt'] = _monotonic()
+            if training[0] == 'running':
+                return  # the trained model only changes once the training finishes
+            if group['training'] or training != group['trainedAt']:
+                self._invalidate(group)
+            group['training'] = False
+            group['trainedAt'] = training
+
+    def invalidate(self, key=None, personGroupId=None):
+        """Drops the cached results of a group, of every group of a subscription key, or of every group.
+        Args:
+            key (str). Optional. the subscription key.
+            personGroupId (str). Optional. the person group.
+        """
+        with self._lock:
+            for (groupKey, groupId), group in self._groups.items():
+                if (key is None or groupKey == key) and (personGroupId is None or groupId == personGroupId):
+                    self._invalidate(group)
+
+    def stats(self):
+        """The cache statistics.
+        Returns:
+            dict. hits, misses, invalidations and entries
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            return stats
+
+    # called with the lock held
+
+    def _group(self, key, personGroupId):
+        group = self._groups.get((key, personGroupId))
+        if group is None:
+            group = self._groups[(key, personGroupId)] = {'generation': 0, 'training': False, 'trainedAt': None, 'checkedAt': _monotonic()}
+        return group
+
+    def _invalidate(self, group):
+        # entries of older generations are dropped as they are looked up or pushed out
+        group['generation'] += 1
+        self._stats['invalidations'] += 1
@@ -0,0 +1,13 @@
+class OxfordError(Exception):
+    """An error response of the Project Oxford API. The message is 'status <code>: <body>', or
+    'retry count (<n>) exceeded: <body>' once a throttled call runs out of retries, and the
+    status code is kept in the status attribute so that callers need not parse the message."""
+
+    def __init__(self, message, status=None):
+        """Initializes a new instance of the class.
+        Args:
+            message (str). the error message.
+            status (int). the HTTP status code of the response.
+        """
+        Exception.__init__(self, message)
+        self.status = status
@@ -0,0 +1,57 @@
+import collections
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def imap(function, iterable, concurrency, ordered=True):
+    """Applies a function to every item of an iterable on a bounded thread pool.
+    Items are pulled from the iterable only as workers free up, so arbitrarily long
+    inputs stream through with at most `concurrency` items in memory. Stopping the
+    iteration early cancels the items that have not started.
+
+    Args:
+        function (callable). Called with each item.
+        iterable (iterable). The items, consumed lazily.
+        concurrency (int). The maximum number of items processed at once.
+        ordered (bool). Optional. Yield in input order rather than as items complete.
+
+    Returns:
+        generator. (index, result, error) for every item, where index is the item's position
+        in the input and error is the exception raised by the function or None
+    """
+    if concurrency < 1:
+        raise Exception('concurrency must be at least 1')
+
+    iterator = enumerate(iterable)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {}
+    order = collections.deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(function, item)
+                pending[future] = index
+                if ordered:
+                    order.append(future)
+
+            if not pending:
+                return
+
+            if ordered:
+                future = order.popleft()
+                wait([future])
+            else:
+                future = next(iter(wait(list(pending), return_when=FIRST_COMPLETED).done))
+
+            index = pending.pop(future)
+            error = future.exception()
+            yield index, future.result() if error is None else None, error
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
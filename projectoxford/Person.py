@@ -2,16 +2,32 @@ from .Base import Base
 
 _personUrl = 'https://api.projectoxford.ai/face/v0/persongroups'
 
+# what a change to a person that does not exist returns internally, told apart from a successful change's empty body
+_notFound = object()
+
+
+def _named(persons, name):
+    for person in persons or []:
+        if person['name'] == name:
+            return person
+    return None
+
+
+def _found(result):
+    return None if result is _notFound else result
+
 
 class Person(Base):
     """Client for using the Project Oxford person APIs"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
-        Base.__init__(self, key)
+        Base.__init__(self, key, context)
+        self.trainingScheduler = None
 
     def addFace(self, personGroupId, personId, faceId, userData=None):
         """Adds a face to a person for identification. The maximum face count for each person is 32.
@@ -25,12 +41,21 @@ class Person(Base):
             userData (str). Optional. Attach user data to person's face. The maximum length is 1024.
 
         Returns:
-            object. The resulting JSON
+            object. The resulting JSON, None if the person or person group does not exist
         """
 
         body = {} if userData is None else {'userData': userData}
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId + '/faces/' + faceId
-        return self._invoke('put', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
+
+        def recordAdded(result):
+            if result is _notFound:
+                return None
+            if self.context.personMirror is not None:
+                self.context.personMirror.putFace(self.key, personGroupId, personId, faceId, userData)
+            self._changed(personGroupId)
+            return result
+
+        return self._then(self._invoke('put', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key}, notFound=_notFound), recordAdded)
 
     def deleteFace(self, personGroupId, personId, faceId):
         """Deletes a face from a person.
@@ -41,11 +66,20 @@ class Person(Base):
             faceId (str). The ID of the face to be deleted.
 
         Returns:
-            object. The resulting JSON
+            object. The resulting JSON, None if the face, person or person group does not exist
         """
 
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId + '/faces/' + faceId
-        return self._invoke('delete', uri, headers={'Ocp-Apim-Subscription-Key': self.key})
+
+        def recordDeleted(result):
+            if self.context.personMirror is not None:
+                self.context.personMirror.deleteFace(self.key, personGroupId, personId, faceId)
+            if result is _notFound:
+                return None
+            self._changed(personGroupId)
+            return result
+
+        return self._then(self._invoke('delete', uri, headers={'Ocp-Apim-Subscription-Key': self.key}, notFound=_notFound), recordDeleted)
 
     def updateFace(self, personGroupId, personId, faceId, userData=None):
         """Updates a face for a person.
@@ -62,7 +96,12 @@ class Person(Base):
 
         body = {} if userData is None else {'userData': userData}
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId + '/faces/' + faceId
-        return self._invoke('patch', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
+
+        def recordUpdated(result):
+            if self.context.personMirror is not None:
+                self.context.personMirror.putFace(self.key, personGroupId, personId, faceId, userData)
+
+        return self._after(self._invoke('patch', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key}), recordUpdated)
 
     def getFace(self, personGroupId, personId, faceId):
         """Get a face for a person.
@@ -77,7 +116,8 @@ class Person(Base):
         """
 
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId + '/faces/' + faceId
-        return self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._mirrored('face', uri, lambda: self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key}),
+                              personGroupId, personId, faceId)
 
     def create(self, personGroupId, faceIds, name, userData=None):
         """Creates a new person in a specified person group for identification.
@@ -102,8 +142,12 @@ class Person(Base):
         if userData is not None:
             body['userData'] = userData
 
+        def recordCreated(result):
+            if result is not None:
+                self._recordPerson(personGroupId, result['personId'], {'name': name, 'userData': userData, 'faceIds': list(faceIds)})
+
         uri = _personUrl + '/' + personGroupId + '/persons'
-        return self._invoke('post', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._after(self._invoke('post', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key}), recordCreated)
 
     def delete(self, personGroupId, personId):
         """Deletes an existing person from a person group.
@@ -113,11 +157,18 @@ class Person(Base):
             personId (str). The target person to delete.
 
         Returns:
-            object. The resulting JSON
+            object. The resulting JSON, None if the person or person group does not exist
         """
 
+        def recordDeleted(result):
+            self._forgetPerson(personGroupId, personId)
+            if result is _notFound:
+                return None
+            self._changed(personGroupId)
+            return result
+
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId
-        return self._invoke('delete', uri, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._then(self._invoke('delete', uri, headers={'Ocp-Apim-Subscription-Key': self.key}, notFound=_notFound), recordDeleted)
 
     def get(self, personGroupId, personId):
         """Gets an existing person from a person group.
@@ -131,7 +182,8 @@ class Person(Base):
         """
 
         uri = _personUrl + '/' + personGroupId + '/persons/' + personId
-        return self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._mirrored('person', uri, lambda: self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key}),
+                              personGroupId, personId)
 
     def update(self, personGroupId, personId, faceIds, name, userData=None):
         """Updates a person's information.
@@ -146,15 +198,7 @@ class Person(Base):
         Returns:
             object. The resulting JSON
         """
-
-        body = {
-            'faceIds': faceIds,
-            'name': name,
-            'userData': userData
-        }
-
-        uri = _personUrl + '/' + personGroupId + '/persons/' + personId
-        return self._invoke('patch', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._then(self._update(personGroupId, personId, faceIds, name, userData), _found)
 
     def createOrUpdate(self, personGroupId, faceIds, name, userData=None):
         """Creates or updates a person's information.
@@ -168,11 +212,13 @@ class Person(Base):
         Returns:
             object. The resulting JSON
         """
-        persons = self.list(personGroupId)
-        for person in persons:
-            if person['name'] == name:
-                self.update(personGroupId, person['personId'], faceIds, name, userData)
-                return person
+        found, person = self._lookup(personGroupId, name)
+        if not found:
+            person = _named(self.list(personGroupId), name)
+
+        # a person deleted since it was listed or indexed is created again
+        if person is not None and self._update(personGroupId, person['personId'], faceIds, name, userData) is not _notFound:
+            return person
 
         return self.create(personGroupId, faceIds, name, userData)
 
@@ -186,5 +232,53 @@ class Person(Base):
             object. The resulting JSON
         """
 
+        def recordListed(result):
+            if result is not None and self.context.personIndex is not None:
+                self.context.personIndex.load(self.key, personGroupId, result)
+
         uri = _personUrl + '/' + personGroupId + '/persons'
-        return self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key})
+        listed = self._mirrored('persons', uri, lambda: self._invoke('get', uri, headers={'Ocp-Apim-Subscription-Key': self.key}), personGroupId)
+        return self._after(listed, recordListed)
+
+    def _update(self, personGroupId, personId, faceIds, name, userData):
+        """Updates a person, see :meth:`update`, returning _notFound if the person does not exist"""
+        body = {
+            'faceIds': faceIds,
+            'name': name,
+            'userData': userData
+        }
+
+        def recordUpdated(result):
+            if result is _notFound:
+                self._forgetPerson(personGroupId, personId)
+            else:
+                self._recordPerson(personGroupId, personId, {'name': name, 'userData': userData, 'faceIds': list(faceIds)})
+            return result
+
+        uri = _personUrl + '/' + personGroupId + '/persons/' + personId
+        return self._then(self._invoke('patch', uri, json=body, headers={'Ocp-Apim-Subscription-Key': self.key}, notFound=_notFound), recordUpdated)
+
+    def _lookup(self, personGroupId, name):
+        """Finds a person by name in the context's person index, see :meth:`PersonIndex.lookup`"""
+        if self.context.personIndex is None:
+            return False, None
+        return self.context.personIndex.lookup(self.key, personGroupId, name)
+
+    def _changed(self, personGroupId):
+        if self.trainingScheduler is not None:
+            self.trainingScheduler.markDirty(personGroupId)
+
+    def _recordPerson(self, personGroupId, personId, changes):
+        """Keeps the context's person index and mirror in step with a person created or updated through this client"""
+        if self.context.personIndex is not None:
+            self.context.personIndex.put(self.key, personGroupId, dict(changes, personId=personId))
+        if self.context.personMirror is not None:
+            self.context.personMirror.putPerson(self.key, personGroupId, personId, changes)
+        self._changed(personGroupId)
+
+    def _forgetPerson(self, personGroupId, personId):
+        """Drops a person deleted, or found missing, from the context's person index and mirror"""
+        if self.context.personIndex is not None:
+            self.context.personIndex.remove(self.key, personGroupId, personId)
+        if self.context.personMirror is not None:
+            self.context.personMirror.deletePerson(self.key, personGroupId, personId)
@@ -3,17 +3,19 @@ import time
 from .Base import Base
 
 _personGroupUrl = 'https://api.projectoxford.ai/face/v0/persongroups'
+_monotonic = getattr(time, 'monotonic', time.time)
 
 
 class PersonGroup(Base):
     """Client for using the Project Oxford person group APIs"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
-        Base.__init__(self, key)
+        Base.__init__(self, key, context)
 
     def create(self, personGroupId, name, userData=None):
         """Creates a new person group with a user-specified ID.
@@ -34,10 +36,14 @@ class PersonGroup(Base):
             'userData': userData
         }
 
-        return self._invoke('put',
-                            _personGroupUrl + '/' + personGroupId,
-                            json=body,
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        def recordCreated(result):
+            if self.context.personMirror is not None:
+                self.context.personMirror.putGroup(self.key, personGroupId, body, created=True)
+
+        return self._after(self._invoke('put',
+                                        _personGroupUrl + '/' + personGroupId,
+                                        json=body,
+                                        headers={'Ocp-Apim-Subscription-Key': self.key}), recordCreated)
 
     def delete(self, personGroupId):
         """Deletes an existing person group.
@@ -49,9 +55,17 @@ class PersonGroup(Base):
             object. The resulting JSON
         """
 
-        return self._invoke('delete',
-                            _personGroupUrl + '/' + personGroupId,
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        def recordDeleted(result):
+            if self.context.personIndex is not None:
+                self.context.personIndex.invalidate(self.key, personGroupId)
+            if self.context.personMirror is not None:
+                self.context.personMirror.deleteGroup(self.key, personGroupId)
+            if self.context.identifyCache is not None:
+                self.context.identifyCache.invalidate(self.key, personGroupId)
+
+        return self._after(self._invoke('delete',
+                                        _personGroupUrl + '/' + personGroupId,
+                                        headers={'Ocp-Apim-Subscription-Key': self.key}), recordDeleted)
 
     def get(self, personGroupId):
         """Gets an existing person group.
@@ -63,9 +77,8 @@ class PersonGroup(Base):
             object. The resulting JSON
         """
 
-        return self._invoke('get',
-                            _personGroupUrl + '/' + personGroupId,
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        url = _personGroupUrl + '/' + personGroupId
+        return self._mirrored('group', url, lambda: self._invoke('get', url, headers={'Ocp-Apim-Subscription-Key': self.key}), personGroupId)
 
     def trainingStatus(self, personGroupId):
         """Retrieves the training status of a person group. Training is triggered by the Train PersonGroup API.
@@ -79,9 +92,13 @@ class PersonGroup(Base):
             object. The resulting JSON
         """
 
-        return self._invoke('get',
-                            _personGroupUrl + '/' + personGroupId + '/training',
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        def recordStatus(result):
+            if self.context.identifyCache is not None:
+                self.context.identifyCache.trainingObserved(self.key, personGroupId, result)
+
+        return self._after(self._invoke('get',
+                                        _personGroupUrl + '/' + personGroupId + '/training',
+                                        headers={'Ocp-Apim-Subscription-Key': self.key}), recordStatus)
 
     def trainingStart(self, personGroupId):
         """Starts a person group training.
@@ -96,9 +113,13 @@ class PersonGroup(Base):
             object. The resulting JSON
         """
 
-        return self._invoke('post',
-                            _personGroupUrl + '/' + personGroupId + '/training',
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        def recordStarted(result):
+            if self.context.identifyCache is not None:
+                self.context.identifyCache.trainingStarted(self.key, personGroupId, result)
+
+        return self._after(self._invoke('post',
+                                        _personGroupUrl + '/' + personGroupId + '/training',
+                                        headers={'Ocp-Apim-Subscription-Key': self.key}), recordStarted)
 
     def update(self, personGroupId, name, userData=None):
         """Updates a person group with a user-specified ID.
@@ -119,10 +140,14 @@ class PersonGroup(Base):
             'userData': userData
         }
 
-        return self._invoke('patch',
-                            _personGroupUrl + '/' + personGroupId,
-                            json=body,
-                            headers={'Ocp-Apim-Subscription-Key': self.key})
+        def recordUpdated(result):
+            if self.context.personMirror is not None:
+                self.context.personMirror.putGroup(self.key, personGroupId, body)
+
+        return self._after(self._invoke('patch',
+                                        _personGroupUrl + '/' + personGroupId,
+                                        json=body,
+                                        headers={'Ocp-Apim-Subscription-Key': self.key}), recordUpdated)
 
     def createOrUpdate(self, personGroupId, name, userData=None):
         """Creates or updates a person group with a user-specified ID.
@@ -147,18 +172,18 @@ class PersonGroup(Base):
 
         Args:
             personGroupId (str). Name of person group to train
+            timeoutSeconds (float). Optional. How long to wait for the training, measured on a monotonic clock
 
         Returns:
             object. The resulting JSON
         """
-        timeout = 0
+        deadline = _monotonic() + timeoutSeconds
         status = self.trainingStart(personGroupId)
         while status['status'] == 'running':
             time.sleep(1)
             status = self.trainingStatus(personGroupId)
-            timeout += 1
 
-            if timeout >= timeoutSeconds:
+            if status['status'] == 'running' and _monotonic() >= deadline:
                 raise Exception('training timed out after {0} seconds, last known status: {1}'.format(timeoutSeconds, status))
 
         return status
@@ -169,4 +194,4 @@ class PersonGroup(Base):
         Returns:
             object. The resulting JSON
         """
-        return self._invoke('get', _personGroupUrl, headers={'Ocp-Apim-Subscription-Key': self.key})
+        return self._mirrored('groups', _personGroupUrl, lambda: self._invoke('get', _personGroupUrl, headers={'Ocp-Apim-Subscription-Key': self.key}))
@@ -0,0 +1,116 @@
+import threading
+import time
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class PersonIndex(object):
+    """An index of the persons in each person group by name, so that :meth:`Person.createOrUpdate`
+    finds a person without listing the whole group. A group is loaded by one list call and then
+    kept up to date by the create, update and delete calls made through clients sharing the index.
+    Changes made by other processes are only seen once the group expires or is invalidated."""
+
+    def __init__(self, ttlSeconds=300):
+        """Initializes a new instance of the class.
+        Args:
+            ttlSeconds (float). Optional. how long a loaded group is trusted before it is listed again, None for no expiry.
+        """
+        self.ttlSeconds = ttlSeconds
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key, personGroupId, name):
+        """Finds a person by name.
+        Args:
+            key (str). the subscription key the group belongs to.
+            personGroupId (str). the person group.
+            name (str). the person's name.
+
+        Returns:
+            tuple. (True, person) if the group is loaded, where person is None if there is no such person,
+            or (False, None) if the group must be listed first
+        """
+        with self._lock:
+            group = self._group(key, personGroupId)
+            if group is None:
+                return False, None
+            personId = group['names'].get(name)
+            return True, dict(group['persons'][personId]) if personId is not None else None
+
+    def load(self, key, personGroupId, persons):
+        """Replaces a group's entries with the result of listing it.
+        Args:
+            key (str). the subscription key the group belongs to.
+            personGroupId (str). the person group.
+            persons (object[]). the persons in the group, as returned by :meth:`Person.list`
+        """
+        group = {
+            'expires': _monotonic() + self.ttlSeconds if self.ttlSeconds is not None else None,
+            'names': {},
+            'persons': {}
+        }
+        for person in persons:
+            group['persons'][person['personId']] = dict(person)
+            group['names'].setdefault(person['name'], person['personId'])
+
+        with self._lock:
+            self._groups[(key, personGroupId)] = group
+
+    def put(self, key, personGroupId, person):
+        """Adds or updates a person of a loaded group. Unloaded groups are left alone.
+        Args:
+            key (str). the subscription key the group belongs to.
+            personGroupId (str). the person group.
+            person (object). the person, with at least a personId and name
+        """
+        with self._lock:
+            group = self._group(key, personGroupId)
+            if group is None:
+                return
+            self._discard(group, person['personId'])
+            group['persons'][person['personId']] = dict(person)
+            group['names'].setdefault(person['name'], person['personId'])
+
+    def remove(self, key, personGroupId, personId):
+        """Removes a person from a loaded group.
+        Args:
+            key (str). the subscription key the group belongs to.
+            personGroupId (str). the person group.
+            personId (str). the person to remove.
+        """
+        with self._lock:
+            group = self._group(key, personGroupId)
+            if group is not None:
+                self._discard(group, personId)
+
+    def invalidate(self, key=None, personGroupId=None):
+        """Forgets loaded groups, so that they are listed again on next use.
+        Args:
+            key (str). Optional. only forget the groups of this subscription key.
+            personGroupId (str). Optional. only forget this person group.
+        """
+        with self._lock:
+            for groupKey in list(self._groups):
+                if (key is None or groupKey[0] == key) and (personGroupId is None or groupKey[1] == personGroupId):
+                    del self._groups[groupKey]
+
+    # called with the lock held
+
+    def _group(self, key, personGroupId):
+        group = self._groups.get((key, personGroupId))
+        if group is not None and group['expires'] is not None and group['expires'] <= _monotonic():
+            del self._groups[(key, personGroupId)]
+            return None
+        return group
+
+    def _discard(self, group, personId):
+        person = group['persons'].pop(personId, None)
+        if person is None or group['names'].get(person['name']) != personId:
+            return
+
+        # another person with the same name takes over the name
+        del group['names'][person['name']]
+        for otherId, other in group['persons'].items():
+            if other['name'] == person['name']:
+                group['names'][person['name']] = otherId
+                break
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .Parallel import imap
+
+_schema = [
+    'CREATE TABLE IF NOT EXISTS groups (key TEXT, personGroupId TEXT, body TEXT, syncedAt REAL, PRIMARY KEY (key, personGroupId))',
+    'CREATE TABLE IF NOT EXISTS persons (key TEXT, personGroupId TEXT, personId TEXT, body TEXT, syncedAt REAL, PRIMARY KEY (key, personGroupId, personId))',
+    'CREATE TABLE IF NOT EXISTS faces (key TEXT, personGroupId TEXT, personId TEXT, faceId TEXT, body TEXT, syncedAt REAL, PRIMARY KEY (key, personGroupId, personId, faceId))',
+    # when each list was last read in full, personGroupId '' standing for the list of person groups
+    'CREATE TABLE IF NOT EXISTS listings (key TEXT, personGroupId TEXT, syncedAt REAL, PRIMARY KEY (key, personGroupId))'
+]
+
+
+def _hashKey(key):
+    """Subscription keys are not stored, rows are keyed by a digest of them instead"""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class _MirrorView(object):
+    """One read through the mirror, in the get and put shape used for cached calls"""
+
+    def __init__(self, mirror, kind, key, ids):
+        self.mirror = mirror
+        self.kind = kind
+        self.key = key
+        self.ids = ids
+
+    def get(self, _):
+        return self.mirror.lookup(self.kind, self.key, *self.ids)
+
+    def put(self, _, url, result):
+        self.mirror.store(self.kind, self.key, result, *self.ids)
+
+
+class PersonMirror(object):
+    """A local SQLite copy of person groups, persons and their faces. Reads are served from it
+    while the copy is fresher than a staleness bound, and lists of groups or persons also answer
+    for groups or persons that are not in them. Changes made through clients sharing the mirror
+    are written through to it, and :meth:`sync` re-reads the lists that have gone stale."""
+
+    def __init__(self, path=':memory:', maxStalenessSeconds=300):
+        """Initializes a new instance of the class.
+        Args:
+            path (str). Optional. the SQLite database file, created if missing. Defaults to a private in-memory database.
+            maxStalenessSeconds (float). Optional. how old a mirrored record may be and still be served, None to always serve it.
+        """
+        self.path = path
+        self.maxStalenessSeconds = maxStalenessSeconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode=WAL')
+        with self._connection:
+            for statement in _schema:
+                self._connection.execute(statement)
+
+    def view(self, kind, key, *ids):
+        """A read of one kind of record, for :meth:`Base._withCache`."""
+        return _MirrorView(self, kind, _hashKey(key), ids)
+
+    def lookup(self, kind, key, *ids):
+        """Finds a mirrored result.
+        Args:
+            kind (str). 'groups', 'group', 'persons', 'person' or 'face'.
+            key (str). the digest of the subscription key.
+            ids (str). the personGroupId, personId and faceId, as far as the kind needs them.
+
+        Returns:
+            tuple. (True, result) if the mirror can answer, (False, None) otherwise
+        """
+        with self._lock:
+            if kind == 'groups':
+                if not self._listed(key, ''):
+                    return False, None
+                return True, self._bodies('SELECT body FROM groups WHERE key = ? ORDER BY personGroupId', (key,))
+            if kind == 'persons':
+                if not self._listed(key, ids[0]):
+                    return False, None
+                return True, self._bodies('SELECT body FROM persons WHERE key = ? AND personGroupId = ? ORDER BY personId', (key,) + ids)
+
+            table, columns = _tables[kind]
+            row = self._connection.execute('SELECT body, syncedAt FROM {0} WHERE key = ? AND {1}'.format(table, _where(columns)), (key,) + ids).fetchone()
+            if row is not None and self._fresh(row[1]):
+                return True, json.loads(row[0])
+            if row is None and kind != 'face' and self._listed(key, '' if kind == 'group' else ids[0]):
+                return True, None  # not in a fresh list, so it does not exist
+            return False, None
+
+    def store(self, kind, key, result, *ids):
+        """Records a result read from the service.
+        Args:
+            kind (str). 'groups', 'group', 'persons', 'person' or 'face'.
+            key (str). the digest of the subscription key.
+            result (object). the resulting JSON, None if it was not found.
+            ids (str). the personGroupId, personId and faceId, as far as the kind needs them.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            if kind == 'groups':
+                if result is None:
+                    return
+                listed = set(group['personGroupId'] for group in result)
+                for row in self._connection.execute('SELECT personGroupId FROM groups WHERE key = ?', (key,)).fetchall():
+                    if row[0] not in listed:
+                        self._deleteGroup(key, row[0])
+                for group in result:
+                    self._put('group', key, (group['personGroupId'],), group, now)
+                self._setListed(key, '', now)
+            elif kind == 'persons':
+                if result is None:
+                    self._deleteGroup(key, ids[0])
+                    return
+                self._connection.execute('DELETE FROM persons WHERE key = ? AND personGroupId = ?', (key,) + ids)
+                for person in result:
+                    self._put('person', key, ids + (person['personId'],), person, now)
+                self._setListed(key, ids[0], now)
+            elif result is None:
+                if kind == 'group':
+                    self._deleteGroup(key, ids[0])
+                else:
+                    table, columns = _tables[kind]
+                    self._connection.execute('DELETE FROM {0} WHERE key = ? AND {1}'.format(table, _where(columns)), (key,) + ids)
+            else:
+                self._put(kind, key, ids, result, now)
+
+    # write through
+
+    def putGroup(self, key, personGroupId, changes, created=False):
+        """Records a person group created or updated through a client. A created group is known to have no persons."""
+        with self._lock, self._connection:
+            key = _hashKey(key)
+            now = time.time()
+            group = self._current('group', key, (personGroupId,)) or {'personGroupId': personGroupId}
+            group.update(changes)
+            self._put('group', key, (personGroupId,), group, now)
+            if created:
+                self._setListed(key, personGroupId, now)
+
+    def deleteGroup(self, key, personGroupId):
+        """Records a person group deleted through a client."""
+        with self._lock, self._connection:
+            self._deleteGroup(_hashKey(key), personGroupId)
+
+    def putPerson(self, key, personGroupId, personId, changes):
+        """Records a person created or updated through a client."""
+        with self._lock, self._connection:
+            key = _hashKey(key)
+            person = self._current('person', key, (personGroupId, personId)) or {'personId': personId}
+            person.update(changes)
+            self._put('person', key, (personGroupId, personId), person, time.time())
+
+    def deletePerson(self, key, personGroupId, personId):
+        """Records a person deleted through a client."""
+        with self._lock, self._connection:
+            key = _hashKey(key)
+            self._connection.execute('DELETE FROM persons WHERE key = ? AND personGroupId = ? AND personId = ?', (key, personGroupId, personId))
+            self._connection.execute('DELETE FROM faces WHERE key = ? AND personGroupId = ? AND personId = ?', (key, personGroupId, personId))
+
+    def putFace(self, key, personGroupId, personId, faceId, userData):
+        """Records a face added to or updated on a person through a client."""
+        with self._lock, self._connection:
+            key = _hashKey(key)
+            now = time.time()
+            self._put('face', key, (personGroupId, personId, faceId), {'faceId': faceId, 'userData': userData}, now)
+            person = self._current('person', key, (personGroupId, personId))
+            if person is not None and faceId not in person.get('faceIds', []):
+                person['faceIds'] = person.get('faceIds', []) + [faceId]
+                self._put('person', key, (personGroupId, personId), person, now)
+
+    def deleteFace(self, key, personGroupId, personId, faceId):
+        """Records a face deleted from a person through a client."""
+        with self._lock, self._connection:
+            key = _hashKey(key)
+            self._connection.execute('DELETE FROM faces WHERE key = ? AND personGroupId = ? AND personId = ? AND faceId = ?',
+                                     (key, personGroupId, personId, faceId))
+            person = self._current('person', key, (personGroupId, personId))
+            if person is not None and faceId in person.get('faceIds', []):
+                person['faceIds'] = [other for other in person['faceIds'] if other != faceId]
+                self._put('person', key, (personGroupId, personId), person, time.time())
+
+    def faceUserData(self, key, personGroupId, pairs):
+        """The user data of mirrored faces, however long ago they were mirrored. A face keeps the user data it
+        was added with unless it is updated, which clients sharing the mirror write through.
+        Args:
+            key (str). the subscription key.
+            personGroupId (str). the person group.
+            pairs (tuple[]). the (personId, faceId) pairs wanted.
+
+        Returns:
+            dict. the user data keyed by faceId, for the faces the mirror has
+        """
+        wanted = set(pairs)
+        with self._lock:
+            rows = self._connection.execute('SELECT personId, faceId, body FROM faces WHERE key = ? AND personGroupId = ?',
+                                            (_hashKey(key), personGroupId)).fetchall()
+        return dict((faceId, json.loads(body).get('userData')) for personId, faceId, body in rows if (personId, faceId) in wanted)
+
+    # resync
+
+    def staleGroups(self, key):
+        """The mirrored person groups whose person lists have gone stale.
+        Args:
+            key (str). the subscription key.
+
+        Returns:
+            str[]. the personGroupIds
+        """
+        key = _hashKey(key)
+        with self._lock:
+            rows = self._connection.execute('SELECT personGroupId FROM groups WHERE key = ?', (key,)).fetchall()
+            return [row[0] for row in rows if not self._listed(key, row[0])]
+
+    def sync(self, person, personGroup, concurrency=4):
+        """Re-reads the lists that have gone stale: the person groups, then the persons of every
+        group whose list is stale. Fresh lists cost no calls.
+
+        Args:
+            person (:class:`Person`). the client that lists persons.
+            personGroup (:class:`PersonGroup`). the client that lists person groups.
+            concurrency (int). Optional. the maximum number of list calls in flight.
+
+        Returns:
+            str[]. the personGroupIds whose persons were listed
+        """
+        personGroup.list()
+        stale = self.staleGroups(person.key)
+        for _, _, error in imap(person.list, stale, concurrency):
+            if error is not None:
+                raise error
+        return stale
+
+    def invalidate(self, key=None):
+        """Marks everything mirrored for a subscription key, or every key, as stale.
+        Args:
+            key (str). Optional. the subscription key.
+        """
+        with self._lock, self._connection:
+            for table in ('groups', 'persons', 'faces', 'listings'):
+                if key is None:
+                    self._connection.execute('UPDATE {0} SET syncedAt = 0'.format(table))
+                else:
+                    self._connection.execute('UPDATE {0} SET syncedAt = 0 WHERE key = ?'.format(table), (_hashKey(key),))
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._connection.close()
+
+    # called with the lock held
+
+    def _fresh(self, syncedAt):
+        return self.maxStalenessSeconds is None or time.time() - syncedAt <= self.maxStalenessSeconds
+
+    def _listed(self, key, personGroupId):
+        row = self._connection.execute('SELECT syncedAt FROM listings WHERE key = ? AND personGroupId = ?', (key, personGroupId)).fetchone()
+        return row is not None and self._fresh(row[0])
+
+    def _setListed(self, key, personGroupId, now):
+        self._connection.execute('INSERT OR REPLACE INTO listings VALUES (?, ?, ?)', (key, personGroupId, now))
+
+    def _bodies(self, query, parameters):
+        return [json.loads(row[0]) for row in self._connection.execute(query, parameters)]
+
+    def _current(self, kind, key, ids):
+        table, columns = _tables[kind]
+        row = self._connection.execute('SELECT body FROM {0} WHERE key = ? AND {1}'.format(table, _where(columns)), (key,) + ids).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _put(self, kind, key, ids, body, now):
+        table, columns = _tables[kind]
+        self._connection.execute('INSERT OR REPLACE INTO {0} VALUES ({1})'.format(table, ', '.join('?' * (len(columns) + 3))),
+                                 (key,) + tuple(ids) + (json.dumps(body), now))
+
+    def _deleteGroup(self, key, personGroupId):
+        for table in ('groups', 'persons', 'faces'):
+            self._connection.execute('DELETE FROM {0} WHERE key = ? AND personGroupId = ?'.format(table), (key, personGroupId))
+        self._connection.execute('DELETE FROM listings WHERE key = ? AND personGroupId = ?', (key, personGroupId))
+
+
+_tables = {
+    'group': ('groups', ('personGroupId',)),
+    'person': ('persons', ('personGroupId', 'personId')),
+    'face': ('faces', ('personGroupId', 'personId', 'faceId'))
+}
+
+
+def _where(columns):
+    return ' AND '.join(column + ' = ?' for column in columns)
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from .RateLimiter import TokenBucket
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+try:
+    import fcntl
+
+    def _lockFile(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlockFile(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+except ImportError:
+    import msvcrt
+
+    def _lockFile(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlockFile(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _hashKey(key):
+    """Subscription keys never leave the process, backends see a digest of them instead"""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class RateLimitBackend(object):
+    """Keeps the token buckets that pace calls, one per subscription key."""
+
+    # True if reserve performs I/O and must not be called on an event loop
+    blocking = False
+
+    def reserve(self, key, tokens=1, maxWait=None):
+        """Takes tokens from a key's bucket, going into debt if there are not enough.
+        Args:
+            key (str). the subscription key.
+            tokens (int). the number of calls to reserve.
+            maxWait (float). Optional. do not reserve if the caller would have to wait longer than this.
+
+        Returns:
+            float. the number of seconds the caller must wait before calling, or None if maxWait would be exceeded
+        """
+        raise NotImplementedError()
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """Token buckets shared by the threads of one process."""
+
+    def __init__(self, transactionsPerSecond, burst=None):
+        """Initializes a new instance of the class.
+        Args:
+            transactionsPerSecond (float). the sustained number of calls allowed per second for each key.
+            burst (int). Optional. the number of calls per key that may be made at once.
+        """
+        TokenBucket(transactionsPerSecond, burst)  # validate the settings up front
+        self.transactionsPerSecond = transactionsPerSecond
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key, tokens=1, maxWait=None):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.transactionsPerSecond, self.burst)
+            return bucket.reserve(_monotonic(), tokens, maxWait)
+
+
+class FileRateLimitBackend(RateLimitBackend):
+    """Token buckets shared by every process on a host. Each key's bucket is a small file in
+    a shared directory, updated under an exclusive file lock."""
+
+    blocking = True
+
+    def __init__(self, directory, transactionsPerSecond, burst=None):
+        """Initializes a new instance of the class.
+        Args:
+            directory (str). the directory holding the bucket files, created if missing.
+            transactionsPerSecond (float). the sustained number of calls allowed per second for each key.
+            burst (int). Optional. the number of calls per key that may be made at once.
+        """
+        TokenBucket(transactionsPerSecond, burst)  # validate the settings up front
+        self.directory = directory
+        self.transactionsPerSecond = transactionsPerSecond
+        self.burst = burst
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+    def reserve(self, key, tokens=1, maxWait=None):
+        path = os.path.join(self.directory, _hashKey(key) + '.bucket')
+        with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as file:
+            _lockFile(file)
+            try:
+                file.seek(0)
+                state = file.read().split()
+                bucket = TokenBucket(self.transactionsPerSecond, self.burst,
+                                     tokens=float(state[0]) if len(state) == 2 else None,
+                                     updated=float(state[1]) if len(state) == 2 else None)
+
+                # wall clock time, since the bucket is shared with other processes
+                wait = bucket.reserve(time.time(), tokens, maxWait)
+
+                file.seek(0)
+                file.truncate()
+                file.write('{0!r} {1!r}'.format(bucket.tokens, bucket.updated).encode('ascii'))
+                file.flush()
+            finally:
+                _unlockFile(file)
+        return wait
+
+
+class RemoteRateLimitBackend(RateLimitBackend):
+    """Token buckets kept by a :class:`RateLimitServer`, shared by every process and host that uses it."""
+
+    blocking = True
+
+    def __init__(self, url, timeoutSeconds=5):
+        """Initializes a new instance of the class.
+        Args:
+            url (str). the base url of the rate limit server.
+            timeoutSeconds (float). Optional. the timeout for calls to the server.
+        """
+        self.url = url.rstrip('/')
+        self.timeoutSeconds = timeoutSeconds
+        self._session = requests.Session()
+
+    def reserve(self, key, tokens=1, maxWait=None):
+        body = {'key': _hashKey(key), 'tokens': tokens, 'maxWait': maxWait}
+        response = self._session.post(self.url + '/reserve', json=body, timeout=self.timeoutSeconds)
+        if response.status_code != 200:
+            raise Exception('rate limit server status {0}: {1}'.format(str(response.status_code), response.text))
+        return response.json()['wait']
+
+
+class _RateLimitRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers['content-length'])).decode('utf-8'))
+            wait = self.server.backend.reserve(body['key'], body.get('tokens', 1), body.get('maxWait'))
+            status, result = 200, {'wait': wait}
+        except Exception as error:
+            status, result = 400, {'error': str(error)}
+
+        content = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class RateLimitServer(object):
+    """A small HTTP server that keeps token buckets for :class:`RemoteRateLimitBackend` clients,
+    so that a whole fleet of workers shares one budget per subscription key."""
+
+    def __init__(self, transactionsPerSecond, burst=None, host='127.0.0.1', port=0):
+        """Initializes a new instance of the class.
+        Args:
+            transactionsPerSecond (float). the sustained number of calls allowed per second for each key.
+            burst (int). Optional. the number of calls per key that may be made at once.
+            host (str). Optional. the interface to listen on.
+            port (int). Optional. the port to listen on, defaults to any free port.
+        """
+        self._server = _ThreadingHTTPServer((host, port), _RateLimitRequestHandler)
+        self._server.backend = LocalRateLimitBackend(transactionsPerSecond, burst)
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base url for :class:`RemoteRateLimitBackend` clients."""
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        """Serves requests on a background thread.
+        Returns:
+            :class:`RateLimitServer`. this server
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def serveForever(self):
+        """Serves requests on the calling thread until :meth:`stop` is called."""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Stops serving and releases the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
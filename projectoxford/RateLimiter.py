@@ -0,0 +1,95 @@
+import time
+
+
+class TokenBucket(object):
+    """The token bucket arithmetic shared by the rate limit backends. Not thread-safe on its own;
+    backends serialize access to it. The bucket refills at transactionsPerSecond and holds at
+    most burst tokens, so callers stay just under the quota instead of learning about it from 429 responses."""
+
+    def __init__(self, transactionsPerSecond, burst=None, tokens=None, updated=None):
+        """Initializes a new instance of the class.
+        Args:
+            transactionsPerSecond (float). the sustained number of calls allowed per second.
+            burst (int). Optional. the number of calls that may be made at once, defaults to one second's worth.
+            tokens (float). Optional. the tokens currently in the bucket, defaults to a full bucket.
+            updated (float). Optional. the clock time at which tokens was measured.
+        """
+        if not transactionsPerSecond or transactionsPerSecond <= 0:
+            raise Exception('transactionsPerSecond must be a positive number')
+
+        self.transactionsPerSecond = float(transactionsPerSecond)
+        self.burst = float(burst if burst is not None else max(1.0, self.transactionsPerSecond))
+        self.tokens = self.burst if tokens is None else float(tokens)
+        self.updated = updated
+
+    def refill(self, now):
+        """Adds the tokens earned since the last update, up to the burst size."""
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.transactionsPerSecond)
+        self.updated = now
+
+    def reserve(self, now, tokens=1, maxWait=None):
+        """Takes tokens from the bucket, going into debt if there are not enough.
+        Args:
+            now (float). the current clock time.
+            tokens (int). the number of calls to reserve.
+            maxWait (float). Optional. do not reserve if the caller would have to wait longer than this.
+
+        Returns:
+            float. the number of seconds the caller must wait before calling, or None if maxWait would be exceeded
+        """
+        self.refill(now)
+        wait = max(0.0, (tokens - self.tokens) / self.transactionsPerSecond)
+        if maxWait is not None and wait > maxWait:
+            return None
+        self.tokens -= tokens
+        return wait
+
+
+class RateLimiter(object):
+    """Paces the calls made with one subscription key. The budget itself is kept by a
+    :class:`RateLimitBackend`, which may be shared by other threads, processes or hosts."""
+
+    def __init__(self, backend, key):
+        """Initializes a new instance of the class.
+        Args:
+            backend (:class:`RateLimitBackend`). the backend that keeps the token buckets.
+            key (str). the subscription key whose calls are paced.
+        """
+        self.backend = backend
+        self.key = key
+
+    def reserve(self, tokens=1, maxWait=None):
+        """Takes tokens from the bucket, going into debt if there are not enough.
+        Args:
+            tokens (int). the number of calls to reserve.
+            maxWait (float). Optional. do not reserve if the caller would have to wait longer than this.
+
+        Returns:
+            float. the number of seconds the caller must wait before calling, or None if maxWait would be exceeded
+        """
+        return self.backend.reserve(self.key, tokens, maxWait)
+
+    def tryAcquire(self, tokens=1):
+        """Takes tokens from the bucket if they are available right now.
+        Args:
+            tokens (int). the number of calls to acquire.
+
+        Returns:
+            bool. True if the tokens were taken
+        """
+        return self.reserve(tokens, maxWait=0) is not None
+
+    def acquire(self, tokens=1, timeout=None):
+        """Blocks until tokens are available and takes them.
+        Args:
+            tokens (int). the number of calls to acquire.
+            timeout (float). Optional. the longest time in seconds to block.
+
+        Returns:
+            float. the number of seconds spent waiting, or None if the timeout would be exceeded
+        """
+        wait = self.reserve(tokens, maxWait=timeout)
+        if wait:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,157 @@
+import hashlib
+
+from .EnrollmentCheckpoint import largestFace, sourceKey
+
+# the most characters of user data the service keeps for a face
+_faceUserDataLimit = 1024
+_faceTagPrefixes = ('url:', 'path:', 'index:', 'sha256:')
+
+
+def faceTag(key):
+    """The user data that marks a face as added by reconciliation from a source
+
+    Args:
+        key (str). the source key, see :func:`EnrollmentCheckpoint.sourceKey`
+
+    Returns:
+        str. the tag, the key itself or a digest of it if it is too long
+    """
+    if len(key) <= _faceUserDataLimit:
+        return key
+    return 'sha256:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def planReconciliation(desired, group, persons, faceTags):
+    """Works out the changes that bring a person group to a desired state.
+    Persons are matched by name. Faces are matched by the tag that reconciliation stores in the
+    user data of the faces it adds, so faces added by other means are left alone, and the faces
+    of a person are only changed when the desired state lists them.
+
+    Args:
+        desired (object). the desired state: the group's name and userData, and persons, person names mapped to
+            objects with an optional userData and an optional list of faces, each an options object for :meth:`Face.detect`
+        group (object). the group as returned by :meth:`PersonGroup.get`, None if it does not exist
+        persons (object[]). the persons as returned by :meth:`Person.list`
+        faceTags (dict). the user data of the existing faces of persons whose faces are listed, keyed by faceId
+
+    Returns:
+        object. group, 'create', 'update' or None, and persons, the changes for each person that needs any:
+        its name, personId, action ('create', 'update', 'delete' or None), userData, current faceIds,
+        addFaces, a list of (tag, source) pairs, and deleteFaces, a list of faceIds
+    """
+    groupAction = None
+    if group is None:
+        groupAction = 'create'
+    elif group.get('name') != desired['name'] or group.get('userData') != desired.get('userData'):
+        groupAction = 'update'
+
+    desiredPersons = desired.get('persons', {})
+    changes = []
+    current = {}
+    for person in persons or []:
+        if person['name'] in desiredPersons and person['name'] not in current:
+            current[person['name']] = person
+        else:
+            changes.append(_change(person['name'], person['personId'], 'delete', person.get('userData'), person.get('faceIds', [])))
+
+    for name, wanted in desiredPersons.items():
+        wanted = wanted or {}
+        person = current.get(name)
+        if person is None:
+            change = _change(name, None, 'create', wanted.get('userData'), [])
+        else:
+            action = 'update' if person.get('userData') != wanted.get('userData') else None
+            change = _change(name, person['personId'], action, wanted.get('userData'), person.get('faceIds', []))
+
+        if 'faces' in wanted:
+            tags = []
+            wantedTags = set()
+            for index, source in enumerate(wanted['faces']):
+                tag = faceTag(sourceKey(index, source))
+                if tag not in wantedTags:
+                    tags.append((tag, source))
+                    wantedTags.add(tag)
+            existingTags = {}
+            for faceId in change['faceIds']:
+                tag = faceTags.get(faceId)
+                if tag is None or not tag.startswith(_faceTagPrefixes):
+                    continue
+                if tag in wantedTags and tag not in existingTags:
+                    existingTags[tag] = faceId
+                else:
+                    change['deleteFaces'].append(faceId)
+            change['addFaces'] = [(tag, source) for tag, source in tags if tag not in existingTags]
+
+        if change['action'] is not None or change['addFaces'] or change['deleteFaces']:
+            changes.append(change)
+
+    return {'group': groupAction, 'persons': changes}
+
+
+def _change(name, personId, action, userData, faceIds):
+    return {
+        'name': name,
+        'personId': personId,
+        'action': action,
+        'userData': userData,
+        'faceIds': list(faceIds),
+        'addFaces': [],
+        'deleteFaces': []
+    }
+
+
+def groupCalls(personGroupId, desired, plan):
+    """The calls that bring the person group itself to its desired state, see :func:`changeCalls`"""
+    if plan['group'] is not None:
+        yield 'personGroup', plan['group'], (personGroupId, desired['name'], desired.get('userData'))
+
+
+def changeCalls(personGroupId, change, options, noFace):
+    """The calls that apply the planned change of a person. A generator shared by the threaded and
+    asyncio clients: it yields (client, method, arguments) for each call, client being 'person',
+    'personGroup' or None for the face client itself, and is sent the result of each call.
+
+    Args:
+        personGroupId (str). the person group
+        change (object). the change, one of the persons of :func:`planReconciliation`
+        options (object). Optional. options applied to every detection
+        noFace (str[]). the tags of the sources that had no face are appended to it
+    """
+    personId = change['personId']
+    if change['action'] == 'delete':
+        yield 'person', 'delete', (personGroupId, personId)
+        return
+    if change['action'] == 'create':
+        personId = (yield 'person', 'create', (personGroupId, [], change['name'], change['userData']))['personId']
+    elif change['action'] == 'update':
+        yield 'person', 'update', (personGroupId, personId, change['faceIds'], change['name'], change['userData'])
+
+    for faceId in change['deleteFaces']:
+        yield 'person', 'deleteFace', (personGroupId, personId, faceId)
+
+    for tag, source in change['addFaces']:
+        faceId = largestFace((yield None, 'detect', (dict(options or {}, **source),)))
+        if faceId is None:
+            noFace.append(tag)
+        else:
+            yield 'person', 'addFace', (personGroupId, personId, faceId, tag)
+
+
+def reconciliationResult(plan):
+    """The result of a reconciliation before any change is applied, see :meth:`Face.reconcile`"""
+    return {'plan': plan, 'noFace': {}, 'errors': {}}
+
+
+def recordApplied(result, change, noFace, error):
+    """Records the outcome of applying a change to a person in the result of a reconciliation"""
+    if error is not None:
+        result['errors'][change['name']] = error
+    elif noFace:
+        result['noFace'][change['name']] = noFace
+
+
+def facesToInspect(desired, persons):
+    """The (personId, faceId) pairs whose user data :func:`planReconciliation` needs, those of persons whose faces are listed"""
+    desiredPersons = desired.get('persons', {})
+    return [(person['personId'], faceId) for person in persons or []
+            if 'faces' in (desiredPersons.get(person['name']) or {}) for faceId in person.get('faceIds', [])]
@@ -0,0 +1,134 @@
+import bisect
+import threading
+
+# upper bounds of the latency histogram buckets, in seconds
+_defaultBuckets = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(**labels):
+    escaped = ('{0}="{1}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for name, value in sorted(labels.items()))
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class RequestMetrics(object):
+    """Aggregates the events of :meth:`ClientContext.emit` in process: calls by endpoint, method and
+    status, a latency histogram per endpoint, throttle waits, retries, bytes sent and received and
+    cache hits and misses. Add it to a context's request hooks, and export the totals with
+    :meth:`prometheus`."""
+
+    def __init__(self, buckets=_defaultBuckets, prefix='projectoxford'):
+        """Initializes a new instance of the class.
+        Args:
+            buckets (float[]). the upper bounds of the latency histogram buckets, in seconds.
+            prefix (str). the prefix of the exported metric names.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __call__(self, event):
+        """Records an event, see :meth:`ClientContext.emit`."""
+        endpoint = event['endpoint']
+        with self._lock:
+            if event['kind'] == 'cache':
+                name = (endpoint, event['cache'])
+                self._cache[name] = self._cache.get(name, 0) + 1
+                return
+
+            status = str(event['status']) if event['status'] is not None else 'error'
+            name = (endpoint, event['method'], status)
+            self._requests[name] = self._requests.get(name, 0) + 1
+
+            totals = self._endpoints.get(endpoint)
+            if totals is None:
+                totals = self._endpoints[endpoint] = {
+                    'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0,
+                    'throttleSeconds': 0.0, 'retries': 0, 'requestBytes': 0, 'responseBytes': 0
+                }
+            index = bisect.bisect_left(self.buckets, event['latency'])
+            if index < len(self.buckets):
+                totals['buckets'][index] += 1
+            totals['count'] += 1
+            totals['sum'] += event['latency']
+            totals['throttleSeconds'] += event['throttleSeconds']
+            totals['retries'] += event['retries']
+            totals['requestBytes'] += event['requestBytes'] or 0
+            totals['responseBytes'] += event['responseBytes'] or 0
+
+    def quantile(self, endpoint, q):
+        """Estimates a latency quantile of an endpoint from its histogram.
+        Args:
+            endpoint (str). the API, e.g. 'face/detections'
+            q (float). the quantile, e.g. 0.99
+
+        Returns:
+            float. the upper bound of the bucket the quantile falls in, inf if it is above every bucket,
+            or None if no calls were recorded
+        """
+        with self._lock:
+            totals = self._endpoints.get(endpoint)
+            if totals is None:
+                return None
+            rank = q * totals['count']
+            cumulative = 0
+            for bound, count in zip(self.buckets, totals['buckets']):
+                cumulative += count
+                if cumulative >= rank:
+                    return float(bound)
+            return float('inf')
+
+    def reset(self):
+        """Clears every total."""
+        with self._lock:
+            self._requests = {}
+            self._endpoints = {}
+            self._cache = {}
+
+    def prometheus(self):
+        """The totals in the Prometheus text exposition format.
+        Returns:
+            str. the exported metrics
+        """
+        prefix = self.prefix
+        lines = []
+
+        def header(name, kind, text):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, text))
+            lines.append('# TYPE {0}_{1} {2}'.format(prefix, name, kind))
+
+        with self._lock:
+            header('requests_total', 'counter', 'Calls sent to the API.')
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append('{0}_requests_total{1} {2}'.format(prefix, _labels(endpoint=endpoint, method=method, status=status), count))
+
+            header('request_duration_seconds', 'histogram', 'Latency of calls including retries and throttling.')
+            for endpoint, totals in sorted(self._endpoints.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, totals['buckets']):
+                    cumulative += count
+                    lines.append('{0}_request_duration_seconds_bucket{1} {2}'.format(prefix, _labels(endpoint=endpoint, le=_number(bound)), cumulative))
+                lines.append('{0}_request_duration_seconds_bucket{1} {2}'.format(prefix, _labels(endpoint=endpoint, le='+Inf'), totals['count']))
+                lines.append('{0}_request_duration_seconds_sum{1} {2}'.format(prefix, _labels(endpoint=endpoint), _number(totals['sum'])))
+                lines.append('{0}_request_duration_seconds_count{1} {2}'.format(prefix, _labels(endpoint=endpoint), totals['count']))
+
+            for name, field, kind, text in (
+                    ('throttle_wait_seconds_total', 'throttleSeconds', 'counter', 'Time spent waiting on the rate limiter and after 429 responses.'),
+                    ('retries_total', 'retries', 'counter', 'Failed attempts that were retried.'),
+                    ('request_bytes_total', 'requestBytes', 'counter', 'Request body bytes sent, where known.'),
+                    ('response_bytes_total', 'responseBytes', 'counter', 'Response body bytes received.')):
+                header(name, kind, text)
+                for endpoint, totals in sorted(self._endpoints.items()):
+                    value = totals[field]
+                    lines.append('{0}_{1}{2} {3}'.format(prefix, name, _labels(endpoint=endpoint), _number(value) if isinstance(value, float) else value))
+
+            header('cache_lookups_total', 'counter', 'Cache lookups by result.')
+            for (endpoint, result), count in sorted(self._cache.items()):
+                lines.append('{0}_cache_lookups_total{1} {2}'.format(prefix, _labels(endpoint=endpoint, result=result), count))
+
+        return '\n'.join(lines) + '\n'
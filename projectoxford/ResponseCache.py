@@ -0,0 +1,303 @@
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .ClientContext import endpointName
+
+_chunkSize = 1024 * 1024
+
+_detectEndpoint = 'face/detections'
+
+# results that reference server side state must not outlive it. faceIds expire 24 hours after
+# detection, so cached detections are dropped after an hour and always leave a day's use minus that
+_maxTtlSeconds = {
+    _detectEndpoint: 60 * 60
+}
+
+
+def digestSource(options):
+    """The content digest of the image described by an options dictionary.
+    Files are hashed in chunks rather than read into memory.
+
+    Args:
+        options (object). the options dictionary with a url, path or stream
+
+    Returns:
+        str. the hex digest, or None if the source cannot be hashed without consuming it
+    """
+    digest = hashlib.sha256()
+    if 'url' in options and options['url'] != '':
+        digest.update(b'url:' + options['url'].encode('utf-8'))
+    elif 'path' in options and options['path'] != '':
+        with open(options['path'], 'rb') as file:
+            for chunk in iter(lambda: file.read(_chunkSize), b''):
+                digest.update(chunk)
+    elif 'stream' in options:
+        stream = options['stream']
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            digest.update(stream)
+        elif hasattr(stream, 'read') and hasattr(stream, 'seek') and hasattr(stream, 'tell'):
+            position = stream.tell()
+            for chunk in iter(lambda: stream.read(_chunkSize), b''):
+                digest.update(chunk)
+            stream.seek(position)
+        else:
+            return None
+    else:
+        return None
+    return digest.hexdigest()
+
+
+class ResponseCache(object):
+    """An opt-in cache for image analysis results, keyed by a digest of the image bytes (or url),
+    the subscription key, the endpoint and the query parameters. Entries live in a bounded in-memory LRU tier and,
+    when a directory is given, in a persistent on-disk tier shared by every process using it."""
+
+    def __init__(self, maxEntries=1024, maxBytes=64 * 1024 * 1024, ttlSeconds=24 * 60 * 60,
+                 directory=None, maxDiskBytes=1024 * 1024 * 1024, cacheDetections=False):
+        """Initializes a new instance of the class.
+        Args:
+            maxEntries (int). the maximum number of entries kept in memory.
+            maxBytes (int). the maximum total size of the entries kept in memory.
+            ttlSeconds (float). Optional. how long entries stay valid, None for no expiry.
+            directory (str). Optional. the directory of the on-disk tier, created if missing.
+            maxDiskBytes (int). the maximum total size of the on-disk tier.
+            cacheDetections (bool). Optional. also cache face detections, for at most an hour as their faceIds expire.
+        """
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.ttlSeconds = ttlSeconds
+        self.directory = directory
+        self.maxDiskBytes = maxDiskBytes
+        self.cacheDetections = cacheDetections
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._stats = {'memoryHits': 0, 'diskHits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._diskBytes = 0
+
+        if directory is not None:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._diskBytes = sum(os.path.getsize(path) for path in self._diskFiles())
+
+    def key(self, subscriptionKey, url, params, options):
+        """The cache key for an image analysis call.
+        Args:
+            subscriptionKey (str). the key the call is made with, results are not shared across keys.
+            url (str). the url of the API being called.
+            params (object). the query parameters.
+            options (object). the options dictionary with a url, path or stream
+
+        Returns:
+            str. the key, or None if the call cannot be cached
+        """
+        endpoint = endpointName(url)
+        if endpoint == _detectEndpoint and not self.cacheDetections:
+            return None
+
+        source = digestSource(options)
+        if source is None:
+            return None
+
+        subscription = hashlib.sha256(subscriptionKey.encode('utf-8')).hexdigest()
+        normalized = json.dumps(dict((str(name), str(value)) for name, value in params.items()), sort_keys=True)
+        return hashlib.sha256('\n'.join([subscription, endpoint, url, normalized, source]).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Looks up a cached result.
+        Args:
+            key (str). the key returned by :meth:`key`
+
+        Returns:
+            tuple. (True, result) on a hit, (False, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._entries[key] = self._entries.pop(key)  # most recently used
+                    self._stats['memoryHits'] += 1
+                    return True, _decode(entry[1], entry[2])
+                self._removeEntry(key)
+
+        if self.directory is not None:
+            stored = self._readDisk(key, now)
+            if stored is not None:
+                expires, kind, payload = stored
+                with self._lock:
+                    self._stats['diskHits'] += 1
+                    self._putEntry(key, expires, kind, payload)
+                return True, _decode(kind, payload)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return False, None
+
+    def put(self, key, url, result):
+        """Caches a result. Only JSON and image results are cached.
+        Args:
+            key (str). the key returned by :meth:`key`
+            url (str). the url of the API that was called.
+            result (object). the result to cache
+        """
+        encoded = _encode(result)
+        if encoded is None:
+            return
+
+        kind, payload = encoded
+        ttl = self.ttlSeconds
+        maxTtl = _maxTtlSeconds.get(endpointName(url))
+        if maxTtl is not None:
+            ttl = maxTtl if ttl is None else min(ttl, maxTtl)
+        expires = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._putEntry(key, expires, kind, payload)
+
+        if self.directory is not None:
+            self._writeDisk(key, expires, kind, payload)
+
+    def clear(self):
+        """Removes every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.directory is not None:
+                for path in self._diskFiles():
+                    _remove(path)
+                self._diskBytes = 0
+
+    def stats(self):
+        """The cache statistics.
+        Returns:
+            dict. hits, memoryHits, diskHits, misses, evictions, entries, bytes and diskBytes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hits'] = stats['memoryHits'] + stats['diskHits']
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['diskBytes'] = self._diskBytes
+            return stats
+
+    # memory tier, called with the lock held
+
+    def _putEntry(self, key, expires, kind, payload):
+        if len(payload) > self.maxBytes:
+            return
+        self._removeEntry(key)
+        self._entries[key] = (expires, kind, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.maxEntries or self._bytes > self.maxBytes:
+            oldest = next(iter(self._entries))
+            self._removeEntry(oldest)
+            self._stats['evictions'] += 1
+
+    def _removeEntry(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    # disk tier
+
+    def _diskPath(self, key):
+        return os.path.join(self.directory, key + '.entry')
+
+    def _diskFiles(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.entry')]
+
+    def _readDisk(self, key, now):
+        path = self._diskPath(key)
+        try:
+            with open(path, 'rb') as file:
+                header = json.loads(file.readline().decode('utf-8'))
+                payload = file.read()
+        except (IOError, OSError, ValueError):
+            return None
+
+        if header['expires'] is not None and header['expires'] <= now:
+            self._removeDisk(path)
+            return None
+
+        os.utime(path, None)  # keep recently used entries when trimming
+        return header['expires'], header['kind'], payload
+
+    def _writeDisk(self, key, expires, kind, payload):
+        header = json.dumps({'expires': expires, 'kind': kind}).encode('utf-8') + b'\n'
+        handle, temporaryPath = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as file:
+            file.write(header)
+            file.write(payload)
+
+        path = self._diskPath(key)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        _replace(temporaryPath, path)
+        with self._lock:
+            self._diskBytes += len(header) + len(payload) - previous
+            overflow = self._diskBytes > self.maxDiskBytes
+
+        if overflow:
+            self._trimDisk()
+
+    def _removeDisk(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._diskBytes -= size
+
+    def _trimDisk(self):
+        files = []
+        for path in self._diskFiles():
+            try:
+                files.append((os.path.getmtime(path), os.path.getsize(path), path))
+            except OSError:
+                pass
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.maxDiskBytes:
+                break
+            _remove(path)
+            total -= size
+            with self._lock:
+                self._stats['evictions'] += 1
+
+        with self._lock:
+            self._diskBytes = total
+
+
+def _encode(result):
+    if isinstance(result, bytes):
+        return 'bytes', result
+    if isinstance(result, (dict, list)):
+        return 'json', json.dumps(result).encode('utf-8')
+    return None
+
+
+def _decode(kind, payload):
+    return payload if kind == 'bytes' else json.loads(payload.decode('utf-8'))
+
+
+def _replace(source, destination):
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)
+    else:
+        if os.name == 'nt':
+            _remove(destination)
+        os.rename(source, destination)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
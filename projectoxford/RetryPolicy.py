@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+
+import requests
+
+_monotonic = getattr(time, 'monotonic', time.time)
+_transportErrorTypes = None
+
+# methods that can be sent twice with the same effect. Every PATCH of the API sets fields to the values sent.
+_idempotentMethods = ('get', 'head', 'options', 'put', 'patch', 'delete')
+
+# posts that only read or compute, so that sending them twice is harmless, unlike e.g. creating a person
+_readOnlyPosts = (
+    'emotion/recognize',
+    'face/detections',
+    'face/findsimilars',
+    'face/groupings',
+    'face/identifications',
+    'face/verifications',
+    'vision/analyses',
+    'vision/ocr',
+    'vision/thumbnails'
+)
+
+
+def _transportErrors():
+    """The connection reset and timeout errors raised by requests, and by aiohttp when it is installed"""
+    global _transportErrorTypes
+    if _transportErrorTypes is None:
+        errors = [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+        try:
+            import asyncio
+            import aiohttp
+            errors.extend([aiohttp.ClientConnectionError, asyncio.TimeoutError])
+        except ImportError:
+            pass
+        _transportErrorTypes = tuple(errors)
+    return _transportErrorTypes
+
+
+def parseRetryAfter(value):
+    """Parses a retry-after header value in seconds.
+    Args:
+        value (str). the header value, or None
+
+    Returns:
+        float. the number of seconds to wait, or None if the header is missing or not a number
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy(object):
+    """Describes which failed oxford calls are retried and how long to wait in between.
+    Delays grow exponentially with full jitter so that throttled workers spread out
+    instead of retrying in lockstep, and a retry-after header sets the minimum delay.
+    Server and connection errors are only retried for calls that are safe to send twice;
+    throttled calls were not processed and are retried whatever they are."""
+
+    def __init__(self, maxRetries=None, backoffBase=0.5, backoffMax=30.0, retryStatusCodes=(429, 500, 502, 503, 504),
+                 retryExceptions=None, deadlineSeconds=None, attemptTimeoutSeconds=None, retryPosts=_readOnlyPosts,
+                 alwaysRetryStatusCodes=(429,)):
+        """Initializes a new instance of the class.
+        Args:
+            maxRetries (int). Optional. the maximum number of retries per call, defaults to the deprecated Base.retryCount.
+            backoffBase (float). the delay in seconds before jitter for the first retry, doubled on every retry.
+            backoffMax (float). the largest delay in seconds before jitter.
+            retryStatusCodes (int[]). the response status codes that are retried.
+            retryExceptions (type[]). Optional. the exception types that are retried, defaults to connection errors and timeouts.
+            deadlineSeconds (float). Optional. the total time budget for a call including all retries.
+            attemptTimeoutSeconds (float). Optional. the timeout for a single attempt.
+            retryPosts (str[]). the endpoints, e.g. 'face/detections', whose posts are retried like idempotent calls.
+                Add e.g. 'face/persongroups' to also retry creating persons and starting trainings.
+            alwaysRetryStatusCodes (int[]). the retried status codes that are retried for every call.
+        """
+        if maxRetries is None:
+            from . import Base as baseModule  # imported late, Base imports this module
+            maxRetries = baseModule.retryCount
+        self.maxRetries = maxRetries
+        self.backoffBase = backoffBase
+        self.backoffMax = backoffMax
+        self.retryStatusCodes = frozenset(retryStatusCodes)
+        self.retryExceptions = tuple(retryExceptions) if retryExceptions is not None else None
+        self.deadlineSeconds = deadlineSeconds
+        self.attemptTimeoutSeconds = attemptTimeoutSeconds
+        self.retryPosts = frozenset(retryPosts)
+        self.alwaysRetryStatusCodes = frozenset(alwaysRetryStatusCodes)
+        self._lock = threading.Lock()
+        self._retries = {}
+
+    def deadline(self):
+        """The monotonic clock time by which a call starting now must complete.
+        Returns:
+            float. the deadline, or None if calls have no time budget
+        """
+        return _monotonic() + self.deadlineSeconds if self.deadlineSeconds is not None else None
+
+    def timeout(self, deadline):
+        """The timeout for the next attempt of a call.
+        Args:
+            deadline (float). the call deadline as returned by :meth:`deadline`
+
+        Returns:
+            float. the attempt timeout in seconds, or None for no timeout
+        """
+        timeout = self.attemptTimeoutSeconds
+        if deadline is not None:
+            remaining = max(0.0, deadline - _monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def isRetryableException(self, error):
+        """Whether an exception raised while sending a request is retried."""
+        return isinstance(error, self.retryExceptions if self.retryExceptions is not None else _transportErrors())
+
+    def isIdempotent(self, method, endpoint):
+        """Whether a call can be sent again after a server or connection error.
+        Args:
+            method (str). the HTTP method, e.g. 'post'
+            endpoint (str). the API, e.g. 'face/detections', see :func:`ClientContext.endpointName`
+        """
+        return method in _idempotentMethods or (method == 'post' and endpoint in self.retryPosts)
+
+    def backoff(self, retries, retryAfter=None):
+        """The delay before the next retry.
+        Args:
+            retries (int). the number of retries already made for this call.
+            retryAfter (float). Optional. the delay requested by the service.
+
+        Returns:
+            float. the number of seconds to wait
+        """
+        delay = random.uniform(0, min(self.backoffMax, self.backoffBase * (2 ** retries)))
+        return delay + retryAfter if retryAfter is not None else delay
+
+    def nextDelay(self, retries, deadline, status=None, error=None, retryAfter=None, method=None, endpoint=None):
+        """Decides whether a failed attempt is retried.
+        Args:
+            retries (int). the number of retries already made for this call.
+            deadline (float). the call deadline as returned by :meth:`deadline`
+            status (int). Optional. the response status code of the failed attempt.
+            error (Exception). Optional. the exception raised by the failed attempt.
+            retryAfter (float). Optional. the delay requested by the service.
+            method (str). Optional. the HTTP method of the call, calls are treated as idempotent if it is not given.
+            endpoint (str). Optional. the API called, see :meth:`isIdempotent`
+
+        Returns:
+            float. the number of seconds to wait before retrying, or None if the call should fail
+        """
+        if retries >= self.maxRetries:
+            return None
+        if error is not None and not self.isRetryableException(error):
+            return None
+        if error is None and status not in self.retryStatusCodes:
+            return None
+        if method is not None and not self.isIdempotent(method, endpoint) and (error is not None or status not in self.alwaysRetryStatusCodes):
+            return None
+
+        delay = self.backoff(retries, retryAfter)
+        if deadline is not None and _monotonic() + delay >= deadline:
+            return None
+
+        with self._lock:
+            reason = status if error is None else type(error).__name__
+            self._retries[reason] = self._retries.get(reason, 0) + 1
+        return delay
+
+    def stats(self):
+        """The number of retries made under this policy.
+        Returns:
+            dict. the retry count keyed by status code or exception name
+        """
+        with self._lock:
+            return dict(self._retries)
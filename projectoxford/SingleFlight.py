@@ -0,0 +1,146 @@
+import copy
+import hashlib
+import json as jsonlib
+import threading
+
+from .Base import FileUpload
+from .ClientContext import endpointName
+from .ResponseCache import digestSource
+from .RetryPolicy import _readOnlyPosts
+
+
+def _digestBody(json, data):
+    if data is None:
+        return 'json:' + jsonlib.dumps(json, sort_keys=True)
+    if isinstance(data, FileUpload):
+        return digestSource({'path': data.path})
+    return digestSource({'stream': data})
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.task = None
+
+
+class SingleFlight(object):
+    """Coalesces identical calls made at the same time, so that only one request is sent and every
+    caller gets its result or error. Calls are identical when they are made with the same
+    subscription key, method, url, query parameters and body. Only reads are coalesced: gets, and
+    the posts that analyse an image or compare faces. Callers other than the one whose request is
+    sent get their own copy of the result."""
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}
+        self._stats = {'sent': 0, 'coalesced': 0}
+        self._lock = threading.Lock()
+
+    def key(self, subscriptionKey, method, url, params, json=None, data=None):
+        """The key that identical calls share.
+        Args:
+            subscriptionKey (str). the subscription key the call is made with.
+            method (str). the HTTP method.
+            url (str). the url being called.
+            params (object). the query parameters.
+            json (object). Optional. the JSON body.
+            data (object). Optional. the binary body, see :meth:`Base._invoke`
+
+        Returns:
+            str. the key, or None if the call is a write or its body cannot be read without consuming it
+        """
+        # posts that only read or compute may be shared, writes such as creating a person are always sent
+        if method != 'get' and not (method == 'post' and endpointName(url) in _readOnlyPosts):
+            return None
+
+        body = _digestBody(json, data)
+        if body is None:
+            return None
+
+        normalized = jsonlib.dumps(dict((str(name), str(value)) for name, value in params.items()), sort_keys=True)
+        return hashlib.sha256('\n'.join([subscriptionKey, method, url, normalized, body]).encode('utf-8')).hexdigest()
+
+    def do(self, key, function):
+        """Calls a function, or waits for the identical call already in flight.
+        Args:
+            key (str). the key returned by :meth:`key`
+            function (callable). makes the call
+
+        Returns:
+            object. the result of the call, which raises the error of the call if it failed
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if shared:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['sent'] += 1
+
+        if shared:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = function()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # a result shared with other callers is never handed out itself, so none sees another's changes
+        return copy.deepcopy(call.result) if call.waiters else call.result
+
+    def doAsync(self, key, function):
+        """Starts a coroutine function as a task of the running event loop, or joins the identical
+        task already running in it. The task is not cancelled when one of its callers is, so callers
+        await it through asyncio.shield.
+
+        Args:
+            key (str). the key returned by :meth:`key`
+            function (callable). returns the coroutine making the call
+
+        Returns:
+            object. the call, whose task resolves to the result and whose waiters counts the callers that joined it.
+            Every caller should copy the result if there are any.
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            call = self._tasks.get((loop, key))
+            if call is not None:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+            else:
+                call = self._tasks[(loop, key)] = _Call()
+                call.task = loop.create_task(function())
+                call.task.add_done_callback(lambda done: self._finished(loop, key, call))
+                self._stats['sent'] += 1
+        return call
+
+    def stats(self):
+        """The coalescing statistics.
+        Returns:
+            dict. sent, the calls whose request was sent, coalesced, the calls that shared another's, and inFlight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['inFlight'] = len(self._calls) + len(self._tasks)
+            return stats
+
+    def _finished(self, loop, key, call):
+        # runs before the callers resume, so no caller joins once they have seen the result
+        with self._lock:
+            del self._tasks[(loop, key)]
+        if not call.task.cancelled():
+            call.task.exception()  # retrieved, in case every caller was cancelled
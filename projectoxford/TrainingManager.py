@@ -0,0 +1,200 @@
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent import futures
+
+_logger = logging.getLogger('projectoxford')
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _resolve(future, result=None, error=None):
+    """Completes a future unless its caller cancelled it, returns False if it was already done"""
+    if future.done():
+        return False
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except Exception:
+        return False  # cancelled since the check above
+    return True
+
+
+class _TrainingJob(object):
+
+    def __init__(self, personGroupId, timeoutSeconds):
+        self.personGroupId = personGroupId
+        self.timeoutSeconds = timeoutSeconds
+        self.deadline = _monotonic() + timeoutSeconds if timeoutSeconds is not None else None
+        self.future = futures.Future()
+        self.started = False
+        self.interval = None
+
+
+class TrainingManager(object):
+    """Trains many person groups without blocking a thread per group. One scheduler thread hands
+    the start and status calls that are due to a small pool of workers, without waiting for them,
+    polls each group less often the longer it trains and measures timeouts on a monotonic clock. Every training is represented by a future, which
+    asyncio code can await through asyncio.wrap_future."""
+
+    def __init__(self, personGroup, initialPollSeconds=1, maxPollSeconds=30, backoffFactor=2.0,
+                 timeoutSeconds=600, concurrency=4):
+        """Initializes a new instance of the class.
+        Args:
+            personGroup (:class:`PersonGroup`). the client that starts and polls the trainings.
+            initialPollSeconds (float). the delay before a training's first status poll.
+            maxPollSeconds (float). the longest delay between two polls of a training.
+            backoffFactor (float). the delay between polls is multiplied by this after each poll.
+            timeoutSeconds (float). Optional. how long a training may run before its future fails, None to wait forever.
+            concurrency (int). the maximum number of start and status calls in flight.
+        """
+        self.personGroup = personGroup
+        self.initialPollSeconds = initialPollSeconds
+        self.maxPollSeconds = maxPollSeconds
+        self.backoffFactor = backoffFactor
+        self.timeoutSeconds = timeoutSeconds
+        self.concurrency = concurrency
+        self._jobs = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+        self._closed = False
+        self._executor = futures.ThreadPoolExecutor(max_workers=concurrency)
+
+    def train(self, personGroupId, timeoutSeconds=None):
+        """Starts training a person group. A group already being trained by this manager is not
+        started again, and the future of its current training is returned instead.
+
+        Args:
+            personGroupId (str). the person group to train.
+            timeoutSeconds (float). Optional. overrides the manager's timeout for this training.
+
+        Returns:
+            :class:`concurrent.futures.Future`. resolves to the final training status, or fails with
+            the error raised while starting or polling, or on timeout
+        """
+        timeout = timeoutSeconds if timeoutSeconds is not None else self.timeoutSeconds
+        with self._condition:
+            if self._closed:
+                raise Exception('the training manager is closed')
+
+            job = self._jobs.get(personGroupId)
+            if job is None or job.future.cancelled():
+                job = self._jobs[personGroupId] = _TrainingJob(personGroupId, timeout)
+                self._schedule(job, _monotonic())
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='projectoxford-training')
+                    self._thread.daemon = True
+                    self._thread.start()
+            return job.future
+
+    def trainMany(self, personGroupIds, timeoutSeconds=None):
+        """Starts training many person groups, see :meth:`train`.
+        Returns:
+            dict. the futures keyed by personGroupId
+        """
+        return collections.OrderedDict((personGroupId, self.train(personGroupId, timeoutSeconds)) for personGroupId in personGroupIds)
+
+    def pending(self):
+        """The person groups being trained.
+        Returns:
+            str[]. the personGroupIds
+        """
+        with self._condition:
+            return list(self._jobs)
+
+    def close(self, wait=True):
+        """Stops the scheduler. Trainings still pending are left to run on the service, and their futures are cancelled.
+        Args:
+            wait (bool). Optional. block until the scheduler thread has stopped.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._executor.shutdown(wait=wait)
+
+    # scheduler thread
+
+    def _schedule(self, job, due):
+        # called with the condition held
+        heapq.heappush(self._queue, (due, next(self._sequence), job))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = _monotonic()
+                    if self._queue and self._queue[0][0] <= now:
+                        break
+                    self._condition.wait(self._queue[0][0] - now if self._queue else None)
+
+                if self._closed:
+                    jobs = list(self._jobs.values())
+                    self._jobs.clear()
+                    self._queue = []
+                    break
+
+                due = []
+                while self._queue and self._queue[0][0] <= now:
+                    due.append(heapq.heappop(self._queue)[2])
+
+            # a slow call must not hold up the other groups, so the scheduler does not wait for the calls
+            for job in due:
+                try:
+                    poll = self._executor.submit(self._poll, job)
+                except RuntimeError:
+                    break  # closed meanwhile, the job is cancelled below
+                poll.add_done_callback(lambda poll, job=job: self._polled(job, poll))
+
+        for job in jobs:
+            job.future.cancel()
+
+    def _polled(self, job, poll):
+        # called on the worker thread that made the call
+        try:
+            error = poll.exception()
+            self._advance(job, poll.result() if error is None else None, error)
+        except Exception:
+            # one job must not stop the others, so fail it and carry on
+            _logger.exception('Advancing the training of person group %s failed', job.personGroupId)
+            with self._condition:
+                if self._jobs.get(job.personGroupId) is job:
+                    del self._jobs[job.personGroupId]
+
+    def _poll(self, job):
+        if not job.started:
+            return self.personGroup.trainingStart(job.personGroupId)
+        return self.personGroup.trainingStatus(job.personGroupId)
+
+    def _advance(self, job, status, error):
+        job.started = True
+        if job.future.cancelled():
+            # the caller gave up on it, the training carries on at the service without being polled
+            with self._condition:
+                if self._jobs.get(job.personGroupId) is job:
+                    del self._jobs[job.personGroupId]
+            return
+
+        now = _monotonic()
+        if error is None and status is not None and status['status'] == 'running':
+            if job.deadline is None or now < job.deadline:
+                job.interval = self.initialPollSeconds if job.interval is None else min(self.maxPollSeconds, job.interval * self.backoffFactor)
+                due = now + job.interval if job.deadline is None else min(now + job.interval, job.deadline)
+                with self._condition:
+                    self._schedule(job, due)
+                return
+            error = Exception('training timed out after {0} seconds, last known status: {1}'.format(job.timeoutSeconds, status))
+
+        with self._condition:
+            if self._jobs.get(job.personGroupId) is job:
+                del self._jobs[job.personGroupId]
+        _resolve(job.future, status, error)
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from .TrainingManager import TrainingManager
+
+_logger = logging.getLogger('projectoxford')
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class TrainingScheduler(object):
+    """Trains person groups after they change, coalescing bursts of changes into one training.
+    A group marked dirty is trained once no change has been made to it for a quiet period, or
+    once a maximum delay has passed since its first untrained change, whichever comes first.
+    A group is never trained twice at once: changes made during a training are picked up by
+    the next one, started after the current one finishes.
+
+    Enable it on a :class:`Person` client with person.trainingScheduler = TrainingScheduler(personGroup),
+    and the person changes made through that client mark their group dirty.
+    """
+
+    def __init__(self, personGroup, quietSeconds=30, maxDelaySeconds=300, trainingManager=None):
+        """Initializes a new instance of the class.
+        Args:
+            personGroup (:class:`PersonGroup`). the client that trains the groups.
+            quietSeconds (float). how long a group must go without changes before it is trained.
+            maxDelaySeconds (float). the longest a change waits for a training, however busy its group.
+            trainingManager (:class:`TrainingManager`). Optional. runs the trainings, defaults to one of its own.
+        """
+        self.quietSeconds = quietSeconds
+        self.maxDelaySeconds = maxDelaySeconds
+        self._ownsManager = trainingManager is None
+        self.trainingManager = trainingManager if trainingManager is not None else TrainingManager(personGroup)
+        self._dirty = {}
+        self._training = {}
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+        self._closed = False
+
+    def markDirty(self, personGroupId):
+        """Records a change to a person group, scheduling a training for it.
+        Args:
+            personGroupId (str). the person group that changed.
+        """
+        now = _monotonic()
+        with self._condition:
+            if self._closed:
+                return
+            state = self._dirty.get(personGroupId)
+            if state is None:
+                self._dirty[personGroupId] = {'first': now, 'last': now, 'flush': False}
+            else:
+                state['last'] = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='projectoxford-training-scheduler')
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self, personGroupId=None):
+        """Trains dirty groups now rather than after their quiet period. A group that is being
+        trained is trained again as soon as the current training finishes.
+        Args:
+            personGroupId (str). Optional. the group to train, defaults to every dirty group.
+        """
+        with self._condition:
+            for groupId, state in self._dirty.items():
+                if personGroupId is None or groupId == personGroupId:
+                    state['flush'] = True
+            self._condition.notify()
+
+    def dirty(self):
+        """The person groups waiting to be trained.
+        Returns:
+            str[]. the personGroupIds
+        """
+        with self._condition:
+            return list(self._dirty)
+
+    def trainings(self):
+        """The trainings in progress.
+        Returns:
+            dict. a :class:`concurrent.futures.Future` for each training, keyed by personGroupId
+        """
+        with self._condition:
+            return dict(self._training)
+
+    def close(self):
+        """Stops scheduling trainings. Groups still dirty are not trained."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._ownsManager:
+            self.trainingManager.close()
+
+    def _due(self, state):
+        if state['flush']:
+            return state['first']
+        return min(state['last'] + self.quietSeconds, state['first'] + self.maxDelaySeconds)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = _monotonic()
+                    waiting = [(self._due(state), groupId) for groupId, state in self._dirty.items() if groupId not in self._training]
+                    ready = [groupId for due, groupId in waiting if due <= now]
+                    if ready:
+                        break
+                    self._condition.wait(min(due for due, _ in waiting) - now if waiting else None)
+
+                if self._closed:
+                    return
+
+                for personGroupId in ready:
+                    del self._dirty[personGroupId]
+
+            for personGroupId in ready:
+                self._start(personGroupId)
+
+    def _start(self, personGroupId):
+        try:
+            future = self.trainingManager.train(personGroupId)
+        except Exception as error:
+            future = Future()
+            future.set_exception(error)
+
+        with self._condition:
+            self._training[personGroupId] = future
+        future.add_done_callback(lambda done: self._trained(personGroupId, done))
+
+    def _trained(self, personGroupId, future):
+        if not future.cancelled() and future.exception() is not None:
+            _logger.warning('Training person group %s failed with %r', personGroupId, future.exception())
+
+        with self._condition:
+            if self._training.get(personGroupId) is future:
+                del self._training[personGroupId]
+            self._condition.notify()
@@ -10,12 +10,13 @@ _ocrUrl = 'https://api.projectoxford.ai/vision/v1/ocr'
 class Vision(Base):
     """Client for using the Project Oxford face APIs"""
 
-    def __init__(self, key):
+    def __init__(self, key, context=None):
         """Initializes a new instance of the class.
         Args:
             key (str). the API key to use for this client.
+            context (:class:`ClientContext`). Optional. the shared context to send requests through.
         """
-        Base.__init__(self, key)
+        Base.__init__(self, key, context)
 
     def analyze(self, options):
         """This operation does a deep analysis on the given image and then extracts a
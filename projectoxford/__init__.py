@@ -1 +1 @@
-__all__ = ['Base', 'Client', 'Face', 'Person', 'PersonGroup', 'Vision', 'Emotion']
+__all__ = ['Base', 'Client', 'ClientContext', 'Face', 'FaceIdRegistry', 'IdentifyBatcher', 'IdentifyCache', 'OxfordError', 'Person', 'PersonGroup', 'PersonIndex', 'PersonMirror', 'Vision', 'Emotion', 'EnrollmentCheckpoint', 'ConcurrencyLimiter', 'Parallel', 'RateLimitBackend', 'RateLimiter', 'RequestMetrics', 'ResponseCache', 'RetryPolicy', 'SingleFlight', 'TrainingManager', 'TrainingScheduler']
@@ -52,6 +52,7 @@ setup(
         # that you indicate whether you support Python 2, Python 3 or both.
         'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3.5',
     ],
 
     # What does your project relate to?
@@ -61,5 +62,13 @@ setup(
     # simple. Or you can use find_packages().
     packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
 
+    # Run-time dependencies, installed by pip along with the package
+    install_requires=['requests', 'futures; python_version < "3"'],
+
+    # Optional dependencies, e.g. pip install projectoxford[async]
+    extras_require={
+        'async': ['aiohttp'],
+    },
+
     test_suite='tests.projectoxford_tests'
 )
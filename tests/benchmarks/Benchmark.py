@@ -0,0 +1,179 @@
+"""Measures the client's own overhead against a local stand-in for the Project Oxford service.
+
+    python -m tests.benchmarks.Benchmark --concurrency 1 4 16 --calls 500 --latency 0.005
+
+Reports throughput, p50 and p99 latency and resident memory for each scenario and concurrency level.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+rootDirectory = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if rootDirectory not in sys.path:
+    sys.path.insert(0, rootDirectory)
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Emotion import Emotion
+from projectoxford.Face import Face
+from projectoxford.Parallel import imap
+from projectoxford.RetryPolicy import RetryPolicy
+from projectoxford.Vision import Vision
+from tests.benchmarks.FakeOxfordServer import FakeOxfordServer
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _scenarios(context, imageBytes):
+    image = b'\xff' * imageBytes
+    face = Face('benchmark', context)
+    vision = Vision('benchmark', context)
+    emotion = Emotion('benchmark', context)
+    face.personGroup.create('benchmark', 'Benchmark')
+    personId = face.person.create('benchmark', [], 'alice')['personId']
+
+    return [
+        ('detect', lambda index: face.detect({'stream': image, 'analyzesAge': True})),
+        ('analyze', lambda index: vision.analyze({'stream': image})),
+        ('ocr', lambda index: vision.ocr({'stream': image})),
+        ('thumbnail', lambda index: vision.thumbnail({'stream': image, 'width': 64, 'height': 64})),
+        ('recognize', lambda index: emotion.recognize({'stream': image})),
+        ('identify', lambda index: face.identify('benchmark', ['face-{0}'.format(index)])),
+        ('persongroup', lambda index: face.personGroup.get('benchmark')),
+        ('person', lambda index: face.person.get('benchmark', personId))
+    ]
+
+
+def _percentile(latencies, q):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def _rssBytes():
+    """The current and peak resident set size of the process, None where the platform does not tell"""
+    current = None
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, AttributeError):
+        pass
+
+    peak = None
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    return current, peak
+
+
+def run(concurrencyLevels=(1, 4, 16), calls=200, latencySeconds=0.0, throttleEvery=None, retryAfterSeconds=0.01,
+        responseBytes=0, imageBytes=64 * 1024, scenarios=None):
+    """Runs every scenario at every concurrency level against a fresh fake server.
+    Args:
+        concurrencyLevels (int[]). the numbers of calls in flight to measure.
+        calls (int). the number of calls made per scenario and level.
+        latencySeconds (float). the fake server's latency.
+        throttleEvery (int). Optional. the fake server answers every n-th call with a 429.
+        retryAfterSeconds (float). the retry-after of those 429s.
+        responseBytes (int). the size JSON results are padded to.
+        imageBytes (int). the size of the image sent by image analysis calls.
+        scenarios (str[]). Optional. the names of the scenarios to run, defaults to all.
+
+    Returns:
+        object[]. one result per scenario and level: scenario, concurrency, calls, errors, seconds,
+        throughput in calls per second, p50 and p99 latency in seconds, rssBytes and peakRssBytes
+    """
+    results = []
+    with FakeOxfordServer(latencySeconds=latencySeconds, throttleEvery=throttleEvery, retryAfterSeconds=retryAfterSeconds,
+                          responseBytes=responseBytes) as server:
+        for concurrency in concurrencyLevels:
+            context = ClientContext(poolConnections=concurrency, poolMaxSize=concurrency, baseUrl=server.url,
+                                    retryPolicy=RetryPolicy(backoffBase=retryAfterSeconds, backoffMax=retryAfterSeconds))
+            try:
+                for name, call in _scenarios(context, imageBytes):
+                    if scenarios and name not in scenarios:
+                        continue
+
+                    def timed(index):
+                        started = _monotonic()
+                        call(index)
+                        return _monotonic() - started
+
+                    call(0)  # warm up the connection pool
+                    latencies = []
+                    errors = 0
+                    started = _monotonic()
+                    for _, latency, error in imap(timed, range(calls), concurrency, ordered=False):
+                        if error is not None:
+                            errors += 1
+                        else:
+                            latencies.append(latency)
+                    seconds = _monotonic() - started
+
+                    rss, peakRss = _rssBytes()
+                    results.append({
+                        'scenario': name,
+                        'concurrency': concurrency,
+                        'calls': calls,
+                        'errors': errors,
+                        'seconds': seconds,
+                        'throughput': calls / seconds if seconds else None,
+                        'p50': _percentile(latencies, 0.5),
+                        'p99': _percentile(latencies, 0.99),
+                        'rssBytes': rss,
+                        'peakRssBytes': peakRss
+                    })
+            finally:
+                context.close()
+    return results
+
+
+def _milliseconds(seconds):
+    return '{0:.2f}'.format(seconds * 1000) if seconds is not None else '-'
+
+
+def _megabytes(size):
+    return '{0:.1f}'.format(size / 1048576.0) if size is not None else '-'
+
+
+def report(results, output=sys.stdout):
+    """Writes the results as a table."""
+    row = '{0:<12} {1:>11} {2:>7} {3:>6} {4:>10} {5:>9} {6:>9} {7:>8} {8:>9}\n'
+    output.write(row.format('scenario', 'concurrency', 'calls', 'errors', 'calls/s', 'p50 ms', 'p99 ms', 'rss MB', 'peak MB'))
+    for result in results:
+        output.write(row.format(result['scenario'], result['concurrency'], result['calls'], result['errors'],
+                                '{0:.1f}'.format(result['throughput'] or 0), _milliseconds(result['p50']), _milliseconds(result['p99']),
+                                _megabytes(result['rssBytes']), _megabytes(result['peakRssBytes'])))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the projectoxford clients against a local fake server.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='the numbers of calls in flight to measure')
+    parser.add_argument('--calls', type=int, default=200, help='the calls made per scenario and concurrency level')
+    parser.add_argument('--latency', type=float, default=0.0, help='the fake server latency in seconds')
+    parser.add_argument('--throttle-every', type=int, default=None, help='answer every n-th call with a 429')
+    parser.add_argument('--retry-after', type=float, default=0.01, help='the retry-after of a 429 in seconds')
+    parser.add_argument('--response-bytes', type=int, default=0, help='pad JSON results to this size')
+    parser.add_argument('--image-bytes', type=int, default=64 * 1024, help='the size of the image sent')
+    parser.add_argument('--scenario', action='append', help='run only this scenario, may be repeated')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='log the retries of throttled calls')
+    options = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.WARNING if options.verbose else logging.ERROR)
+
+    results = run(options.concurrency, options.calls, options.latency, options.throttle_every, options.retry_after,
+                  options.response_bytes, options.image_bytes, options.scenario)
+    if options.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _pad(body, size):
+    """Pads a JSON result with filler so that it is at least size bytes when encoded"""
+    target = body[0] if isinstance(body, list) and body else body
+    if isinstance(target, dict):
+        missing = size - len(json.dumps(body))
+        if missing > 0:
+            target['padding'] = 'x' * missing
+    return body
+
+
+def _face(faceId=None):
+    return {
+        'faceId': faceId or str(uuid.uuid4()),
+        'faceRectangle': {'top': 10, 'left': 10, 'width': 100, 'height': 100}
+    }
+
+
+class FakeOxfordServer(object):
+    """A local stand-in for the Project Oxford service, serving the detect, analyze, ocr, thumbnail,
+    recognize, identify, person group and person endpoints from memory. Point clients at it with
+    ClientContext(baseUrl=server.url). Every response can be delayed, padded to a size, and every
+    n-th call can be throttled with a 429 and a retry-after header."""
+
+    def __init__(self, latencySeconds=0.0, throttleEvery=None, retryAfterSeconds=0.01, responseBytes=0,
+                 thumbnailBytes=4096, facesPerImage=1, host='127.0.0.1', port=0):
+        """Initializes a new instance of the class.
+        Args:
+            latencySeconds (float). how long every call takes.
+            throttleEvery (int). Optional. answer every n-th call with a 429.
+            retryAfterSeconds (float). the retry-after of a 429.
+            responseBytes (int). pad JSON results to at least this many bytes.
+            thumbnailBytes (int). the size of a thumbnail.
+            facesPerImage (int). the number of faces detected in every image.
+            host (str). the address to listen on.
+            port (int). the port to listen on, 0 for any free port.
+        """
+        self.latencySeconds = latencySeconds
+        self.throttleEvery = throttleEvery
+        self.retryAfterSeconds = retryAfterSeconds
+        self.responseBytes = responseBytes
+        self.thumbnailBytes = thumbnailBytes
+        self.facesPerImage = facesPerImage
+        self.groups = {}
+        self.stats = {'calls': 0, 'throttled': 0, 'requestBytes': 0}
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _handler(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base url to give clients, see :class:`ClientContext`."""
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        """Starts serving on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-oxford-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *error):
+        self.stop()
+
+    def handle(self, method, path, query, body):
+        """Answers a call.
+        Returns:
+            tuple. (status, headers, body), body being JSON, bytes or None
+        """
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['requestBytes'] += len(body)
+            throttled = self.throttleEvery and self.stats['calls'] % self.throttleEvery == 0
+            if throttled:
+                self.stats['throttled'] += 1
+
+        if self.latencySeconds:
+            time.sleep(self.latencySeconds)
+        if throttled:
+            return 429, {'retry-after': str(self.retryAfterSeconds)}, {'error': {'code': 'RateLimitExceeded', 'message': 'Rate limit is exceeded.'}}
+
+        parts = [part for part in path.split('/') if part]
+        service, resource = parts[0], parts[2:]
+        request = json.loads(body.decode('utf-8')) if body and body[:1] == b'{' else {}
+
+        if service == 'vision' and resource == ['thumbnails']:
+            return 200, {'content-type': 'image/jpeg'}, b'\xff' * self.thumbnailBytes
+        if service == 'vision' and resource == ['analyses']:
+            return self._json({'categories': [{'name': 'people_', 'score': 0.9}], 'requestId': str(uuid.uuid4())})
+        if service == 'vision' and resource == ['ocr']:
+            return self._json({'language': 'en', 'orientation': 'Up', 'regions': [{'boundingBox': '0,0,10,10', 'lines': []}]})
+        if service == 'emotion' and resource == ['recognize']:
+            return self._json([{'faceRectangle': _face()['faceRectangle'], 'scores': {'happiness': 0.9, 'neutral': 0.1}}])
+        if service == 'face' and resource == ['detections']:
+            faces = [_face() for _ in range(self.facesPerImage)]
+            if query.get('analyzesAge') == ['true']:
+                for face in faces:
+                    face.setdefault('attributes', {})['age'] = 30
+            return self._json(faces)
+        if service == 'face' and resource == ['identifications']:
+            return self._json([{'faceId': faceId, 'candidates': [{'personId': 'person-1', 'confidence': 0.9}]} for faceId in request.get('faceIds', [])])
+        if service == 'face' and resource[:1] == ['persongroups']:
+            return self._personGroups(method, resource[1:], request)
+        return 404, {}, {'error': {'code': 'NotFound', 'message': 'Not found.'}}
+
+    def _json(self, body, status=200):
+        return status, {'content-type': 'application/json; charset=utf-8'}, _pad(body, self.responseBytes)
+
+    def _personGroups(self, method, resource, request):
+        with self._lock:
+            if not resource:
+                return self._json([dict(group['group']) for group in self.groups.values()])
+
+            groupId = resource[0]
+            group = self.groups.get(groupId)
+            if len(resource) == 1 and method == 'PUT':
+                self.groups[groupId] = {'group': dict(request, personGroupId=groupId), 'persons': {}}
+                return 200, {'content-length': '0'}, None
+            if group is None:
+                return 404, {}, {'error': {'code': 'PersonGroupNotFound', 'message': 'Person group not found.'}}
+            if len(resource) == 1:
+                if method == 'DELETE':
+                    del self.groups[groupId]
+                    return 200, {'content-length': '0'}, None
+                if method == 'PATCH':
+                    group['group'].update(request)
+                    return 200, {'content-length': '0'}, None
+                return self._json(dict(group['group']))
+            if resource[1] == 'training':
+                return self._json({'status': 'succeeded', 'startTime': '2015-10-01T00:00:00', 'endTime': '2015-10-01T00:00:01'})
+
+            persons = group['persons']
+            if len(resource) == 2:
+                if method == 'POST':
+                    personId = str(uuid.uuid4())
+                    persons[personId] = dict(request, personId=personId, faceIds=[])
+                    return self._json({'personId': personId})
+                return self._json([dict(person) for person in persons.values()])
+            person = persons.get(resource[2])
+            if person is None:
+                return 404, {}, {'error': {'code': 'PersonNotFound', 'message': 'Person not found.'}}
+            if len(resource) == 5:
+                faceId = resource[4]
+                if method == 'PUT' and faceId not in person['faceIds']:
+                    person['faceIds'].append(faceId)
+                elif method == 'DELETE' and faceId in person['faceIds']:
+                    person['faceIds'].remove(faceId)
+                elif method == 'GET':
+                    return self._json({'faceId': faceId, 'userData': request.get('userData')})
+                return 200, {'content-length': '0'}, None
+            if method == 'DELETE':
+                del persons[resource[2]]
+                return 200, {'content-length': '0'}, None
+            if method == 'PATCH':
+                person.update(request)
+                return 200, {'content-length': '0'}, None
+            return self._json(dict(person))
+
+
+def _handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body are separate writes, keep them from waiting on delayed acks
+
+        def log_message(self, *args):
+            pass
+
+        def _readBody(self):
+            if self.headers.get('transfer-encoding', '').lower() == 'chunked':
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                    chunk = self.rfile.read(size)
+                    self.rfile.readline()
+                    if size == 0:
+                        return b''.join(chunks)
+                    chunks.append(chunk)
+            return self.rfile.read(int(self.headers.get('content-length') or 0))
+
+        def _answer(self):
+            url = urlparse(self.path)
+            status, headers, body = server.handle(self.command, url.path, parse_qs(url.query), self._readBody())
+            if body is not None and not isinstance(body, bytes):
+                body = json.dumps(body).encode('utf-8')
+                headers.setdefault('content-type', 'application/json; charset=utf-8')
+            body = body or b''
+            self.send_response(status)
+            for name, value in headers.items():
+                if name != 'content-length':
+                    self.send_header(name, value)
+            self.send_header('content-length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _answer
+
+    return Handler
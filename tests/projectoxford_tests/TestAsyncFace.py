@@ -0,0 +1,113 @@
+import array
+import asyncio
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.AsyncFace import AsyncFace
+from projectoxford.AsyncPerson import AsyncPerson
+from projectoxford.AsyncPersonGroup import AsyncPersonGroup
+from projectoxford.ClientContext import ClientContext
+from projectoxford.RetryPolicy import RetryPolicy
+from tests.benchmarks.FakeOxfordServer import FakeOxfordServer
+
+class TestAsyncFace(unittest.TestCase):
+    '''Tests the project oxford asyncio face API self.client'''
+
+    @classmethod
+    def setUpClass(cls):
+        # set up self.client for tests
+        cls.context = ClientContext()
+        cls.client = AsyncFace(os.environ['OXFORD_FACE_API_KEY'], cls.context)
+        cls.localFilePrefix = os.path.join(rootDirectory, 'tests', 'images')
+
+    def _run(self, awaitable):
+        async def runAndClose():
+            try:
+                return await awaitable
+            finally:
+                await self.context.closeAsync()
+
+        return asyncio.get_event_loop().run_until_complete(runAndClose())
+
+    def test_async_face_constructs_async_sub_clients(self):
+        self.assertIsInstance(self.client.person, AsyncPerson)
+        self.assertIsInstance(self.client.personGroup, AsyncPersonGroup)
+        self.assertIs(self.client.person.context, self.context)
+
+    def test_async_face_detect_file(self):
+        detectResult = self._run(self.client.detect({
+            'path': os.path.join(self.localFilePrefix, 'face1.jpg'),
+            'analyzesAge': True
+        }))
+        self.assertIsInstance(detectResult[0]['faceId'], object, 'face ID is returned')
+        self.assertIsInstance(detectResult[0]['attributes']['age'], int, 'age is returned')
+
+    def test_async_face_detect_throws_invalid_options(self):
+        self.assertRaises(Exception, self.client.detect, {})
+
+class TestAsyncUploads(unittest.TestCase):
+    '''Tests the asyncio clients' uploads against the local stand-in server'''
+
+    def setUp(self):
+        self.server = FakeOxfordServer().start()
+        self.context = ClientContext(baseUrl=self.server.url, retryPolicy=RetryPolicy(backoffBase=0, backoffMax=0))
+        self.client = AsyncFace('key', self.context)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _run(self, awaitable):
+        async def runAndClose():
+            try:
+                return await awaitable
+            finally:
+                await self.context.closeAsync()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(runAndClose())
+        finally:
+            loop.close()
+
+    def test_chunk_iterators_are_streamed(self):
+        chunks = [b'\xff' * 1000, b'\xd8' * 500, b'\x00' * 24]
+        faces = self._run(self.client.detect({'stream': iter(chunks)}))
+        self.assertEqual(len(faces), 1)
+        self.assertEqual(self.server.stats['requestBytes'], 1524)
+
+    def test_bulk_enroll_adopts_persons_by_name(self):
+        async def enroll():
+            await self.client.personGroup.create('group', 'Group')
+            alice = await self.client.person.create('group', [], 'alice')
+            result = await self.client.bulkEnroll('group', {'alice': [{'url': 'a1'}], 'bob': [{'url': 'b1'}, {'url': 'b2'}]})
+            return alice, result
+
+        alice, result = self._run(enroll())
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(result['training']['status'], 'succeeded')
+        self.assertEqual(result['persons']['alice'], {'personId': alice['personId'], 'faces': 1, 'noFace': []})
+        self.assertEqual(result['persons']['bob']['faces'], 2)
+        self.assertEqual(len(self.server.groups['group']['persons']), 2)
+
+    def test_reconcile_applies_the_plan(self):
+        desired = {'name': 'Staff', 'persons': {'alice': {'userData': 'sales', 'faces': [{'url': 'a1'}, {'url': 'a2'}]}}}
+
+        async def reconcile():
+            await self.client.personGroup.create('group', 'Group')
+            await self.client.person.create('group', [], 'bob')
+            return await self.client.reconcile('group', desired)
+
+        result = self._run(reconcile())
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(self.server.groups['group']['group']['name'], 'Staff')
+        persons = list(self.server.groups['group']['persons'].values())
+        self.assertEqual([(person['name'], person['userData'], len(person['faceIds'])) for person in persons], [('alice', 'sales', 2)])
+
+    def test_memoryviews_are_sent_whole(self):
+        self._run(self.client.detect({'stream': memoryview(array.array('i', [1, 2, 3]))}))
+        self.assertEqual(self.server.stats['requestBytes'], 12)
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.AsyncPerson import AsyncPerson
+from projectoxford.ClientContext import ClientContext
+from projectoxford.SingleFlight import SingleFlight
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    '''Tests the coalescing of identical asyncio calls in flight'''
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.context = ClientContext(singleFlight=self.flight)
+
+    def test_identical_async_calls_are_sent_once(self):
+        client = AsyncPerson('key', self.context)
+        client.context.asyncSession = lambda: None
+        sent = []
+
+        async def send(concurrency, session, method, url, **kwargs):
+            sent.append(url)
+            await asyncio.sleep(0.01)
+            return 200, {'content-type': 'application/json'}, b'{"name": "alice"}'
+
+        client._send = send
+
+        async def getMany():
+            return await asyncio.gather(*[client.get('group', 'alice') for _ in range(3)])
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(getMany())
+        finally:
+            loop.close()
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(results, [{'name': 'alice'}] * 3)
+        self.assertEqual(len(set(id(result) for result in results)), 3)
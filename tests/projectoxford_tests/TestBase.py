@@ -0,0 +1,61 @@
+import array
+import io
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Base import FileUpload, _isReplayable
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from tests.benchmarks.FakeOxfordServer import FakeOxfordServer
+
+class TestBase(unittest.TestCase):
+    '''Tests the request handling shared by the project oxford API clients'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.localFilePrefix = os.path.join(rootDirectory, 'tests', 'images')
+
+    def setUp(self):
+        self.client = Face('key')
+        self.calls = []
+        self.client._invoke = lambda method, url, **kwargs: self.calls.append(kwargs)
+
+    #
+    # test the upload bodies
+    #
+    def test_path_is_streamed_from_disk(self):
+        path = os.path.join(self.localFilePrefix, 'face1.jpg')
+        self.client.detect({'path': path})
+        data = self.calls[0]['data']
+        self.assertIsInstance(data, FileUpload)
+        with data.open() as file:
+            self.assertEqual(os.fstat(file.fileno()).st_size, os.path.getsize(path))
+
+    def test_missing_path_throws(self):
+        self.assertRaises(Exception, self.client.detect, {'path': os.path.join(self.localFilePrefix, 'missing.jpg')})
+
+    def test_stream_accepts_files_memoryviews_and_chunk_iterators(self):
+        streams = [(io.BytesIO(b'image'), 5), (memoryview(b'image'), 5), (memoryview(array.array('i', [1, 2, 3])), 12), (iter([b'ima', b'ge']), 5)]
+        with FakeOxfordServer() as server:
+            context = ClientContext(baseUrl=server.url)
+            try:
+                client = Face('key', context)
+                for stream, size in streams:
+                    received = server.stats['requestBytes']
+                    client.detect({'stream': stream})
+                    self.assertEqual(server.stats['requestBytes'] - received, size)
+            finally:
+                context.close()
+
+    def test_only_rewindable_bodies_are_retried(self):
+        self.assertTrue(_isReplayable(None))
+        self.assertTrue(_isReplayable(b'image'))
+        self.assertTrue(_isReplayable(memoryview(b'image')))
+        self.assertTrue(_isReplayable(io.BytesIO(b'image')))
+        self.assertTrue(_isReplayable(FileUpload(os.path.join(self.localFilePrefix, 'face1.jpg'))))
+        self.assertFalse(_isReplayable(iter([b'image'])))
@@ -9,6 +9,7 @@ if rootDirectory not in sys.path:
     sys.path.append(rootDirectory)
 
 from projectoxford.Client import Client
+from projectoxford.ClientContext import ClientContext
 
 class TestClient(unittest.TestCase):
     """Tests the project oxford API client"""
@@ -27,3 +28,21 @@ class TestClient(unittest.TestCase):
     def test_face_return_throws_for_bad_request(self):
         client = Client.face('key')
         self.assertRaises(Exception, client.detect, {'url': 'http://bing.com'});
+
+    def test_clients_share_default_context(self):
+        face = Client.face('key')
+        vision = Client.vision('key')
+        self.assertIs(face.context, ClientContext.default())
+        self.assertIs(vision.context, face.context)
+        self.assertIs(face.person.context, face.context)
+        self.assertIs(face.personGroup.context, face.context)
+
+    def test_clients_use_provided_context(self):
+        context = ClientContext(poolMaxSize=4)
+        face = Client.face('key', context)
+        emotion = Client.emotion('key', context)
+        self.assertIs(face.context, context)
+        self.assertIs(face.personGroup.context, context)
+        self.assertIs(emotion.context, context)
+        self.assertIs(context.session, context.session)
+        context.close()
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext, endpointName
+from projectoxford.ConcurrencyLimiter import ConcurrencyLimiter
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    '''Tests the adaptive concurrency limiter'''
+
+    def test_concurrency_limiter_blocks_at_limit(self):
+        limiter = ConcurrencyLimiter(initialLimit=2)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.tryAcquire())
+        self.assertFalse(limiter.acquire(timeout=0.01))
+
+        released = threading.Timer(0.05, limiter.release, kwargs={'latency': 0.1})
+        released.start()
+        self.assertTrue(limiter.acquire(timeout=1))
+        released.join()
+
+    def test_concurrency_limiter_grows_while_latency_is_stable(self):
+        limiter = ConcurrencyLimiter(initialLimit=2, maxLimit=10)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(latency=0.1)
+        self.assertGreater(limiter.limit, 2)
+        self.assertLessEqual(limiter.limit, 10)
+
+    def test_concurrency_limiter_backs_off_on_throttle(self):
+        limiter = ConcurrencyLimiter(initialLimit=8, minLimit=2)
+        limiter.acquire()
+        limiter.release(latency=0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.state()['throttles'], 1)
+
+    def test_concurrency_limiter_backs_off_on_latency_spike(self):
+        limiter = ConcurrencyLimiter(initialLimit=8, latencyTolerance=2)
+        limiter.acquire()
+        limiter.release(latency=0.1)
+        limiter.acquire()
+        limiter.release(latency=1.0)
+        state = limiter.state()
+        self.assertEqual(state['limit'], 4)
+        self.assertEqual(state['latencySpikes'], 1)
+        self.assertEqual(state['inFlight'], 0)
+
+    def test_concurrency_limiter_baseline_follows_a_lasting_rise(self):
+        limiter = ConcurrencyLimiter(initialLimit=8, latencyTolerance=2)
+        limiter.acquire()
+        limiter.release(latency=0.1)
+        for _ in range(50):
+            limiter.acquire()
+            limiter.release(latency=0.5)
+        spikes = limiter.state()['latencySpikes']
+        self.assertGreater(limiter.state()['baselineLatency'], 0.25)
+        limiter.acquire()
+        limiter.release(latency=0.5)
+        self.assertEqual(limiter.state()['latencySpikes'], spikes)
+
+    def test_concurrency_limiter_skips_closed_loops(self):
+        limiter = ConcurrencyLimiter(initialLimit=1)
+        limiter.acquire()
+
+        def closed():
+            raise RuntimeError('Event loop is closed')
+
+        notified = []
+        self.assertFalse(limiter.tryAcquire(closed))
+        self.assertFalse(limiter.tryAcquire(lambda: notified.append(limiter.tryAcquire())))
+        limiter.release(latency=0.1)
+        self.assertEqual(notified, [True], 'waiters are notified outside the lock')
+
+    def test_concurrency_limiter_notifies_waiters(self):
+        limiter = ConcurrencyLimiter(initialLimit=1)
+        limiter.acquire()
+        notified = []
+        self.assertFalse(limiter.tryAcquire(lambda: notified.append(True)))
+        limiter.release(latency=0.1)
+        self.assertEqual(notified, [True])
+
+    def test_context_keeps_a_limiter_per_endpoint(self):
+        context = ClientContext(adaptiveConcurrency={'initialLimit': 3})
+        detect = context.concurrencyLimiter('https://api.projectoxford.ai/face/v0/detections')
+        ocr = context.concurrencyLimiter('https://api.projectoxford.ai/vision/v1/ocr')
+        self.assertIsNot(detect, ocr)
+        self.assertIs(detect, context.concurrencyLimiter('https://api.projectoxford.ai/face/v0/detections'))
+        self.assertEqual(sorted(context.concurrencyState().keys()), ['face/detections', 'vision/ocr'])
+        self.assertEqual(context.concurrencyState()['vision/ocr']['limit'], 3)
+        self.assertIsNone(ClientContext().concurrencyLimiter('https://api.projectoxford.ai/vision/v1/ocr'))
+
+    def test_endpoint_name_ignores_version_and_ids(self):
+        self.assertEqual(endpointName('https://api.projectoxford.ai/face/v0/persongroups/group/persons/id'), 'face/persongroups')
+        self.assertEqual(endpointName('https://api.projectoxford.ai/emotion/v1.0/recognize'), 'emotion/recognize')
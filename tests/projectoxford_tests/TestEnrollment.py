@@ -0,0 +1,114 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.EnrollmentCheckpoint import EnrollmentCheckpoint, largestFace
+from projectoxford.Face import Face
+
+class TestEnrollment(unittest.TestCase):
+    '''Tests the resumable bulk enrollment'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpointPath = os.path.join(self.directory, 'enrollment.jsonl')
+        self.client = Face('key')
+        self.calls = []
+        self.failFor = set()
+
+        def detect(options):
+            self.calls.append(('detect', options['url']))
+            if 'empty' in options['url']:
+                return []
+            return [{'faceId': 'face-' + options['url'], 'faceRectangle': {'width': 10, 'height': 10}}]
+
+        def create(personGroupId, faceIds, name, userData=None):
+            self.calls.append(('create', name))
+            return {'personId': 'id-' + name}
+
+        def addFace(personGroupId, personId, faceId, userData=None):
+            if faceId in self.failFor:
+                raise Exception('status 500: try again')
+            self.calls.append(('addFace', faceId))
+
+        self.client.detect = detect
+        self.client.person.create = create
+        self.client.person.addFace = addFace
+        self.client.person.list = lambda personGroupId: []
+        self.client.personGroup.trainAndPollForCompletion = lambda personGroupId: self.calls.append(('train', personGroupId)) or {'status': 'succeeded'}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_enrolls_and_trains_once(self):
+        persons = {
+            'alice': [{'url': 'a1'}, {'url': 'a2'}],
+            'bob': [{'url': 'b1'}, {'url': 'empty'}]
+        }
+        result = self.client.bulkEnroll('group', persons, self.checkpointPath, concurrency=2)
+
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(result['training'], {'status': 'succeeded'})
+        self.assertEqual(result['persons']['alice'], {'personId': 'id-alice', 'faces': 2, 'noFace': []})
+        self.assertEqual(result['persons']['bob'], {'personId': 'id-bob', 'faces': 1, 'noFace': ['url:empty']})
+        self.assertEqual([call for call in self.calls if call[0] == 'train'], [('train', 'group')])
+
+    def test_resumes_without_repeating_calls(self):
+        persons = {'alice': [{'url': 'a1'}, {'url': 'a2'}]}
+        self.failFor.add('face-a2')
+        result = self.client.bulkEnroll('group', persons, self.checkpointPath, train=False)
+        self.assertEqual(list(result['errors']), ['alice'])
+
+        self.failFor.clear()
+        self.calls = []
+        result = self.client.bulkEnroll('group', persons, self.checkpointPath, train=False)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(self.calls, [('addFace', 'face-a2')])
+        self.assertEqual(result['persons']['alice']['faces'], 2)
+
+    def test_adopts_persons_created_but_not_recorded(self):
+        checkpoint = EnrollmentCheckpoint(self.checkpointPath)
+        checkpoint.record('bob', personId='id-bob')
+        checkpoint.close()
+
+        self.client.person.list = lambda personGroupId: [{'personId': 'existing-alice', 'name': 'alice'}]
+        result = self.client.bulkEnroll('group', {'alice': [{'url': 'a1'}]}, self.checkpointPath, train=False)
+        self.assertNotIn(('create', 'alice'), self.calls)
+        self.assertEqual(result['persons']['alice']['personId'], 'existing-alice')
+
+    def test_adopts_persons_already_in_the_group_by_name_only(self):
+        self.client.person.list = lambda personGroupId: [
+            {'personId': 'existing-alice', 'name': 'alice'},
+            {'personId': 'unrelated', 'name': 'Bob Smith', 'userData': 'bob'}
+        ]
+        result = self.client.bulkEnroll('group', {'alice': [{'url': 'a1'}], 'bob': [{'url': 'b1'}]}, self.checkpointPath, train=False)
+        self.assertEqual([call for call in self.calls if call[0] == 'create'], [('create', 'bob')])
+        self.assertEqual(result['persons']['alice']['personId'], 'existing-alice')
+        self.assertEqual(result['persons']['bob']['personId'], 'id-bob')
+
+    def test_checkpoint_ignores_a_partial_record(self):
+        with open(self.checkpointPath, 'wb') as file:
+            file.write(b'{"name": "alice", "personId": "id-alice"}\n{"name": "bob", "perso')
+
+        checkpoint = EnrollmentCheckpoint(self.checkpointPath)
+        self.assertEqual(checkpoint.person('alice')['personId'], 'id-alice')
+        self.assertIsNone(checkpoint.person('bob')['personId'])
+        checkpoint.record('bob', personId='id-bob')
+        checkpoint.close()
+
+        checkpoint = EnrollmentCheckpoint(self.checkpointPath)
+        self.assertEqual(checkpoint.person('bob')['personId'], 'id-bob')
+        checkpoint.close()
+
+    def test_largest_face_is_chosen(self):
+        faces = [
+            {'faceId': 'small', 'faceRectangle': {'width': 10, 'height': 10}},
+            {'faceId': 'large', 'faceRectangle': {'width': 50, 'height': 40}}
+        ]
+        self.assertEqual(largestFace(faces), 'large')
+        self.assertIsNone(largestFace([]))
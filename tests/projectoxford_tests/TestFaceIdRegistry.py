@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford import FaceIdRegistry as registryModule
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from projectoxford.FaceIdRegistry import FaceIdRegistry
+from projectoxford.ResponseCache import ResponseCache
+
+class TestFaceIdRegistry(unittest.TestCase):
+    '''Tests the reuse of detected faceIds'''
+
+    def setUp(self):
+        self.registry = FaceIdRegistry()
+        self.client = Face('key', ClientContext(faceIdRegistry=self.registry))
+        self.calls = []
+
+        def invoke(method, url, json=None, data=None, headers={}, params={}, **kwargs):
+            self.calls.append(dict(params))
+            attributes = {}
+            if params['analyzesAge'] == 'true':
+                attributes['age'] = 30
+            if params['analyzesGender'] == 'true':
+                attributes['gender'] = 'female'
+            return [{'faceId': 'face-' + str(len(self.calls)), 'faceRectangle': {'width': 10, 'height': 10}, 'attributes': attributes}]
+
+        self.client._invoke = invoke
+
+    def test_detecting_again_reuses_the_faceids(self):
+        first = self.client.detect({'url': 'http://example.com/a.jpg'})
+        second = self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.detect({'url': 'http://example.com/b.jpg'})[0]['faceId'], 'face-2')
+        self.assertEqual(self.registry.stats(), {'hits': 1, 'misses': 2, 'evictions': 0, 'images': 2})
+
+    def test_fewer_attributes_are_served_from_a_detection_with_more(self):
+        both = self.client.detect({'url': 'http://example.com/a.jpg', 'analyzesAge': True, 'analyzesGender': True})
+        age = self.client.detect({'url': 'http://example.com/a.jpg', 'analyzesAge': True})
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(age[0]['faceId'], both[0]['faceId'])
+        self.assertEqual(age[0]['attributes'], {'age': 30})
+        self.assertEqual(both[0]['attributes'], {'age': 30, 'gender': 'female'})
+
+    def test_more_attributes_detect_again_and_supersede(self):
+        self.client.detect({'url': 'http://example.com/a.jpg', 'analyzesAge': True})
+        both = self.client.detect({'url': 'http://example.com/a.jpg', 'analyzesAge': True, 'analyzesGender': True})
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.client.detect({'url': 'http://example.com/a.jpg', 'analyzesAge': True})[0]['faceId'], both[0]['faceId'])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_faceids_are_forgotten_before_they_expire(self):
+        now = [1000.0]
+        monotonic = registryModule._monotonic
+        registryModule._monotonic = lambda: now[0]
+        try:
+            self.client.detect({'url': 'http://example.com/a.jpg'})
+            now[0] += 23 * 60 * 60 - 1
+            self.client.detect({'url': 'http://example.com/a.jpg'})
+            self.assertEqual(len(self.calls), 1)
+            now[0] += 1
+            self.assertEqual(self.client.detect({'url': 'http://example.com/a.jpg'})[0]['faceId'], 'face-2')
+        finally:
+            registryModule._monotonic = monotonic
+
+    def test_detections_are_kept_per_subscription_key(self):
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual(self.registry.lookup('other', 'digest', frozenset()), (False, None))
+        self.registry.clear('key')
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_the_registry_is_fed_fresh_detections(self):
+        self.client.context.responseCache = ResponseCache(cacheDetections=True)
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.registry.clear()
+        self.assertEqual(self.client.detect({'url': 'http://example.com/a.jpg'})[0]['faceId'], 'face-2')
+        self.assertEqual(self.client.context.responseCache.stats()['entries'], 0)
+
+    def test_least_recently_used_images_are_forgotten(self):
+        self.registry.maxImages = 1
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.client.detect({'url': 'http://example.com/b.jpg'})
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.registry.stats()['evictions'], 2)
+
+    def test_unhashable_streams_are_detected_every_time(self):
+        self.client.detect({'stream': iter([b'image'])})
+        self.client.detect({'stream': iter([b'image'])})
+        self.assertEqual(len(self.calls), 2)
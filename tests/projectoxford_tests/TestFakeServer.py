@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from projectoxford.RetryPolicy import RetryPolicy
+from projectoxford.Vision import Vision
+from tests.benchmarks import Benchmark
+from tests.benchmarks.FakeOxfordServer import FakeOxfordServer
+
+class TestFakeServer(unittest.TestCase):
+    '''Tests the clients against the local stand-in server used by the benchmarks'''
+
+    def setUp(self):
+        self.server = FakeOxfordServer().start()
+        self.context = ClientContext(baseUrl=self.server.url, retryPolicy=RetryPolicy(backoffBase=0, backoffMax=0))
+
+    def tearDown(self):
+        self.context.close()
+        self.server.stop()
+
+    def test_base_url_moves_calls_to_another_server(self):
+        self.assertEqual(self.context.resolve('https://api.projectoxford.ai/face/v0/detections'), self.server.url + '/face/v0/detections')
+        self.assertEqual(ClientContext().resolve('https://api.projectoxford.ai/face/v0/detections'), 'https://api.projectoxford.ai/face/v0/detections')
+
+    def test_clients_run_against_the_fake_server(self):
+        face = Face('key', self.context)
+        faces = face.detect({'stream': b'image', 'analyzesAge': True})
+        self.assertEqual(faces[0]['attributes']['age'], 30)
+        self.assertEqual(len(Vision('key', self.context).thumbnail({'stream': b'image'})), self.server.thumbnailBytes)
+
+        face.personGroup.create('group', 'Group')
+        personId = face.person.create('group', [], 'alice')['personId']
+        self.assertEqual(face.person.get('group', personId)['name'], 'alice')
+        self.assertIsNone(face.person.get('group', 'missing'))
+
+    def test_throttled_calls_are_retried_after_the_retry_after(self):
+        self.server.throttleEvery = 2
+        vision = Vision('key', self.context)
+        for _ in range(3):
+            self.assertIn('regions', vision.ocr({'stream': b'image'}))
+        self.assertEqual(self.server.stats['throttled'], 2)
+
+    def test_responses_are_padded_to_the_payload_size(self):
+        self.server.responseBytes = 2048
+        self.assertGreaterEqual(len(Vision('key', self.context).analyze({'stream': b'image'})['padding']), 1900)
+
+    def test_benchmark_reports_every_scenario(self):
+        results = Benchmark.run(concurrencyLevels=(2,), calls=4, imageBytes=16)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result['errors'] == 0 and result['p99'] >= result['p50'] for result in results))
@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Face import Face
+from projectoxford.IdentifyBatcher import IdentifyBatcher
+from projectoxford.OxfordError import OxfordError
+
+class TestIdentifyBatcher(unittest.TestCase):
+    '''Tests the micro-batching of concurrent identify calls'''
+
+    def setUp(self):
+        self.client = Face('key')
+        self.calls = []
+        self.lock = threading.Lock()
+
+        def identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned):
+            with self.lock:
+                self.calls.append((personGroupId, list(faces), maxNumOfCandidatesReturned))
+            return [{'faceId': faceId, 'candidates': [{'personId': 'person-' + faceId}]} for faceId in faces]
+
+        self.client._identifyChunk = identifyChunk
+
+    def identifyConcurrently(self, requests):
+        results = [None] * len(requests)
+        barrier = threading.Event()
+
+        def run(index, personGroupId, faces):
+            barrier.wait()
+            results[index] = self.client.identify(personGroupId, faces)
+
+        threads = [threading.Thread(target=run, args=(index,) + request) for index, request in enumerate(requests)]
+        for thread in threads:
+            thread.start()
+        barrier.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_request(self):
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=0.2)
+        requests = [('group', ['face{0}'.format(index)]) for index in range(5)]
+        results = self.identifyConcurrently(requests)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sorted(self.calls[0][1]), ['face{0}'.format(index) for index in range(5)])
+        for (_, faces), result in zip(requests, results):
+            self.assertEqual([item['faceId'] for item in result], faces)
+
+    def test_batches_are_split_by_group_and_size(self):
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=0.2, maxBatchSize=4)
+        requests = [('group', ['face{0}'.format(index)]) for index in range(8)]
+        requests.append(('other', ['face0']))
+        self.identifyConcurrently(requests)
+
+        self.assertTrue(all(len(faces) <= 4 for _, faces, _ in self.calls))
+        self.assertEqual(sorted(faceId for group, faces, _ in self.calls if group == 'group' for faceId in faces),
+                         sorted('face{0}'.format(index) for index in range(8)))
+        self.assertEqual([faces for group, faces, _ in self.calls if group == 'other'], [['face0']])
+
+    def test_duplicate_faces_are_sent_once(self):
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=0.2)
+        results = self.identifyConcurrently([('group', ['a', 'b']), ('group', ['b', 'c'])])
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sorted(self.calls[0][1]), ['a', 'b', 'c'])
+        self.assertEqual([item['faceId'] for item in results[1]], ['b', 'c'])
+
+    def test_errors_reach_every_caller(self):
+        def fail(personGroupId, faces, maxNumOfCandidatesReturned):
+            raise Exception('status 500: boom')
+
+        self.client._identifyChunk = fail
+        batcher = IdentifyBatcher(self.client, windowSeconds=0)
+        self.assertRaises(Exception, batcher.identify, 'group', ['a'])
+
+    def test_a_rejected_batch_only_fails_the_bad_caller(self):
+        def identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned):
+            with self.lock:
+                self.calls.append((personGroupId, list(faces), maxNumOfCandidatesReturned))
+            if 'expired' in faces:
+                raise OxfordError('status 400: {"code": "BadArgument", "message": "Face ID is invalid."}', 400)
+            return [{'faceId': faceId, 'candidates': []} for faceId in faces]
+
+        self.client._identifyChunk = identifyChunk
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=0.2)
+        results, errors = [None] * 3, [None] * 3
+        requests = [['a'], ['expired'], ['b']]
+
+        def identify(index):
+            try:
+                results[index] = self.client.identify('group', requests[index])
+            except Exception as error:
+                errors[index] = error
+
+        threads = [threading.Thread(target=identify, args=(index,)) for index in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.calls), 4, 'one shared request, then one per caller')
+        self.assertEqual([item['faceId'] for item in results[0]], ['a'])
+        self.assertEqual([item['faceId'] for item in results[2]], ['b'])
+        self.assertIsNone(errors[0])
+        self.assertIn('status 400', str(errors[1]))
+        self.assertIsNone(errors[2])
+
+    def test_a_throttled_batch_is_not_resent_per_caller(self):
+        def identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned):
+            with self.lock:
+                self.calls.append((personGroupId, list(faces), maxNumOfCandidatesReturned))
+            raise OxfordError('retry count (5) exceeded: {}', 429)
+
+        self.client._identifyChunk = identifyChunk
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=0.2)
+        errors = [None] * 2
+
+        def identify(index):
+            try:
+                self.client.identify('group', ['face{0}'.format(index)])
+            except Exception as error:
+                errors[index] = error
+
+        threads = [threading.Thread(target=identify, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([error.status for error in errors], [429, 429])
+
+    def test_full_batches_bypass_the_window(self):
+        self.client.identifyBatcher = IdentifyBatcher(self.client, windowSeconds=60)
+        faceIds = ['face{0}'.format(index) for index in range(10)]
+        result = self.client.identify('group', faceIds)
+        self.assertEqual([item['faceId'] for item in result], faceIds)
+        self.assertEqual(len(self.calls), 1)
@@ -0,0 +1,112 @@
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from projectoxford.IdentifyCache import IdentifyCache
+
+class TestIdentifyCache(unittest.TestCase):
+    '''Tests the caching of identification results until their person group is trained'''
+
+    def setUp(self):
+        self.cache = IdentifyCache()
+        self.client = Face('key', ClientContext(identifyCache=self.cache))
+        self.identified = []
+        self.training = {'status': 'succeeded', 'endTime': '2015-10-01T00:00:00'}
+
+        def invoke(method, url, json=None, headers={}, **kwargs):
+            if url.endswith('/training'):
+                return dict(self.training)
+            if method == 'delete':
+                return None
+            self.identified.append(list(json['faceIds']))
+            return [{'faceId': faceId, 'candidates': [{'personId': 'person-' + faceId}]} for faceId in json['faceIds']]
+
+        self.client._invoke = invoke
+        self.client.personGroup._invoke = invoke
+
+    def test_only_faces_without_a_result_are_identified(self):
+        self.client.identify('group', ['a', 'b'])
+        result = self.client.identify('group', ['c', 'b', 'a'])
+        self.assertEqual(self.identified, [['a', 'b'], ['c']])
+        self.assertEqual([face['faceId'] for face in result], ['c', 'b', 'a'])
+        self.client.identify('group', ['a', 'c'])
+        self.assertEqual(len(self.identified), 2)
+
+    def test_results_are_kept_per_group_and_number_of_candidates(self):
+        self.client.identify('group', ['a'])
+        self.client.identify('group', ['a'], maxNumOfCandidatesReturned=3)
+        self.client.identify('other', ['a'])
+        self.assertEqual(len(self.identified), 3)
+
+    def test_a_training_started_through_a_client_invalidates_its_group(self):
+        self.client.identify('group', ['a'])
+        self.client.identify('other', ['a'])
+        self.training['status'] = 'running'
+        self.client.personGroup.trainingStart('group')
+
+        self.client.identify('group', ['a'])
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 4, 'results are not cached while the group trains')
+
+        self.training = {'status': 'succeeded', 'endTime': '2015-10-02T00:00:00'}
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.client.identify('group', ['a'])
+        self.client.identify('other', ['a'])
+        self.assertEqual(len(self.identified), 5)
+
+    def test_a_newer_training_timestamp_invalidates_the_group(self):
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 1)
+
+        self.training['endTime'] = '2015-10-02T00:00:00'
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 2)
+
+    def test_a_status_without_a_timestamp_keeps_the_group_until_it_changes(self):
+        self.training = {'status': 'succeeded'}
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 1)
+
+        self.training = {'status': 'failed'}
+        self.client.personGroup.trainingStatus('group')
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 2)
+
+    def test_callers_get_copies_of_cached_results(self):
+        self.client.identify('group', ['a'])[0]['candidates'].pop()
+        self.client.identify('group', ['a'])[0]['candidates'].pop()
+        self.assertEqual(self.client.identify('group', ['a'])[0]['candidates'], [{'personId': 'person-a'}])
+        self.assertEqual(len(self.identified), 1)
+
+    def test_results_identified_across_an_invalidation_are_not_cached(self):
+        generation, _, missing = self.cache.split('key', 'group', ['a'], 1)
+        self.cache.invalidate('key', 'group')
+        self.cache.store('key', 'group', 1, generation, [{'faceId': 'a', 'candidates': []}])
+        self.assertEqual(self.cache.split('key', 'group', ['a'], 1)[2], ['a'])
+
+    def test_revalidation_checks_the_training_status(self):
+        self.cache.revalidateSeconds = 0
+        self.client.identify('group', ['a'])
+        self.training['endTime'] = '2015-10-02T00:00:00'
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 2)
+
+    def test_deleting_a_group_invalidates_it(self):
+        self.client.identify('group', ['a'])
+        self.client.personGroup.delete('group')
+        self.client.identify('group', ['a'])
+        self.assertEqual(len(self.identified), 2)
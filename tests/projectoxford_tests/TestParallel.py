@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Face import Face
+from projectoxford.Parallel import imap
+
+class TestParallel(unittest.TestCase):
+    '''Tests the bounded parallel map used by the batch APIs'''
+
+    def test_imap_yields_in_input_order(self):
+        results = list(imap(lambda item: time.sleep(0.01 * (5 - item)) or item * 2, range(5), 3))
+        self.assertEqual(results, [(index, index * 2, None) for index in range(5)])
+
+    def test_imap_unordered_yields_as_completed(self):
+        results = list(imap(lambda item: time.sleep(0.05 * (2 - item)) or item, range(3), 3, ordered=False))
+        self.assertEqual([index for index, _, _ in results], [2, 1, 0])
+
+    def test_imap_reports_errors_per_item(self):
+        def fail_on_odd(item):
+            if item % 2:
+                raise ValueError(item)
+            return item
+
+        results = list(imap(fail_on_odd, range(4), 2))
+        self.assertEqual([result for _, result, _ in results], [0, None, 2, None])
+        self.assertIsInstance(results[1][2], ValueError)
+        self.assertIsNone(results[2][2])
+
+    def test_imap_consumes_input_lazily(self):
+        pulled = []
+
+        def source():
+            for item in range(100):
+                pulled.append(item)
+                yield item
+
+        results = imap(lambda item: item, source(), 4)
+        for _ in range(3):
+            next(results)
+        self.assertLessEqual(len(pulled), 3 + 4)
+        results.close()
+
+    def test_face_detect_many_merges_common_options(self):
+        client = Face('key')
+        calls = []
+        client.detect = lambda options: calls.append(options) or [{'faceId': options['url']}]
+        results = list(client.detectMany([{'url': 'a'}, {'url': 'b'}], concurrency=2, options={'analyzesAge': True}))
+        self.assertEqual([result[0]['faceId'] for _, result, _ in results], ['a', 'b'])
+        self.assertTrue(all(call['analyzesAge'] for call in calls))
+
+    def test_face_identify_splits_long_lists_and_keeps_order(self):
+        client = Face('key')
+        calls = []
+
+        def identifyChunk(personGroupId, faces, maxNumOfCandidatesReturned):
+            calls.append(faces)
+            return [{'faceId': faceId, 'candidates': []} for faceId in faces]
+
+        client._identifyChunk = identifyChunk
+        faceIds = ['face{0}'.format(index) for index in range(25)]
+        result = client.identify('group', faceIds)
+        self.assertEqual([item['faceId'] for item in result], faceIds)
+        self.assertEqual(sorted(len(chunk) for chunk in calls), [5, 10, 10])
+
+    def test_face_sharded_grouping_merges_groups_across_shards(self):
+        client = Face('key')
+        groupings = []
+        person = lambda faceId: faceId.split('-')[0]
+
+        def grouping(faceIds):
+            groupings.append(faceIds)
+            groups = {}
+            for faceId in faceIds:
+                groups.setdefault(person(faceId), []).append(faceId)
+            return {
+                'groups': [faces for faces in groups.values() if len(faces) > 1],
+                'messyGroup': [faces[0] for faces in groups.values() if len(faces) == 1]
+            }
+
+        client.grouping = grouping
+        faceIds = ['a-1', 'a-2', 'b-1', 'c-1', 'a-3', 'b-2', 'd-1', 'e-1', 'e-2']
+        result = client.shardedGrouping(faceIds, shardSize=3)
+
+        self.assertEqual(groupings[:3], [faceIds[0:3], faceIds[3:6], faceIds[6:9]])
+        self.assertTrue(all(len(faces) <= 3 for faces in groupings))
+        self.assertEqual(sorted(sorted(group) for group in result['groups']),
+                         [['a-1', 'a-2', 'a-3'], ['b-1', 'b-2'], ['e-1', 'e-2']])
+        self.assertEqual(len(result['groups'][0]), 3)
+        self.assertEqual(sorted(result['messyGroup']), ['c-1', 'd-1'])
+
+    def test_face_sharded_grouping_merges_with_grouping_calls(self):
+        client = Face('key')
+        groupings = []
+
+        def grouping(faceIds):
+            groupings.append(len(faceIds))
+            groups = {}
+            for faceId in faceIds:
+                groups.setdefault(faceId.split('-')[0], []).append(faceId)
+            return {'groups': [faces for faces in groups.values() if len(faces) > 1], 'messyGroup': []}
+
+        client.grouping = grouping
+        faceIds = ['{0}-{1}'.format(index % 30, index) for index in range(1000)]
+        result = client.shardedGrouping(faceIds)
+
+        self.assertEqual(len(result['groups']), 30)
+        self.assertEqual(sum(len(group) for group in result['groups']), 1000)
+        self.assertEqual(len(groupings), 10 + 3 + 1, 'one round of 300 first faces, then one call for the 30 left')
+        self.assertTrue(all(size <= 100 for size in groupings))
+
+    def test_face_similar_many_merges_top_k(self):
+        client = Face('key')
+        calls = []
+
+        def similar(sourceFace, candidateFaces):
+            calls.append(candidateFaces)
+            return [{'faceId': faceId, 'confidence': int(faceId[4:]) / 1000.0} for faceId in candidateFaces if int(faceId[4:]) % 7 == 0]
+
+        client.similar = similar
+        candidates = ['face{0}'.format(index) for index in range(350)]
+        result = client.similarMany('probe', candidates, topK=3)
+
+        self.assertEqual(sorted(len(chunk) for chunk in calls), [50, 100, 100, 100])
+        self.assertEqual([item['faceId'] for item in result], ['face343', 'face336', 'face329'])
+
+    def test_face_similar_many_stops_early(self):
+        client = Face('key')
+        calls = []
+
+        def similar(sourceFace, candidateFaces):
+            calls.append(candidateFaces)
+            return [{'faceId': faceId, 'confidence': 0.9} for faceId in candidateFaces[:2]]
+
+        client.similar = similar
+        candidates = ['face{0}'.format(index) for index in range(10000)]
+        result = client.similarMany('probe', candidates, topK=4, concurrency=1, stopConfidence=0.8)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([item['faceId'] for item in result], ['face0', 'face1', 'face100', 'face101'])
+
+    def test_face_verify_matrix_deduplicates_pairs(self):
+        client = Face('key')
+        calls = []
+
+        def verify(faceId1, faceId2):
+            calls.append((faceId1, faceId2))
+            return {'isIdentical': faceId1[0] == faceId2[0], 'confidence': 0.9 if faceId1[0] == faceId2[0] else 0.1}
+
+        client.verify = verify
+        result = client.verifyMatrix(['a1', 'a2', 'b1'], pairs=[('a1', 'a2'), ('a2', 'a1'), ('b1', 'a1'), ('b1', 'b1')], dense=False)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(result['edges'], [(0, 1, True, 0.9), (0, 2, False, 0.1)])
+
+        calls[:] = []
+        result = client.verifyMatrix(['a1', 'a2', 'b1'])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(result['isIdentical'], [[True, True, False], [True, True, False], [False, False, True]])
+        self.assertEqual(result['confidence'][2][1], 0.1)
+
+    def test_face_verify_matrix_skips_transitive_pairs(self):
+        client = Face('key')
+        calls = []
+
+        def verify(faceId1, faceId2):
+            calls.append((faceId1, faceId2))
+            return {'isIdentical': faceId1[0] == faceId2[0], 'confidence': 0.9}
+
+        client.verify = verify
+        result = client.verifyMatrix(['a1', 'a2', 'a3', 'a4'], concurrency=1, transitive=True, dense=False)
+
+        self.assertEqual(calls, [('a1', 'a2'), ('a1', 'a3'), ('a1', 'a4')])
+        self.assertEqual([edge[:3] for edge in result['edges']], [(i, j, True) for i in range(4) for j in range(i + 1, 4)])
+        self.assertIsNone(result['edges'][-1][3])
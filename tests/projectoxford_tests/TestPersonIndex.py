@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Person import Person
+from projectoxford.PersonGroup import PersonGroup
+from projectoxford.PersonIndex import PersonIndex
+
+class TestPersonIndex(unittest.TestCase):
+    '''Tests the index of persons by name'''
+
+    def setUp(self):
+        self.context = ClientContext(personIndex=PersonIndex())
+        self.client = Person('key', self.context)
+        self.persons = [{'personId': 'id-alice', 'name': 'alice'}]
+        self.calls = []
+        self.missing = set()
+
+        def invoke(method, url, json=None, headers={}, notFound=None, **kwargs):
+            self.calls.append((method, url.split('/persongroups/')[1]))
+            if url.split('/')[-1] in self.missing:
+                return notFound
+            if method == 'get':
+                return list(self.persons)
+            if method == 'post':
+                return {'personId': 'id-' + json['name']}
+            return None
+
+        self.client._invoke = invoke
+
+    def test_lookup_requires_a_loaded_group(self):
+        index = PersonIndex()
+        self.assertEqual(index.lookup('key', 'group', 'alice'), (False, None))
+        index.load('key', 'group', self.persons)
+        self.assertEqual(index.lookup('key', 'group', 'alice'), (True, self.persons[0]))
+        self.assertEqual(index.lookup('key', 'group', 'bob'), (True, None))
+        self.assertEqual(index.lookup('other', 'group', 'alice'), (False, None))
+
+    def test_groups_expire(self):
+        index = PersonIndex(ttlSeconds=0.05)
+        index.load('key', 'group', self.persons)
+        time.sleep(0.1)
+        self.assertEqual(index.lookup('key', 'group', 'alice'), (False, None))
+
+    def test_renames_and_removals(self):
+        index = PersonIndex()
+        index.load('key', 'group', [{'personId': '1', 'name': 'alice'}, {'personId': '2', 'name': 'alice'}])
+        index.put('key', 'group', {'personId': '1', 'name': 'carol'})
+        self.assertEqual(index.lookup('key', 'group', 'carol')[1]['personId'], '1')
+        self.assertEqual(index.lookup('key', 'group', 'alice')[1]['personId'], '2')
+        index.remove('key', 'group', '2')
+        self.assertEqual(index.lookup('key', 'group', 'alice'), (True, None))
+        index.invalidate('key')
+        self.assertEqual(index.lookup('key', 'group', 'carol'), (False, None))
+
+    def test_create_or_update_lists_the_group_once(self):
+        self.client.createOrUpdate('group', [], 'alice')
+        self.client.createOrUpdate('group', [], 'bob')
+        self.client.createOrUpdate('group', [], 'bob')
+        self.assertEqual(self.calls, [
+            ('get', 'group/persons'),
+            ('patch', 'group/persons/id-alice'),
+            ('post', 'group/persons'),
+            ('patch', 'group/persons/id-bob')
+        ])
+
+    def test_deletes_keep_the_index_in_step(self):
+        self.client.list('group')
+        self.client.delete('group', 'id-alice')
+        self.client.createOrUpdate('group', [], 'alice')
+        self.assertEqual(self.calls[-1], ('post', 'group/persons'))
+
+        personGroup = PersonGroup('key', self.context)
+        personGroup._invoke = lambda method, url, **kwargs: None
+        personGroup.delete('group')
+        self.assertEqual(self.context.personIndex.lookup('key', 'group', 'alice'), (False, None))
+
+    def test_a_person_deleted_elsewhere_is_created_again(self):
+        self.client.list('group')
+        self.missing.add('id-alice')
+        self.assertIsNone(self.client.update('group', 'id-alice', [], 'alice'))
+        self.assertEqual(self.context.personIndex.lookup('key', 'group', 'alice'), (True, None))
+
+        self.context.personIndex.load('key', 'group', self.persons)
+        self.assertEqual(self.client.createOrUpdate('group', [], 'alice'), {'personId': 'id-alice'})
+        self.assertEqual(self.calls[-2:], [('patch', 'group/persons/id-alice'), ('post', 'group/persons')])
+
+    def test_index_is_off_by_default(self):
+        self.client.context = ClientContext()
+        self.client.createOrUpdate('group', [], 'alice')
+        self.client.createOrUpdate('group', [], 'alice')
+        self.assertEqual([method for method, _ in self.calls], ['get', 'patch', 'get', 'patch'])
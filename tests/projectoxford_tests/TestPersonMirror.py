@@ -0,0 +1,135 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Person import Person
+from projectoxford.PersonGroup import PersonGroup
+from projectoxford.PersonMirror import PersonMirror
+
+class TestPersonMirror(unittest.TestCase):
+    '''Tests the local mirror of person groups and persons'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mirror = PersonMirror(os.path.join(self.directory, 'mirror.db'))
+        self.calls = []
+        self.groups = {'staff': {'personGroupId': 'staff', 'name': 'Staff', 'userData': None}}
+        self.persons = {'staff': {'p1': {'personId': 'p1', 'name': 'alice', 'userData': None, 'faceIds': ['f1']}}}
+        self.person, self.personGroup = self.createClients(self.mirror)
+
+    def tearDown(self):
+        self.mirror.close()
+        shutil.rmtree(self.directory)
+
+    def createClients(self, mirror):
+        context = ClientContext(personIndex=False, personMirror=mirror)
+        person = Person('key', context)
+        personGroup = PersonGroup('key', context)
+
+        def invoke(method, url, json=None, **kwargs):
+            parts = url.split('/persongroups')[1].strip('/').split('/')
+            self.calls.append((method, '/'.join(parts)))
+            if method != 'get':
+                return {'personId': 'p2'} if method == 'post' else None
+            if parts == ['']:
+                return list(self.groups.values())
+            if len(parts) == 1:
+                return self.groups.get(parts[0])
+            if len(parts) == 2:
+                return list(self.persons.get(parts[0], {}).values())
+            if len(parts) == 3:
+                return self.persons.get(parts[0], {}).get(parts[2])
+            return {'faceId': parts[4], 'userData': 'tag'}
+
+        person._invoke = invoke
+        personGroup._invoke = invoke
+        return person, personGroup
+
+    def test_lists_answer_reads(self):
+        self.person.list('staff')
+        self.personGroup.list()
+        self.calls = []
+
+        self.assertEqual(self.person.get('staff', 'p1')['name'], 'alice')
+        self.assertIsNone(self.person.get('staff', 'missing'))
+        self.assertEqual(self.personGroup.get('staff')['name'], 'Staff')
+        self.assertIsNone(self.personGroup.get('other'))
+        self.assertEqual([person['personId'] for person in self.person.list('staff')], ['p1'])
+        self.assertEqual(self.calls, [])
+
+    def test_reads_are_mirrored(self):
+        self.assertEqual(self.person.getFace('staff', 'p1', 'f1')['userData'], 'tag')
+        self.assertEqual(self.person.getFace('staff', 'p1', 'f1')['userData'], 'tag')
+        self.person.get('staff', 'p1')
+        self.person.get('staff', 'p1')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_changes_are_written_through(self):
+        self.person.list('staff')
+        self.person.create('staff', [], 'bob', 'new')
+        self.person.addFace('staff', 'p2', 'f2', 'tag2')
+        self.person.update('staff', 'p1', ['f1'], 'alice', 'moved')
+        self.calls = []
+
+        persons = dict((person['personId'], person) for person in self.person.list('staff'))
+        self.assertEqual(persons['p2']['name'], 'bob')
+        self.assertEqual(persons['p2']['faceIds'], ['f2'])
+        self.assertEqual(persons['p1']['userData'], 'moved')
+        self.assertEqual(self.person.getFace('staff', 'p2', 'f2')['userData'], 'tag2')
+
+        self.person.deleteFace('staff', 'p2', 'f2')
+        self.person.delete('staff', 'p1')
+        self.assertEqual(self.person.get('staff', 'p2')['faceIds'], [])
+        self.assertIsNone(self.person.get('staff', 'p1'))
+        self.assertEqual([method for method, _ in self.calls], ['delete', 'delete'])
+
+    def test_faces_added_to_missing_persons_are_not_mirrored(self):
+        self.person.list('staff')
+        self.person._invoke = lambda method, url, notFound=None, **kwargs: notFound
+        self.assertIsNone(self.person.addFace('staff', 'p1', 'f2', 'tag2'))
+        self.assertEqual(self.mirror.faceUserData('key', 'staff', [('p1', 'f2')]), {})
+        self.assertEqual(self.person.get('staff', 'p1')['faceIds'], ['f1'])
+
+    def test_created_groups_are_known_to_be_empty(self):
+        self.personGroup.create('new', 'New')
+        self.calls = []
+        self.assertEqual(self.person.list('new'), [])
+        self.assertEqual(self.personGroup.get('new')['name'], 'New')
+        self.personGroup.delete('new')
+        self.assertEqual(self.person.list('new'), [])
+        self.assertEqual([method for method, _ in self.calls], ['delete', 'get'])
+
+    def test_stale_records_are_read_again(self):
+        self.mirror.maxStalenessSeconds = 0.05
+        self.person.get('staff', 'p1')
+        time.sleep(0.1)
+        self.person.get('staff', 'p1')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_sync_only_lists_stale_groups(self):
+        self.groups['other'] = {'personGroupId': 'other', 'name': 'Other', 'userData': None}
+        self.personGroup.list()
+        self.person.list('staff')
+        self.calls = []
+
+        self.assertEqual(self.mirror.sync(self.person, self.personGroup), ['other'])
+        self.assertEqual(self.calls, [('get', 'other/persons')])
+        self.assertEqual(self.mirror.sync(self.person, self.personGroup), [])
+
+    def test_mirror_persists_across_processes(self):
+        self.person.list('staff')
+        self.mirror.close()
+
+        self.mirror = PersonMirror(os.path.join(self.directory, 'mirror.db'))
+        person, _ = self.createClients(self.mirror)
+        self.calls = []
+        self.assertEqual(person.get('staff', 'p1')['name'], 'alice')
+        self.assertEqual(self.calls, [])
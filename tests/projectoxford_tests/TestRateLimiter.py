@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Client import Client
+from projectoxford.ClientContext import ClientContext
+from projectoxford.RateLimitBackend import FileRateLimitBackend, LocalRateLimitBackend, RateLimitServer, RemoteRateLimitBackend
+from projectoxford.RateLimiter import RateLimiter
+
+def _reserveFromFileBackend(directory, count, results):
+    backend = FileRateLimitBackend(directory, 1, burst=10)
+    results.put(sum(1 for _ in range(count) if backend.reserve('key', maxWait=0) is not None))
+
+class TestRateLimiter(unittest.TestCase):
+    '''Tests the token bucket rate limiter'''
+
+    def test_rate_limiter_allows_burst_then_refuses(self):
+        limiter = RateLimiter(LocalRateLimitBackend(1, burst=3), 'key')
+        self.assertTrue(limiter.tryAcquire())
+        self.assertTrue(limiter.tryAcquire())
+        self.assertTrue(limiter.tryAcquire())
+        self.assertFalse(limiter.tryAcquire())
+
+    def test_rate_limiter_blocks_until_refilled(self):
+        limiter = RateLimiter(LocalRateLimitBackend(20, burst=1), 'key')
+        limiter.acquire()
+        start = time.time()
+        waited = limiter.acquire()
+        self.assertGreater(waited, 0)
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+    def test_rate_limiter_acquire_gives_up_after_timeout(self):
+        limiter = RateLimiter(LocalRateLimitBackend(1, burst=1), 'key')
+        limiter.acquire()
+        self.assertIsNone(limiter.acquire(timeout=0.01))
+
+    def test_rate_limiter_throws_for_invalid_rate(self):
+        self.assertRaises(Exception, LocalRateLimitBackend, 0)
+
+    def test_clients_with_same_key_share_rate_limiter(self):
+        context = ClientContext(transactionsPerSecond=10, burst=5)
+        face = Client.face('key', context)
+        vision = Client.vision('key', context)
+        other = Client.vision('other-key', context)
+        self.assertIs(face.rateLimiter, vision.rateLimiter)
+        self.assertIs(face.personGroup.rateLimiter, face.rateLimiter)
+        self.assertIsNot(other.rateLimiter, face.rateLimiter)
+
+    def test_clients_are_not_rate_limited_by_default(self):
+        self.assertIsNone(Client.face('key', ClientContext()).rateLimiter)
+
+    #
+    # test the shared rate limit backends
+    #
+    def test_file_backend_shares_budget_across_processes(self):
+        directory = tempfile.mkdtemp()
+        try:
+            results = multiprocessing.Queue()
+            workers = [multiprocessing.Process(target=_reserveFromFileBackend, args=(directory, 8, results)) for _ in range(3)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            granted = sum(results.get() for _ in workers)
+            self.assertGreaterEqual(granted, 10)
+            self.assertLessEqual(granted, 11, 'only the burst plus refill is granted across processes')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_remote_backend_shares_budget_through_server(self):
+        server = RateLimitServer(1, burst=4).start()
+        try:
+            first = RateLimiter(RemoteRateLimitBackend(server.url), 'key')
+            second = RateLimiter(RemoteRateLimitBackend(server.url), 'key')
+            granted = [first.tryAcquire(), second.tryAcquire(), first.tryAcquire(), second.tryAcquire(), first.tryAcquire()]
+            self.assertEqual(granted, [True, True, True, True, False])
+            self.assertTrue(RateLimiter(RemoteRateLimitBackend(server.url), 'other-key').tryAcquire())
+        finally:
+            server.stop()
+
+    def test_context_uses_provided_backend(self):
+        backend = LocalRateLimitBackend(1, burst=1)
+        face = Client.face('key', ClientContext(rateLimitBackend=backend))
+        self.assertIs(face.rateLimiter.backend, backend)
@@ -0,0 +1,144 @@
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Face import Face
+from projectoxford.PersonMirror import PersonMirror
+from projectoxford.Reconciliation import faceTag, planReconciliation
+
+class TestReconciliation(unittest.TestCase):
+    '''Tests the declarative person group reconciliation'''
+
+    def setUp(self):
+        self.client = Face('key')
+        self.group = {'name': 'Staff', 'userData': None}
+        self.persons = {}
+        self.faces = {}
+        self.calls = []
+        self.nextId = [0]
+
+        def newId(prefix):
+            self.nextId[0] += 1
+            return '{0}{1}'.format(prefix, self.nextId[0])
+
+        def record(name):
+            def decorator(function):
+                def wrapper(*args):
+                    self.calls.append(name)
+                    return function(*args)
+                return wrapper
+            return decorator
+
+        @record('createPerson')
+        def create(personGroupId, faceIds, name, userData=None):
+            personId = newId('person')
+            self.persons[personId] = {'personId': personId, 'name': name, 'userData': userData, 'faceIds': []}
+            return {'personId': personId}
+
+        @record('updatePerson')
+        def update(personGroupId, personId, faceIds, name, userData=None):
+            self.persons[personId].update(name=name, userData=userData)
+
+        @record('deletePerson')
+        def delete(personGroupId, personId):
+            del self.persons[personId]
+
+        @record('addFace')
+        def addFace(personGroupId, personId, faceId, userData=None):
+            self.persons[personId]['faceIds'].append(faceId)
+            self.faces[faceId] = userData
+
+        @record('deleteFace')
+        def deleteFace(personGroupId, personId, faceId):
+            self.persons[personId]['faceIds'].remove(faceId)
+
+        @record('getFace')
+        def getFace(personGroupId, personId, faceId):
+            return {'faceId': faceId, 'userData': self.faces.get(faceId)}
+
+        @record('detect')
+        def detect(options):
+            return [] if 'blank' in options['url'] else [{'faceId': newId('face')}]
+
+        @record('updateGroup')
+        def updateGroup(personGroupId, name, userData=None):
+            self.group = {'name': name, 'userData': userData}
+
+        self.client.person.create = create
+        self.client.person.update = update
+        self.client.person.delete = delete
+        self.client.person.addFace = addFace
+        self.client.person.deleteFace = deleteFace
+        self.client.person.getFace = getFace
+        self.client.person.list = lambda personGroupId: [dict(person, faceIds=list(person['faceIds'])) for person in self.persons.values()]
+        self.client.personGroup.get = lambda personGroupId: dict(self.group)
+        self.client.personGroup.update = updateGroup
+        self.client.detect = detect
+
+    def test_converges_and_then_makes_no_changes(self):
+        desired = {
+            'name': 'Staff',
+            'persons': {
+                'alice': {'userData': 'sales', 'faces': [{'url': 'alice1'}, {'url': 'alice2'}]},
+                'bob': {'faces': [{'url': 'bob1'}, {'url': 'blank'}]}
+            }
+        }
+        result = self.client.reconcile('group', desired)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(result['noFace'], {'bob': ['url:blank']})
+        self.assertEqual(sorted(person['name'] for person in self.persons.values()), ['alice', 'bob'])
+        self.assertEqual(self.calls.count('addFace'), 3)
+
+        self.calls = []
+        result = self.client.reconcile('group', desired, dryRun=True)
+        self.assertIsNone(result['plan']['group'])
+        self.assertEqual([(change['name'], change['action'], change['addFaces']) for change in result['plan']['persons']],
+                         [('bob', None, [('url:blank', {'url': 'blank'})])])
+        self.assertEqual(set(self.calls), set(['getFace']))
+
+    def test_applies_minimal_changes(self):
+        self.client.reconcile('group', {'name': 'Staff', 'persons': {
+            'alice': {'faces': [{'url': 'alice1'}]},
+            'carol': None
+        }})
+        alice = [person for person in self.persons.values() if person['name'] == 'alice'][0]
+        self.client.person.addFace('group', alice['personId'], 'manual', 'added by hand')
+
+        self.calls = []
+        self.client.reconcile('group', {'name': 'Staff v2', 'persons': {
+            'alice': {'userData': 'moved', 'faces': [{'url': 'alice2'}]}
+        }})
+        self.assertEqual(sorted(self.calls), sorted(['updateGroup', 'getFace', 'getFace', 'deletePerson', 'updatePerson',
+                                                     'deleteFace', 'detect', 'addFace']))
+        self.assertEqual(self.group['name'], 'Staff v2')
+        self.assertEqual(len(alice['faceIds']), 2)
+        self.assertIn('manual', alice['faceIds'])
+
+    def test_faces_known_to_the_mirror_are_not_read(self):
+        mirror = self.client.context.personMirror = PersonMirror()
+        desired = {'name': 'Staff', 'persons': {'alice': {'faces': [{'url': 'alice1'}, {'url': 'alice2'}]}}}
+        self.client.reconcile('group', desired)
+        alice = [person for person in self.persons.values() if person['name'] == 'alice'][0]
+        mirror.putFace('key', 'group', alice['personId'], alice['faceIds'][0], self.faces[alice['faceIds'][0]])
+
+        self.calls = []
+        result = self.client.reconcile('group', desired, dryRun=True)
+        self.assertEqual(result['plan']['persons'], [])
+        self.assertEqual(self.calls, ['getFace'], 'only the face the mirror does not have is read')
+
+    def test_plans_group_creation_and_duplicate_removal(self):
+        persons = [
+            {'personId': '1', 'name': 'alice', 'userData': None, 'faceIds': []},
+            {'personId': '2', 'name': 'alice', 'userData': None, 'faceIds': []}
+        ]
+        plan = planReconciliation({'name': 'Staff', 'persons': {'alice': {}}}, None, persons, {})
+        self.assertEqual(plan['group'], 'create')
+        self.assertEqual([(change['personId'], change['action']) for change in plan['persons']], [('2', 'delete')])
+
+    def test_long_source_keys_are_hashed(self):
+        self.assertEqual(faceTag('url:short'), 'url:short')
+        self.assertTrue(faceTag('url:' + 'x' * 2000).startswith('sha256:'))
@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from projectoxford.RequestMetrics import RequestMetrics
+from projectoxford.ResponseCache import ResponseCache
+from projectoxford.RetryPolicy import RetryPolicy
+
+class Response(object):
+
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+        self.headers = dict({'content-type': 'application/json'}, **(headers or {}))
+
+    def json(self):
+        return json.loads(self.text)
+
+class TestRequestMetrics(unittest.TestCase):
+    '''Tests the request events and their aggregation'''
+
+    def setUp(self):
+        self.events = []
+        self.metrics = RequestMetrics(buckets=(0.1, 1))
+        self.context = ClientContext(retryPolicy=RetryPolicy(backoffBase=0, backoffMax=0), requestHooks=[self.events.append, self.metrics])
+        self.responses = []
+
+        def request(method, url, **kwargs):
+            return self.responses.pop(0)
+
+        self.context.request = request
+        self.client = Face('key', self.context)
+
+    def test_events_describe_each_call(self):
+        self.responses = [Response(429, {}, {'retry-after': '0'}), Response(200, [{'faceId': 'a'}])]
+        self.client.detect({'stream': b'image'})
+        event = self.events[0]
+        self.assertEqual(event['kind'], 'request')
+        self.assertEqual(event['endpoint'], 'face/detections')
+        self.assertEqual(event['method'], 'post')
+        self.assertEqual(event['status'], 200)
+        self.assertEqual(event['retries'], 1)
+        self.assertEqual(event['requestBytes'], 5)
+        self.assertEqual(event['responseBytes'], len(b'[{"faceId": "a"}]'))
+        self.assertIsNone(event['error'])
+        self.assertGreaterEqual(event['latency'], 0)
+
+    def test_json_bodies_are_encoded_once(self):
+        sent = []
+
+        def request(method, url, **kwargs):
+            sent.append(kwargs['data'])
+            return self.responses.pop(0)
+
+        self.context.request = request
+        self.responses = [Response(503, {}), Response(200, [])]
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual(sent, [b'{"url": "http://example.com/a.jpg"}'] * 2)
+        self.assertIs(sent[0], sent[1])
+        self.assertEqual(self.events[0]['requestBytes'], len(sent[0]))
+
+    def test_no_event_is_built_without_hooks(self):
+        import projectoxford.Base as base
+        built = []
+        requestEvent = base._requestEvent
+        base._requestEvent = lambda *args: built.append(args) or requestEvent(*args)
+        try:
+            self.context.requestHooks = []
+            self.responses = [Response(200, [])]
+            self.assertEqual(self.client.detect({'url': 'http://example.com/a.jpg'}), [])
+        finally:
+            base._requestEvent = requestEvent
+        self.assertEqual(built, [])
+
+    def test_failed_calls_carry_their_error(self):
+        self.responses = [Response(400, {'code': 'BadArgument'})]
+        self.assertRaises(Exception, self.client.person.get, 'group', 'person')
+        self.assertEqual(self.events[0]['status'], 400)
+        self.assertIn('status 400', str(self.events[0]['error']))
+        self.assertEqual(self.events[0]['error'].status, 400)
+
+    def test_cache_lookups_are_reported(self):
+        self.context.responseCache = ResponseCache(cacheDetections=True)
+        self.responses = [Response(200, [])]
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.client.detect({'url': 'http://example.com/a.jpg'})
+        self.assertEqual([event.get('cache') for event in self.events], ['miss', None, 'hit'])
+
+    def test_a_failing_hook_does_not_fail_the_call(self):
+        def fail(event):
+            raise ValueError('broken hook')
+
+        self.context.requestHooks.insert(0, fail)
+        self.responses = [Response(200, [])]
+        self.assertEqual(self.client.detect({'url': 'http://example.com/a.jpg'}), [])
+        self.assertEqual(len(self.events), 1)
+
+    def test_prometheus_export(self):
+        for latency in (0.05, 0.5, 5):
+            self.metrics({'kind': 'request', 'endpoint': 'face/detections', 'method': 'post', 'status': 200, 'error': None, 'latency': latency,
+                          'throttleSeconds': 0.5, 'retries': 1, 'requestBytes': 10, 'responseBytes': None})
+        self.metrics({'kind': 'cache', 'endpoint': 'vision/ocr', 'cache': 'hit'})
+        text = self.metrics.prometheus()
+        self.assertIn('projectoxford_requests_total{endpoint="face/detections",method="post",status="200"} 3\n', text)
+        self.assertIn('projectoxford_request_duration_seconds_bucket{endpoint="face/detections",le="0.1"} 1\n', text)
+        self.assertIn('projectoxford_request_duration_seconds_bucket{endpoint="face/detections",le="1.0"} 2\n', text)
+        self.assertIn('projectoxford_request_duration_seconds_bucket{endpoint="face/detections",le="+Inf"} 3\n', text)
+        self.assertIn('projectoxford_request_duration_seconds_count{endpoint="face/detections"} 3\n', text)
+        self.assertIn('projectoxford_throttle_wait_seconds_total{endpoint="face/detections"} 1.5\n', text)
+        self.assertIn('projectoxford_retries_total{endpoint="face/detections"} 3\n', text)
+        self.assertIn('projectoxford_request_bytes_total{endpoint="face/detections"} 30\n', text)
+        self.assertIn('projectoxford_cache_lookups_total{endpoint="vision/ocr",result="hit"} 1\n', text)
+        self.assertIn('# TYPE projectoxford_request_duration_seconds histogram\n', text)
+
+        self.assertEqual(self.metrics.quantile('face/detections', 0.5), 1.0)
+        self.assertEqual(self.metrics.quantile('face/detections', 0.99), float('inf'))
+        self.assertIsNone(self.metrics.quantile('vision/ocr', 0.5))
@@ -0,0 +1,104 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.ResponseCache import ResponseCache, digestSource
+from projectoxford.Vision import Vision
+
+_analyzeUrl = 'https://api.projectoxford.ai/vision/v1/analyses'
+_detectUrl = 'https://api.projectoxford.ai/face/v0/detections'
+
+class TestResponseCache(unittest.TestCase):
+    '''Tests the image analysis response cache'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.localFilePrefix = os.path.join(rootDirectory, 'tests', 'images')
+        cls.imagePath = os.path.join(cls.localFilePrefix, 'face1.jpg')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cache_key_depends_on_key_image_endpoint_and_params(self):
+        cache = ResponseCache(cacheDetections=True)
+        key = cache.key('key', _analyzeUrl, {'a': 1, 'b': 2}, {'path': self.imagePath})
+        self.assertEqual(key, cache.key('key', _analyzeUrl, {'b': 2, 'a': 1}, {'path': self.imagePath}))
+        self.assertNotEqual(key, cache.key('other', _analyzeUrl, {'a': 1, 'b': 2}, {'path': self.imagePath}))
+        self.assertNotEqual(key, cache.key('key', _analyzeUrl, {'a': 1}, {'path': self.imagePath}))
+        self.assertNotEqual(key, cache.key('key', _detectUrl, {'a': 1, 'b': 2}, {'path': self.imagePath}))
+        self.assertNotEqual(key, cache.key('key', _analyzeUrl, {'a': 1, 'b': 2}, {'url': 'http://example.com/a.jpg'}))
+
+    def test_detections_are_only_cached_on_request_and_briefly(self):
+        self.assertIsNone(ResponseCache().key('key', _detectUrl, {}, {'path': self.imagePath}))
+        cache = ResponseCache(cacheDetections=True, ttlSeconds=None)
+        cache.put('a', _detectUrl, [{'faceId': 'a'}])
+        self.assertLessEqual(cache._entries['a'][0], time.time() + 60 * 60)
+
+    def test_digest_is_the_same_for_path_bytes_and_file(self):
+        with open(self.imagePath, 'rb') as file:
+            content = file.read()
+            file.seek(0)
+            self.assertEqual(digestSource({'stream': file}), digestSource({'path': self.imagePath}))
+            self.assertEqual(file.tell(), 0, 'stream position is restored')
+        self.assertEqual(digestSource({'stream': content}), digestSource({'path': self.imagePath}))
+        self.assertIsNone(digestSource({'stream': iter([content])}))
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResponseCache(maxEntries=2)
+        cache.put('a', _analyzeUrl, {'value': 'a'})
+        cache.put('b', _analyzeUrl, {'value': 'b'})
+        cache.get('a')
+        cache.put('c', _analyzeUrl, {'value': 'c'})
+        self.assertEqual(cache.get('a'), (True, {'value': 'a'}))
+        self.assertEqual(cache.get('b'), (False, None))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(ttlSeconds=0.05)
+        cache.put('a', _analyzeUrl, [1, 2])
+        self.assertEqual(cache.get('a'), (True, [1, 2]))
+        time.sleep(0.1)
+        self.assertEqual(cache.get('a'), (False, None))
+
+    def test_disk_tier_survives_new_instances(self):
+        ResponseCache(directory=self.directory).put('a', _analyzeUrl, b'thumbnail')
+        cache = ResponseCache(directory=self.directory)
+        self.assertEqual(cache.get('a'), (True, b'thumbnail'))
+        self.assertEqual(cache.stats()['diskHits'], 1)
+        self.assertEqual(cache.get('a'), (True, b'thumbnail'))
+        self.assertEqual(cache.stats()['memoryHits'], 1)
+
+    def test_disk_tier_is_trimmed_to_size(self):
+        cache = ResponseCache(directory=self.directory, maxDiskBytes=300)
+        for name in 'abcde':
+            cache.put(name, _analyzeUrl, b'x' * 100)
+            time.sleep(0.01)
+        self.assertLessEqual(cache.stats()['diskBytes'], 300)
+        self.assertEqual(ResponseCache(directory=self.directory).get('e'), (True, b'x' * 100))
+
+    def test_client_serves_repeat_submissions_from_cache(self):
+        cache = ResponseCache()
+        client = Vision('key', ClientContext(responseCache=cache))
+        calls = []
+        client._invoke = lambda *args, **kwargs: calls.append(args) or {'categories': []}
+
+        first = client.analyze({'path': self.imagePath, 'Categories': True})
+        second = client.analyze({'path': self.imagePath, 'Categories': True})
+        client.analyze({'path': self.imagePath, 'Color': True})
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.stats()['hits'], 1)
@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+
+import requests
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford import Base as baseModule
+from projectoxford.RetryPolicy import RetryPolicy, parseRetryAfter
+
+class TestRetryPolicy(unittest.TestCase):
+    '''Tests the retry policy used by the project oxford API clients'''
+
+    def test_retry_policy_retries_configured_status_codes(self):
+        policy = RetryPolicy(retryStatusCodes=[429, 503])
+        self.assertIsNotNone(policy.nextDelay(0, None, status=503))
+        self.assertIsNone(policy.nextDelay(0, None, status=500))
+        self.assertIsNone(policy.nextDelay(0, None, status=200))
+        self.assertEqual(policy.stats(), {503: 1})
+
+    def test_retry_policy_retries_transport_errors(self):
+        policy = RetryPolicy()
+        self.assertIsNotNone(policy.nextDelay(0, None, error=requests.exceptions.ConnectionError()))
+        self.assertIsNotNone(policy.nextDelay(0, None, error=requests.exceptions.Timeout()))
+        self.assertIsNone(policy.nextDelay(0, None, error=ValueError()))
+
+    def test_retry_policy_stops_after_max_retries(self):
+        policy = RetryPolicy(maxRetries=2)
+        self.assertIsNotNone(policy.nextDelay(1, None, status=429))
+        self.assertIsNone(policy.nextDelay(2, None, status=429))
+
+    def test_retry_policy_backoff_is_jittered_and_bounded(self):
+        policy = RetryPolicy(backoffBase=1, backoffMax=4)
+        delays = [policy.backoff(10) for _ in range(100)]
+        self.assertTrue(all(0 <= delay <= 4 for delay in delays))
+        self.assertGreater(len(set(delays)), 1, 'delays are jittered')
+
+    def test_retry_policy_honors_retry_after(self):
+        policy = RetryPolicy(backoffBase=1)
+        for _ in range(20):
+            delay = policy.nextDelay(0, None, status=429, retryAfter=3)
+            self.assertGreaterEqual(delay, 3)
+            self.assertLessEqual(delay, 4)
+
+    def test_retry_policy_respects_deadline(self):
+        policy = RetryPolicy(deadlineSeconds=1)
+        deadline = policy.deadline()
+        self.assertIsNone(policy.nextDelay(0, deadline, status=429, retryAfter=5))
+        self.assertLessEqual(policy.timeout(deadline), 1)
+
+    def test_retry_policy_only_retries_writes_when_throttled(self):
+        policy = RetryPolicy()
+        reset = requests.exceptions.ConnectionError()
+        self.assertIsNotNone(policy.nextDelay(0, None, status=503, method='get', endpoint='face/persongroups'))
+        self.assertIsNotNone(policy.nextDelay(0, None, status=503, method='post', endpoint='face/detections'))
+        self.assertIsNone(policy.nextDelay(0, None, status=503, method='post', endpoint='face/persongroups'))
+        self.assertIsNone(policy.nextDelay(0, None, error=reset, method='post', endpoint='face/persongroups'))
+        self.assertIsNotNone(policy.nextDelay(0, None, status=429, method='post', endpoint='face/persongroups'))
+
+        optedIn = RetryPolicy(retryPosts=['face/persongroups'])
+        self.assertIsNotNone(optedIn.nextDelay(0, None, error=reset, method='post', endpoint='face/persongroups'))
+
+    def test_retry_count_is_a_deprecated_default(self):
+        previous = baseModule.retryCount
+        baseModule.retryCount = 2
+        try:
+            self.assertEqual(RetryPolicy().maxRetries, 2)
+        finally:
+            baseModule.retryCount = previous
+        self.assertEqual(RetryPolicy(maxRetries=7).maxRetries, 7)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parseRetryAfter('2'), 2)
+        self.assertIsNone(parseRetryAfter(None))
+        self.assertIsNone(parseRetryAfter('Wed, 21 Oct 2015 07:28:00 GMT'))
@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.ClientContext import ClientContext
+from projectoxford.Face import Face
+from projectoxford.Person import Person
+from projectoxford.SingleFlight import SingleFlight
+
+class Response(object):
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+        self.headers = {'content-type': 'application/json'}
+
+    def json(self):
+        return json.loads(self.text)
+
+class TestSingleFlight(unittest.TestCase):
+    '''Tests the coalescing of identical calls in flight'''
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.context = ClientContext(singleFlight=self.flight)
+        self.sent = []
+        self.release = threading.Event()
+        self.status = 200
+
+        def request(method, url, **kwargs):
+            self.sent.append((method, url))
+            self.release.wait(5)
+            return Response(self.status, {'personId': url.split('/')[-1], 'name': 'alice'})
+
+        self.context.request = request
+
+    def _concurrently(self, count, function):
+        results = [None] * count
+        errors = [None] * count
+
+        def run(index):
+            try:
+                results[index] = function()
+            except Exception as error:
+                errors[index] = error
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while self.flight.stats()['coalesced'] < count - 1 and time.time() < deadline:
+            time.sleep(0.005)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_identical_gets_are_sent_once(self):
+        client = Person('key', self.context)
+        results, errors = self._concurrently(4, lambda: client.get('group', 'alice'))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(results, [{'personId': 'alice', 'name': 'alice'}] * 4)
+        self.assertEqual(len(set(id(result) for result in results)), 4, 'every caller gets its own copy')
+        self.assertEqual(self.flight.stats(), {'sent': 1, 'coalesced': 3, 'inFlight': 0})
+
+    def test_every_caller_gets_the_error(self):
+        self.status = 400
+        client = Person('key', self.context)
+        results, errors = self._concurrently(3, lambda: client.get('group', 'alice'))
+        self.assertEqual(len(self.sent), 1)
+        self.assertTrue(all(error is not None and 'status 400' in str(error) for error in errors))
+
+    def test_different_calls_are_not_coalesced(self):
+        self.release.set()
+        key = self.flight.key('key', 'get', 'https://api.projectoxford.ai/face/v0/persongroups/group', {})
+        self.assertNotEqual(key, self.flight.key('other', 'get', 'https://api.projectoxford.ai/face/v0/persongroups/group', {}))
+        self.assertNotEqual(key, self.flight.key('key', 'get', 'https://api.projectoxford.ai/face/v0/persongroups/other', {}))
+        detect = self.flight.key('key', 'post', 'https://api.projectoxford.ai/face/v0/detections', {'analyzesAge': 'true'}, data=b'image')
+        self.assertNotEqual(detect, self.flight.key('key', 'post', 'https://api.projectoxford.ai/face/v0/detections', {'analyzesAge': 'false'}, data=b'image'))
+        self.assertNotEqual(detect, self.flight.key('key', 'post', 'https://api.projectoxford.ai/face/v0/detections', {'analyzesAge': 'true'}, data=b'other'))
+
+    def test_writes_and_unreadable_bodies_are_always_sent(self):
+        url = 'https://api.projectoxford.ai/face/v0/persongroups/group/persons'
+        self.assertIsNone(self.flight.key('key', 'post', url, {}, json={'name': 'alice'}))
+        self.assertIsNone(self.flight.key('key', 'delete', url + '/alice', {}))
+        self.assertIsNone(self.flight.key('key', 'post', 'https://api.projectoxford.ai/face/v0/detections', {}, data=iter([b'image'])))
+
+    def test_identical_detections_are_sent_once(self):
+        client = Face('key', self.context)
+        results, errors = self._concurrently(3, lambda: client.detect({'url': 'http://example.com/a.jpg'}))
+        self.assertEqual(self.sent, [('post', 'https://api.projectoxford.ai/face/v0/detections')])
+        self.assertEqual(errors, [None] * 3)
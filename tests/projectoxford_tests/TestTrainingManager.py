@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.PersonGroup import PersonGroup
+from projectoxford.TrainingManager import TrainingManager
+
+class TestTrainingManager(unittest.TestCase):
+    '''Tests the training manager'''
+
+    def setUp(self):
+        self.personGroup = PersonGroup('key')
+        self.polls = {}
+        self.lock = threading.Lock()
+        self.runningPolls = {}
+
+        def trainingStart(personGroupId):
+            with self.lock:
+                self.polls[personGroupId] = []
+            return {'status': 'running'}
+
+        def trainingStatus(personGroupId):
+            with self.lock:
+                self.polls[personGroupId].append(time.time())
+                running = len(self.polls[personGroupId]) < self.runningPolls.get(personGroupId, 1)
+            return {'status': 'running' if running else 'succeeded'}
+
+        self.personGroup.trainingStart = trainingStart
+        self.personGroup.trainingStatus = trainingStatus
+
+    def test_trains_many_groups_on_one_thread(self):
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.01, maxPollSeconds=0.05)
+        threads = threading.active_count()
+        futures = manager.trainMany(['group{0}'.format(index) for index in range(20)])
+        self.assertLessEqual(threading.active_count(), threads + 1 + manager.concurrency)
+
+        for future in futures.values():
+            self.assertEqual(future.result(5), {'status': 'succeeded'})
+        self.assertEqual(manager.pending(), [])
+        manager.close()
+
+    def test_polls_back_off(self):
+        self.runningPolls['group'] = 4
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.02, maxPollSeconds=1, backoffFactor=2.0)
+        manager.train('group').result(5)
+        polls = self.polls['group']
+        gaps = [later - earlier for earlier, later in zip(polls, polls[1:])]
+        self.assertEqual(len(polls), 4)
+        self.assertTrue(gaps[0] < gaps[1] < gaps[2])
+        manager.close()
+
+    def test_training_the_same_group_shares_a_future(self):
+        self.runningPolls['group'] = 3
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.01)
+        self.assertIs(manager.train('group'), manager.train('group'))
+        manager.close()
+
+    def test_timeouts_are_measured_in_elapsed_time(self):
+        self.runningPolls['group'] = 1000
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.01, maxPollSeconds=0.01, timeoutSeconds=0.2)
+        started = time.time()
+        future = manager.train('group')
+        self.assertRaises(Exception, future.result, 5)
+        self.assertLess(time.time() - started, 1)
+        manager.close()
+
+    def test_errors_fail_the_future(self):
+        def trainingStart(personGroupId):
+            raise Exception('status 404: person group not found')
+
+        self.personGroup.trainingStart = trainingStart
+        manager = TrainingManager(self.personGroup)
+        self.assertRaises(Exception, manager.train('missing').result, 5)
+        manager.close()
+
+    def test_close_cancels_pending_trainings(self):
+        self.runningPolls['group'] = 1000
+        manager = TrainingManager(self.personGroup, initialPollSeconds=10)
+        future = manager.train('group')
+        time.sleep(0.1)
+        manager.close()
+        self.assertTrue(future.cancelled())
+        self.assertRaises(Exception, manager.train, 'group')
+
+    def test_cancelled_futures_do_not_stop_the_scheduler(self):
+        self.runningPolls['cancelled'] = 3
+        self.runningPolls['other'] = 3
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.01, maxPollSeconds=0.01)
+        cancelled = manager.train('cancelled')
+        other = manager.train('other')
+        self.assertTrue(cancelled.cancel())
+        self.assertEqual(other.result(5)['status'], 'succeeded')
+        self.assertEqual(manager.train('cancelled').result(5)['status'], 'succeeded')
+        manager.close()
+
+    def test_a_slow_poll_does_not_delay_other_groups(self):
+        release = threading.Event()
+        trainingStatus = self.personGroup.trainingStatus
+
+        def slowStatus(personGroupId):
+            if personGroupId == 'slow':
+                release.wait(5)
+            return trainingStatus(personGroupId)
+
+        self.personGroup.trainingStatus = slowStatus
+        self.runningPolls['fast'] = 5
+        manager = TrainingManager(self.personGroup, initialPollSeconds=0.01, maxPollSeconds=0.01)
+        slow = manager.train('slow')
+        fast = manager.train('fast')
+        try:
+            self.assertEqual(fast.result(2)['status'], 'succeeded')
+            self.assertFalse(slow.done())
+        finally:
+            release.set()
+        self.assertEqual(slow.result(5)['status'], 'succeeded')
+        manager.close()
@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+rootDirectory = os.path.dirname(os.path.realpath('__file__'))
+if rootDirectory not in sys.path:
+    sys.path.append(os.path.join(rootDirectory, '..'))
+
+from projectoxford.Person import Person
+from projectoxford.PersonGroup import PersonGroup
+from projectoxford.TrainingManager import TrainingManager
+from projectoxford.TrainingScheduler import TrainingScheduler
+
+class TestTrainingScheduler(unittest.TestCase):
+    '''Tests the debounced training scheduler'''
+
+    def setUp(self):
+        self.personGroup = PersonGroup('key')
+        self.starts = []
+        self.running = 0
+        self.maxRunning = 0
+        self.trainingSeconds = 0.05
+        self.lock = threading.Lock()
+
+        def trainingStart(personGroupId):
+            with self.lock:
+                self.starts.append((personGroupId, time.time()))
+                self.running += 1
+                self.maxRunning = max(self.maxRunning, self.running)
+            return {'status': 'running'}
+
+        def trainingStatus(personGroupId):
+            if time.time() < self.starts[-1][1] + self.trainingSeconds:
+                return {'status': 'running'}
+            with self.lock:
+                self.running -= 1
+            return {'status': 'succeeded'}
+
+        self.personGroup.trainingStart = trainingStart
+        self.personGroup.trainingStatus = trainingStatus
+        self.manager = TrainingManager(self.personGroup, initialPollSeconds=0.01, maxPollSeconds=0.01)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def waitForTrainings(self, scheduler):
+        for _ in range(200):
+            if not scheduler.dirty() and not scheduler.trainings():
+                return
+            time.sleep(0.01)
+        self.fail('trainings did not finish')
+
+    def test_bursts_of_changes_train_once(self):
+        scheduler = TrainingScheduler(self.personGroup, quietSeconds=0.1, maxDelaySeconds=10, trainingManager=self.manager)
+        for _ in range(10):
+            scheduler.markDirty('group')
+            time.sleep(0.01)
+        self.assertEqual(self.starts, [])
+
+        time.sleep(0.15)
+        self.waitForTrainings(scheduler)
+        self.assertEqual([personGroupId for personGroupId, _ in self.starts], ['group'])
+        scheduler.close()
+
+    def test_max_delay_bounds_busy_groups(self):
+        scheduler = TrainingScheduler(self.personGroup, quietSeconds=0.1, maxDelaySeconds=0.2, trainingManager=self.manager)
+        started = time.time()
+        while time.time() - started < 0.4 and not self.starts:
+            scheduler.markDirty('group')
+            time.sleep(0.02)
+
+        self.assertEqual(len(self.starts), 1)
+        self.assertLess(self.starts[0][1] - started, 0.35)
+        scheduler.close()
+
+    def test_changes_during_training_start_one_more_afterwards(self):
+        self.trainingSeconds = 0.2
+        scheduler = TrainingScheduler(self.personGroup, quietSeconds=0.01, maxDelaySeconds=10, trainingManager=self.manager)
+        scheduler.markDirty('group')
+        time.sleep(0.1)
+        for _ in range(5):
+            scheduler.markDirty('group')
+        self.assertEqual(len(self.starts), 1)
+
+        self.waitForTrainings(scheduler)
+        self.assertEqual(len(self.starts), 2)
+        self.assertEqual(self.maxRunning, 1)
+        scheduler.close()
+
+    def test_person_changes_mark_the_group_dirty(self):
+        scheduler = TrainingScheduler(self.personGroup, quietSeconds=60, trainingManager=self.manager)
+        person = Person('key')
+        person._invoke = lambda method, url, **kwargs: {'personId': 'id'} if method == 'post' else None
+        person.trainingScheduler = scheduler
+
+        person.addFace('group1', 'id', 'face')
+        person.create('group2', [], 'alice')
+        person.getFace('group3', 'id', 'face')
+        self.assertEqual(sorted(scheduler.dirty()), ['group1', 'group2'])
+
+        scheduler.flush()
+        self.waitForTrainings(scheduler)
+        self.assertEqual(sorted(personGroupId for personGroupId, _ in self.starts), ['group1', 'group2'])
+        scheduler.close()
+
+    def test_changes_to_missing_persons_do_not_train(self):
+        scheduler = TrainingScheduler(self.personGroup, quietSeconds=60, trainingManager=self.manager)
+        person = Person('key')
+        person._invoke = lambda method, url, notFound=None, **kwargs: notFound
+        person.trainingScheduler = scheduler
+
+        self.assertIsNone(person.addFace('group1', 'gone', 'face'))
+        self.assertIsNone(person.deleteFace('group1', 'gone', 'face'))
+        self.assertIsNone(person.delete('group1', 'gone'))
+        self.assertEqual(scheduler.dirty(), [])
+        scheduler.close()
@@ -1,5 +1,34 @@
+import sys
+
 from . import TestClient
 from . import TestFace
 from . import TestPersonGroup
 from . import TestVision
 from . import TestEmotion
+from . import TestRetryPolicy
+from . import TestRateLimiter
+from . import TestConcurrencyLimiter
+from . import TestResponseCache
+from . import TestBase
+from . import TestParallel
+from . import TestIdentifyBatcher
+from . import TestPersonIndex
+from . import TestEnrollment
+from . import TestTrainingManager
+from . import TestTrainingScheduler
+from . import TestReconciliation
+from . import TestPersonMirror
+from . import TestFaceIdRegistry
+from . import TestIdentifyCache
+from . import TestSingleFlight
+from . import TestRequestMetrics
+from . import TestFakeServer
+
+# the asyncio clients need Python 3.5 and aiohttp, see the async extra in setup.py
+try:
+    import aiohttp  # noqa
+except ImportError:
+    aiohttp = None
+if sys.version_info >= (3, 5) and aiohttp is not None:
+    from . import TestAsyncFace
+    from . import TestAsyncSingleFlight